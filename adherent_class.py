@@ -5,36 +5,42 @@ Gère les informations d'un adhérent de la bibliothèque
     """
 
 from datetime import date
+from document_classes import ligne_csv, lire_ligne_csv, safe_date, partager_date, partager_str
+
+_AUCUN_LIVRE = frozenset()  # partagé par tous les adhérents sans emprunt
 
 
 class Adherent:
     # Représente un membre de la bibliothèque (adhérent)
 
+    __slots__ = ("id", "nom", "prenom", "email", "livres_empruntes", "date_inscription")
     _id_counter = 0  # Auto-increment ID
 
     def __init__(self, nom: str, prenom: str, email: str = ""):
         # Initialise un membre (adhérent)
         Adherent._id_counter += 1
         self.id = Adherent._id_counter
-        self.nom = str(nom).strip()
-        self.prenom = str(prenom).strip()
+        self.nom = partager_str(str(nom).strip())
+        self.prenom = partager_str(str(prenom).strip())
         self.email = str(email).strip() if email else ""
-        self.livres_empruntes = []  # Liste pour stocker les identifiants (ID) des livres empruntés
-        self.date_inscription = date.today()
+        self.livres_empruntes = _AUCUN_LIVRE  # Ensemble des identifiants (ID) des livres empruntés
+        self.date_inscription = partager_date(date.today())
 
     def get_nom_complet(self) -> str:
         # Obtenir le nom complet
         return f"{self.prenom} {self.nom}"
 
     def ajouter_emprunt(self, livre_id: int):
-        # Ajouter un livre emprunté
-        if livre_id not in self.livres_empruntes:
-            self.livres_empruntes.append(livre_id)
+        # Ajouter un livre emprunté (l'ensemble n'est créé qu'au premier emprunt)
+        if not self.livres_empruntes:
+            self.livres_empruntes = {livre_id}
+        else:
+            self.livres_empruntes.add(livre_id)
 
     def retirer_emprunt(self, livre_id: int):
         # Retirer un livre emprunté
         if livre_id in self.livres_empruntes:
-            self.livres_empruntes.remove(livre_id)
+            self.livres_empruntes.discard(livre_id)
 
     def nombre_emprunts(self) -> int:
         # Obtenir le nombre de livres empruntés
@@ -46,15 +52,17 @@ class Adherent:
 
     def to_csv(self) -> str:
         # Convertir au format CSV
-        return f"{self.id},{self.nom},{self.prenom},{self.email},{self.date_inscription}"
+        return ligne_csv(self.id, self.nom, self.prenom, self.email, self.date_inscription)
 
     @staticmethod
     def from_csv(line: str):
         # Créer un Adhérent à partir d'une ligne CSV
-        parts = line.strip().split(",")
+        parts = lire_ligne_csv(line)
         if len(parts) >= 3:
             adherent = Adherent(parts[1], parts[2], parts[3] if len(parts) > 3 else "")
             adherent.id = int(parts[0])
+            if len(parts) > 4 and parts[4]:
+                adherent.date_inscription = partager_date(safe_date(parts[4]))
             if Adherent._id_counter < adherent.id:
                 Adherent._id_counter = adherent.id
             return adherent
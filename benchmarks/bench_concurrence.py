@@ -0,0 +1,112 @@
+"""
+bench_concurrence.py
+Test de charge des emprunts concurrents: plusieurs threads empruntent, retournent
+    et retirent des livres et des adhérents d'un petit catalogue très disputé, puis
+    les invariants sont vérifiés (aucun livre prêté deux fois, index cohérents).
+    Affiche le débit (opérations/s) pour chaque nombre de threads.
+
+    python -m benchmarks.bench_concurrence [operations_par_thread] [threads ...]
+"""
+
+import random
+import sys
+import threading
+import time
+
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre
+from adherent_class import Adherent
+
+NB_LIVRES = 200  # peu de livres: beaucoup de collisions entre threads
+NB_ADHERENTS = 100
+
+
+def _bibliotheque() -> Bibliotheque:
+    bibliotheque = Bibliotheque()
+    for i in range(NB_LIVRES):
+        bibliotheque.ajouter_document(Livre(f"Titre {i}", f"Auteur {i % 20}"))
+    for i in range(NB_ADHERENTS):
+        bibliotheque.ajouter_adherent(Adherent(f"Nom{i}", f"Prenom{i}"))
+    return bibliotheque
+
+
+def _poste(bibliotheque, graine: int, nb_operations: int, compteurs: list, depart: threading.Barrier):
+    # Un poste de prêt: surtout des emprunts et des retours, parfois un retrait
+    hasard = random.Random(graine)
+    livres = list(bibliotheque.documents)
+    adherents = list(bibliotheque.adherents)
+    emprunts = retours = 0
+    depart.wait()
+    for _ in range(nb_operations):
+        tirage = hasard.random()
+        if tirage < 0.55:
+            succes, _ = bibliotheque.creer_emprunt(hasard.choice(adherents), hasard.choice(livres))
+            emprunts += succes
+        elif tirage < 0.97:
+            # Retourner un livre sorti, quel que soit le poste qui l'a prêté
+            emprunt = bibliotheque.trouver_emprunt_actif_livre(hasard.choice(livres))
+            if emprunt is not None:
+                succes, _ = bibliotheque.retourner_livre(emprunt.id)
+                retours += succes
+        elif tirage < 0.99:
+            bibliotheque.retirer_document(hasard.choice(livres))
+        else:
+            bibliotheque.retirer_adherent(hasard.choice(adherents))
+    compteurs.append((emprunts, retours))
+
+
+def verifier(bibliotheque, compteurs: list):
+    # Invariants après la charge; lève AssertionError au premier écart
+    actifs = [emp for emp in bibliotheque.emprunts.values() if emp.est_actif()]
+    par_livre = {}
+    for emp in actifs:
+        assert emp.livre_id not in par_livre, f"livre #{emp.livre_id} prêté deux fois"
+        par_livre[emp.livre_id] = emp
+    emprunts = sum(e for e, _ in compteurs)
+    retours = sum(r for _, r in compteurs)
+    assert emprunts - retours == len(actifs), f"{emprunts} emprunts - {retours} retours != {len(actifs)} actifs"
+    assert set(bibliotheque._emprunts_actifs) == {emp.id for emp in actifs}, "index des emprunts actifs"
+    assert bibliotheque._emprunts_actifs_par_livre == {
+        livre_id: {emp.adherent_id: emp} for livre_id, emp in par_livre.items()
+    }, "index des emprunts par livre"
+    assert len(bibliotheque._echeancier) == len(actifs), "échéancier"
+    for doc in bibliotheque.documents.values():
+        assert doc.est_disponible == (doc.id not in par_livre), f"disponibilité du livre #{doc.id}"
+    for adh in bibliotheque.adherents.values():
+        attendus = {emp.livre_id for emp in actifs if emp.adherent_id == adh.id}
+        assert set(adh.livres_empruntes) == attendus, f"emprunts de l'adhérent #{adh.id}"
+
+
+def mesurer(nb_threads: int, nb_operations: int = 20000) -> float:
+    # Débit (opérations/s) de nb_threads postes; vérifie les invariants
+    bibliotheque = _bibliotheque()
+    compteurs = []
+    depart = threading.Barrier(nb_threads + 1)
+    postes = [
+        threading.Thread(target=_poste, args=(bibliotheque, graine, nb_operations, compteurs, depart))
+        for graine in range(nb_threads)
+    ]
+    for poste in postes:
+        poste.start()
+    depart.wait()
+    debut = time.perf_counter()
+    for poste in postes:
+        poste.join()
+    duree = time.perf_counter() - debut
+    verifier(bibliotheque, compteurs)
+    return nb_threads * nb_operations / duree
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    nb_operations = int(argv[0]) if argv else 20000
+    nb_threads = [int(n) for n in argv[1:]] or [1, 2, 4, 8, 16]
+    # Changements de thread très fréquents: multiplie les entrelacements à tester
+    sys.setswitchinterval(1e-5)
+    for n in nb_threads:
+        debit = mesurer(n, nb_operations)
+        print(f"{n:>3} thread(s) {debit:10.0f} opérations/s  (invariants vérifiés)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+bench_memoire.py
+Mesure la mémoire occupée par entité (octets par objet, via tracemalloc).
+
+    python -m benchmarks.bench_memoire [nombre]
+"""
+
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal
+from adherent_class import Adherent
+from emprunt_class import Emprunt
+
+LANGUES = ["Français", "Anglais", "Espagnol", "Allemand"]
+
+
+def _fabriques(n: int) -> dict:
+    # Données réalistes: auteurs et langues répétés, dates réparties sur quelques années.
+    # Les chaînes sont recréées à chaque ligne, comme lors de la lecture d'un CSV.
+    debut = date(2020, 1, 1)
+    return {
+        "Livre": lambda i: Livre(f"Titre {i}", f"Auteur {i % 500}"),
+        "BandeDessinee": lambda i: BandeDessinee(f"BD {i}", f"Auteur {i % 500}", f"Auteur {i * 7 % 500}"),
+        "Dictionnaire": lambda i: Dictionnaire(f"Dico {i}", LANGUES[i % 4].encode().decode()),
+        "Journal": lambda i: Journal(f"Journal {i}", (debut + timedelta(days=i % 1500)).isoformat()),
+        "Adherent": lambda i: Adherent(f"Nom{i}", f"Prenom{i % 300}", f"m{i}@exemple.ca"),
+        "Emprunt": lambda i: Emprunt(i % 5000, i, debut + timedelta(days=i % 1500)),
+    }
+
+
+def mesurer(n: int = 100000) -> dict:
+    # Octets alloués par entité, pour chaque classe
+    resultats = {}
+    for nom, fabrique in _fabriques(n).items():
+        tracemalloc.start()
+        objets = [fabrique(i) for i in range(n)]
+        taille, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        resultats[nom] = taille / n
+        del objets
+    return resultats
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 100000
+    for nom, octets in mesurer(n).items():
+        print(f"{nom:<15} {octets:8.1f} octets/entité")
+
+
+if __name__ == "__main__":
+    main()
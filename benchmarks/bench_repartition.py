@@ -0,0 +1,100 @@
+"""
+bench_repartition.py
+Débit des recherches fédérées selon le nombre de succursales (BibliothequeRepartie).
+    Le même catalogue est réparti sur 1, 2, 4... succursales (dossiers temporaires);
+    chaque recherche est diffusée à toutes les succursales, qui travaillent en parallèle.
+    Affiche le débit mesuré (temps réel) et, pour information, une estimation avec un
+    cœur par succursale (d'après le temps CPU de la succursale la plus chargée).
+    Vérifie que le débit mesuré croît presque linéairement: multiplier le nombre de
+    succursales par k le multiplie au moins par EFFICACITE_MIN * k (AssertionError sinon).
+    La vérification n'a de sens qu'avec un cœur par succursale: elle est sautée quand
+    la machine a moins de cœurs que de succursales (l'estimation n'est jamais vérifiée).
+    Avec un petit catalogue, le coût fixe de chaque requête domine et la vérification
+    échoue: garder au moins 25 000 documents par succursale (défaut: 200 000 en tout).
+
+    python -m benchmarks.bench_repartition [nb_documents] [succursales ...]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre
+from repartition_class import BibliothequeRepartie
+
+NB_REQUETES = 300
+REPETITIONS = 5
+EFFICACITE_MIN = 0.6  # accélération minimale par succursale ajoutée (1.0 = parfaitement linéaire)
+
+
+def _ecrire_succursales(nb_documents: int, nb_succursales: int) -> list:
+    # Documents répartis à tour de rôle, ids locaux à chaque succursale
+    dossiers = [tempfile.mkdtemp(prefix=f"succursale{k}_") for k in range(nb_succursales)]
+    lignes = [[] for _ in dossiers]
+    for i in range(nb_documents):
+        livre = Livre(f"Titre {i} tome {i % 7}", f"Auteur {i % 100}")
+        livre.id = i // nb_succursales
+        lignes[i % nb_succursales].append(livre.to_csv())
+    for dossier, contenu in zip(dossiers, lignes):
+        Bibliotheque._ecrire_fichier(os.path.join(dossier, "documents.csv"), contenu)
+    return dossiers
+
+
+def _requetes() -> list:
+    # Deux préfixes numériques (numéro de titre, numéro d'auteur): l'union et l'intersection
+    # des postings coûtent proportionnellement à la taille de la succursale
+    hasard = random.Random(42)
+    return [f"{hasard.randrange(100, 1000)} {hasard.randrange(10, 100)}" for _ in range(NB_REQUETES)]
+
+
+def mesurer(nb_documents: int, nb_succursales: int) -> tuple:
+    # (requêtes/s mesurées, requêtes/s estimées avec un cœur par succursale)
+    dossiers = _ecrire_succursales(nb_documents, nb_succursales)
+    requetes = _requetes()
+    try:
+        with BibliothequeRepartie(dossiers) as bibliotheque:
+            # Meilleur de REPETITIONS passages, comme timeit: les passages lents sont du bruit
+            # (autres processus sur le même cœur), pas un coût de la répartition
+            duree = cpu_max = float("inf")
+            for _ in range(REPETITIONS):
+                cpu_avant = bibliotheque._diffuser("temps_cpu")
+                debut = time.perf_counter()
+                for requete in requetes:
+                    bibliotheque.rechercher_documents(requete)
+                duree = min(duree, time.perf_counter() - debut)
+                cpu = [apres - avant for apres, avant in zip(bibliotheque._diffuser("temps_cpu"), cpu_avant)]
+                cpu_max = min(cpu_max, max(cpu))
+    finally:
+        for dossier in dossiers:
+            shutil.rmtree(dossier, ignore_errors=True)
+    return len(requetes) / duree, len(requetes) / cpu_max
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    nb_documents = int(argv[0]) if argv else 200000
+    succursales = [int(n) for n in argv[1:]] or [1, 2, 4, 8]
+    print(f"{nb_documents} documents, {NB_REQUETES} recherches, {os.cpu_count()} cœur(s)")
+    coeurs = os.cpu_count() or 1
+    reference = None  # (succursales, débit mesuré) de la première mesure
+    for n in succursales:
+        mesure, estime = mesurer(nb_documents, n)
+        reference = reference or (n, mesure)
+        acceleration = mesure / reference[1]
+        attendu = EFFICACITE_MIN * n / reference[0]
+        print(f"{n:>3} succursale(s) {mesure:8.0f} req/s mesurées (x{acceleration:.1f})  "
+              f"estimation avec un cœur par succursale: {estime:8.0f} req/s")
+        if n > coeurs:
+            print(f"    vérification sautée: {coeurs} cœur(s) pour {n} succursales")
+            continue
+        assert acceleration >= attendu, (
+            f"{n} succursale(s): accélération x{acceleration:.1f}, attendu au moins x{attendu:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
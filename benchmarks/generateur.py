@@ -0,0 +1,128 @@
+"""
+generateur.py
+Générateur déterministe de bibliothèques synthétiques pour les mesures.
+    Même graine, mêmes paramètres: mêmes ids, mêmes titres, mêmes dates, donc
+    les mêmes fichiers CSV octet pour octet (aucune dépendance à la date du jour).
+
+    python -m benchmarks.generateur DOSSIER [--echelle 1k|100k|1M] [--graine N]
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal
+from adherent_class import Adherent
+from emprunt_class import Emprunt
+from chargement_class import FICHIERS
+
+DATE_FIN = date(2025, 6, 30)  # fin de l'historique généré
+LANGUES = ["Français", "Anglais", "Espagnol", "Allemand", "Italien"]
+PRENOMS = ["Jean", "Marie", "Luc", "Sophie", "Ahmed", "Chloé", "Éloïse", "Karim", "Nadia", "Paul"]
+MOTS = ["voyage", "nuit", "jardin", "mémoire", "océan", "ville", "hiver", "secret", "lumière", "forêt",
+        "histoire", "guerre", "amour", "temps", "monde", "rivière", "silence", "étoile", "chemin", "maison"]
+
+# Volumes par échelle (nombre total de documents)
+ECHELLES = {
+    "1k": dict(livres=700, bandes_dessinees=150, dictionnaires=50, journaux=100,
+               adherents=100, annees=2, emprunts_par_an=1000),
+    "100k": dict(livres=70000, bandes_dessinees=15000, dictionnaires=5000, journaux=10000,
+                 adherents=10000, annees=3, emprunts_par_an=50000),
+    "1M": dict(livres=700000, bandes_dessinees=150000, dictionnaires=50000, journaux=100000,
+               adherents=100000, annees=5, emprunts_par_an=200000),
+}
+
+
+def _titre(hasard, i: int) -> str:
+    return f"{hasard.choice(MOTS).capitalize()} {hasard.choice(MOTS)} {i}"
+
+
+def generer(livres: int = 700, bandes_dessinees: int = 150, dictionnaires: int = 50, journaux: int = 100,
+            adherents: int = 100, annees: int = 2, emprunts_par_an: int = 1000,
+            graine: int = 2025, date_fin: date = DATE_FIN) -> Bibliotheque:
+    # Bibliotheque en mémoire (sans registre). Les emprunts couvrent annees années jusqu'à date_fin:
+    # la plupart sont rendus, ceux des dernières semaines et ~2 % de livres jamais rendus restent actifs.
+    hasard = random.Random(graine)
+    bibliotheque = Bibliotheque()
+    debut = date_fin - timedelta(days=365 * annees)
+    nb_auteurs = max(10, livres // 20)
+
+    fabriques = (
+        (livres, lambda i: Livre(_titre(hasard, i), f"Auteur {hasard.randrange(nb_auteurs)}")),
+        (bandes_dessinees, lambda i: BandeDessinee(_titre(hasard, i), f"Auteur {hasard.randrange(nb_auteurs)}",
+                                                   f"Dessinateur {hasard.randrange(nb_auteurs)}")),
+        (dictionnaires, lambda i: Dictionnaire(f"Dictionnaire {i}", hasard.choice(LANGUES))),
+        (journaux, lambda i: Journal(f"Journal {hasard.choice(MOTS)} {i}",
+                                     debut + timedelta(days=hasard.randrange(365 * annees)))),
+    )
+    doc_id = 0
+    for nombre, fabrique in fabriques:
+        for i in range(nombre):
+            document = fabrique(i)
+            document.id = doc_id
+            doc_id += 1
+            bibliotheque._indexer_document(document)
+
+    for i in range(adherents):
+        adherent = Adherent(f"Nom{i}", hasard.choice(PRENOMS), f"adherent{i}@exemple.ca")
+        adherent.id = i + 1
+        adherent.date_inscription = debut + timedelta(days=hasard.randrange(365 * annees))
+        bibliotheque._indexer_adherent(adherent)
+
+    # Historique dans l'ordre chronologique; un livre n'a jamais deux emprunts actifs
+    dates = sorted(hasard.randrange(debut.toordinal(), date_fin.toordinal() + 1)
+                   for _ in range(annees * emprunts_par_an))
+    livres_actifs = set()
+    for emprunt_id, jour in enumerate(dates, start=1):
+        livre_id = hasard.randrange(livres) if livres else None
+        if livre_id is None or not adherents:
+            break
+        emprunt = Emprunt(hasard.randrange(adherents) + 1, livre_id, date.fromordinal(jour))
+        emprunt.id = emprunt_id
+        retour = jour + hasard.randint(1, 45)
+        perdu = hasard.random() < 0.02
+        if (perdu or retour > date_fin.toordinal()) and livre_id not in livres_actifs:
+            livres_actifs.add(livre_id)
+            bibliotheque.documents[livre_id].est_disponible = False
+        else:
+            emprunt.retourner_livre(date.fromordinal(min(retour, date_fin.toordinal())))
+        bibliotheque._charger_emprunt(emprunt)
+
+    # Les prochains ids créés ne doivent pas réutiliser ceux générés
+    bibliotheque._recaler_id_documents()
+    bibliotheque._reconstruire_statistiques()
+    Adherent._id_counter = max(Adherent._id_counter, adherents)
+    Emprunt._id_counter = max(Emprunt._id_counter, len(dates))
+    return bibliotheque
+
+
+def ecrire(bibliotheque, dossier: str):
+    # Écrit les trois CSV dans dossier (mêmes fichiers que Bibliotheque.sauvegarder)
+    collections = {
+        "adherents": bibliotheque.adherents.values(),
+        "documents": bibliotheque.documents.values(),
+        "emprunts": bibliotheque.emprunts.values(),
+    }
+    os.makedirs(dossier, exist_ok=True)
+    for collection, fichier in FICHIERS:
+        Bibliotheque._ecrire_fichier(os.path.join(dossier, fichier), (o.to_csv() for o in collections[collection]))
+
+
+def main(argv=None):
+    analyseur = argparse.ArgumentParser(prog="python -m benchmarks.generateur",
+                                        description="Écrire une bibliothèque synthétique (CSV)")
+    analyseur.add_argument("dossier")
+    analyseur.add_argument("--echelle", choices=ECHELLES, default="1k")
+    analyseur.add_argument("--graine", type=int, default=2025)
+    args = analyseur.parse_args(sys.argv[1:] if argv is None else argv)
+    bibliotheque = generer(graine=args.graine, **ECHELLES[args.echelle])
+    ecrire(bibliotheque, args.dossier)
+    print(f"{len(bibliotheque.documents)} documents, {len(bibliotheque.adherents)} adhérents, "
+          f"{len(bibliotheque.emprunts)} emprunts écrits dans {args.dossier}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+suite.py
+Suite de mesures de Bibliotheque sur des données synthétiques (benchmarks.generateur).
+    Chaque cas est répété et le meilleur temps par opération est gardé (le moins
+    bruité). Les résultats sont écrits en JSON; --reference compare à un fichier
+    produit par un autre commit et sort en erreur (code 1) si un cas ralentit de
+    plus que --seuil. --mesures active Bibliotheque.activer_mesures(): comparer
+    deux exécutions (avec et sans) donne le coût des mesures.
+
+    python -m benchmarks.suite [--echelles 1k 100k] [--sortie r.json] [--reference base.json] [--seuil 0.15]
+                               [--mesures]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from bibliotheque_class import Bibliotheque
+from adherent_class import Adherent
+from benchmarks.generateur import ECHELLES, DATE_FIN, generer, ecrire
+
+
+# ─────────────────────────────────
+# Cases: cas(bibliotheque, hasard, dossier) -> (nombre d'opérations, secondes)
+# ─────────────────────────────────
+
+def cas_trouver_document(bibliotheque, hasard, dossier):
+    ids = [hasard.randrange(len(bibliotheque.documents)) for _ in range(100000)]
+    trouver = bibliotheque.trouver_document
+    debut = time.perf_counter()
+    for doc_id in ids:
+        trouver(doc_id)
+    return len(ids), time.perf_counter() - debut
+
+
+def cas_ajouter_adherent_doublon(bibliotheque, hasard, dossier):
+    # Adhérents déjà inscrits (même nom et prénom): refusés, la bibliothèque ne change pas
+    existants = hasard.sample(list(bibliotheque.adherents.values()), min(10000, len(bibliotheque.adherents)))
+    doublons = [Adherent(adh.nom, adh.prenom, adh.email) for adh in existants]
+    debut = time.perf_counter()
+    for adherent in doublons:
+        bibliotheque.ajouter_adherent(adherent)
+    return len(doublons), time.perf_counter() - debut
+
+
+def _paires_disponibles(bibliotheque, hasard, nombre: int) -> list:
+    livres = [doc.id for doc in bibliotheque.lister_livres_disponibles()]
+    adherents = list(bibliotheque.adherents)
+    return [(hasard.choice(adherents), livre_id) for livre_id in hasard.sample(livres, min(nombre, len(livres)))]
+
+
+def cas_creer_emprunt(bibliotheque, hasard, dossier):
+    paires = _paires_disponibles(bibliotheque, hasard, 10000)
+    debut = time.perf_counter()
+    for adherent_id, livre_id in paires:
+        bibliotheque.creer_emprunt(adherent_id, livre_id)
+    duree = time.perf_counter() - debut
+    # Remettre la bibliothèque dans son état (hors chronomètre)
+    for adherent_id, livre_id in paires:
+        bibliotheque.retourner_livre(bibliotheque.trouver_emprunt_actif_livre(livre_id, adherent_id).id)
+    return len(paires), duree
+
+
+def cas_retourner_livre(bibliotheque, hasard, dossier):
+    paires = _paires_disponibles(bibliotheque, hasard, 10000)
+    for adherent_id, livre_id in paires:
+        bibliotheque.creer_emprunt(adherent_id, livre_id)
+    ids = [bibliotheque.trouver_emprunt_actif_livre(livre_id, adherent_id).id for adherent_id, livre_id in paires]
+    debut = time.perf_counter()
+    for emprunt_id in ids:
+        bibliotheque.retourner_livre(emprunt_id)
+    return len(ids), time.perf_counter() - debut
+
+
+def cas_lister_emprunts_en_retard(bibliotheque, hasard, dossier):
+    delais = [hasard.choice((14, 30, 60, 90)) for _ in range(20)]
+    debut = time.perf_counter()
+    for delai in delais:
+        bibliotheque.lister_emprunts_en_retard(delai, DATE_FIN)
+    return len(delais), time.perf_counter() - debut
+
+
+def cas_classements(bibliotheque, hasard, dossier):
+    # Tableau de bord: trois classements (top 10), indépendants de la taille de l'historique
+    statistiques = bibliotheque.statistiques
+    debut = time.perf_counter()
+    for _ in range(1000):
+        statistiques.livres_les_plus_empruntes(10)
+        statistiques.adherents_les_plus_actifs(10)
+        statistiques.auteurs_les_plus_populaires(10)
+    return 1000, time.perf_counter() - debut
+
+
+def cas_charger(bibliotheque, hasard, dossier):
+    # Chargement complet des CSV générés (Bibliotheque neuve)
+    os.chdir(dossier)
+    nouvelle = Bibliotheque()
+    if bibliotheque._mesures is not None:
+        nouvelle.activer_mesures()
+    debut = time.perf_counter()
+    nouvelle.charger()
+    return 1, time.perf_counter() - debut
+
+
+def cas_sauvegarder(bibliotheque, hasard, dossier):
+    # Réécriture complète des CSV (sans registre)
+    os.chdir(dossier)
+    debut = time.perf_counter()
+    bibliotheque.sauvegarder()
+    return 1, time.perf_counter() - debut
+
+
+CAS = {
+    "trouver_document": cas_trouver_document,
+    "ajouter_adherent_doublon": cas_ajouter_adherent_doublon,
+    "creer_emprunt": cas_creer_emprunt,
+    "retourner_livre": cas_retourner_livre,
+    "lister_emprunts_en_retard": cas_lister_emprunts_en_retard,
+    "classements": cas_classements,
+    "charger": cas_charger,
+    "sauvegarder": cas_sauvegarder,
+}
+
+
+# ─────────────────────────────────
+# Running and comparing
+# ─────────────────────────────────
+
+def _commit() -> str:
+    try:
+        sortie = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return sortie.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def executer(echelles, cas=None, repetitions: int = 5, graine: int = 2025, mesures: bool = False) -> dict:
+    # {"meta": {...}, "resultats": {echelle: {cas: {"ops", "us_par_op"}}}}
+    cas = cas or list(CAS)
+    resultats = {}
+    repertoire = os.getcwd()
+    for echelle in echelles:
+        bibliotheque = generer(graine=graine, **ECHELLES[echelle])
+        if mesures:
+            bibliotheque.activer_mesures()
+        dossier = tempfile.mkdtemp(prefix=f"bench_{echelle}_")
+        try:
+            ecrire(bibliotheque, dossier)
+            resultats[echelle] = {}
+            for nom in cas:
+                hasard = random.Random(graine)  # mêmes opérations à chaque commit
+                meilleur, ops = None, 0
+                for _ in range(repetitions):
+                    # Comme timeit: le ramasse-miettes ne se déclenche pas au milieu d'une mesure
+                    gc.collect()
+                    gc.disable()
+                    try:
+                        ops, duree = CAS[nom](bibliotheque, hasard, dossier)
+                    finally:
+                        gc.enable()
+                    meilleur = duree if meilleur is None else min(meilleur, duree)
+                resultats[echelle][nom] = {"ops": ops, "us_par_op": 1e6 * meilleur / max(ops, 1)}
+                print(f"{echelle:>5} {nom:<27} {resultats[echelle][nom]['us_par_op']:14.3f} µs/op", flush=True)
+        finally:
+            os.chdir(repertoire)
+            shutil.rmtree(dossier, ignore_errors=True)
+    meta = {
+        "commit": _commit(), "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "machine": platform.machine(), "cpu": os.cpu_count(),
+        "repetitions": repetitions, "graine": graine, "mesures": mesures,
+    }
+    return {"meta": meta, "resultats": resultats}
+
+
+def comparer(reference: dict, actuel: dict, seuil: float = 0.15) -> list:
+    # [(echelle, cas, µs référence, µs actuel, rapport, régression)] pour les cas présents des deux côtés
+    lignes = []
+    for echelle, cas in actuel["resultats"].items():
+        for nom, mesure in cas.items():
+            ancien = reference.get("resultats", {}).get(echelle, {}).get(nom)
+            if ancien is None:
+                continue
+            rapport = mesure["us_par_op"] / ancien["us_par_op"] if ancien["us_par_op"] else float("inf")
+            lignes.append((echelle, nom, ancien["us_par_op"], mesure["us_par_op"], rapport, rapport > 1 + seuil))
+    return lignes
+
+
+def main(argv=None) -> int:
+    analyseur = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Mesures de Bibliotheque")
+    analyseur.add_argument("--echelles", nargs="+", choices=ECHELLES, default=["1k", "100k"])
+    analyseur.add_argument("--cas", nargs="+", choices=CAS, help="cas à mesurer (défaut: tous)")
+    analyseur.add_argument("--repetitions", type=int, default=5)
+    analyseur.add_argument("--graine", type=int, default=2025)
+    analyseur.add_argument("--sortie", help="fichier JSON des résultats")
+    analyseur.add_argument("--reference", help="résultats JSON d'un autre commit à comparer")
+    analyseur.add_argument("--seuil", type=float, default=0.15, help="ralentissement toléré (0.15: +15 %%)")
+    analyseur.add_argument("--mesures", action="store_true", help="mesurer avec les mesures activées")
+    args = analyseur.parse_args(sys.argv[1:] if argv is None else argv)
+
+    resultats = executer(args.echelles, args.cas, args.repetitions, args.graine, args.mesures)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+    if not args.reference:
+        return 0
+    with open(args.reference, encoding="utf-8") as f:
+        reference = json.load(f)
+    lignes = comparer(reference, resultats, args.seuil)
+    print(f"\nComparaison avec {reference['meta'].get('commit')} (seuil +{args.seuil:.0%})")
+    for echelle, nom, ancien, nouveau, rapport, regression in lignes:
+        marque = "RÉGRESSION" if regression else ""
+        print(f"{echelle:>5} {nom:<27} {ancien:12.3f} -> {nouveau:12.3f} µs/op  x{rapport:5.2f} {marque}")
+    return 1 if any(ligne[5] for ligne in lignes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,166 +1,608 @@
 # Main library class
 
-import csv
+import itertools
+import logging
+import os
+import threading
+from contextlib import ExitStack
 from datetime import date
-from document_classes import Livre, BandeDessinee, Dictionnaire, Journal
+from document_classes import Document, Livre, BandeDessinee, Dictionnaire, Journal
 from adherent_class import Adherent
 from emprunt_class import Emprunt
+from echeancier_class import Echeancier
+from recherche_class import IndexRecherche, mots_adherent
+from registre_class import Registre
+from historique_class import HistoriqueEmprunts
+from statistiques_class import StatistiquesCirculation, agreger
+
+# Événements émis après chaque modification (voir Bibliotheque.abonner)
+DOCUMENT_AJOUTE = "document_ajoute"
+DOCUMENT_RETIRE = "document_retire"
+DISPONIBILITE_MODIFIEE = "disponibilite_modifiee"  # objet: le Livre
+ADHERENT_AJOUTE = "adherent_ajoute"
+ADHERENT_RETIRE = "adherent_retire"
+EMPRUNT_CREE = "emprunt_cree"
+EMPRUNT_CLOTURE = "emprunt_cloture"
+
+# Collections dans l'ordre de chargement (voir charger(progression=...))
+COLLECTIONS = ("adherents", "documents", "emprunts")
+
+logger = logging.getLogger(__name__)
+
+# Verrous par tranche d'ids: deux ids ne se bloquent que s'ils tombent dans la même tranche
+NB_VERROUS = 64
+
+
+class ResultatCirculation:
+    # Résultat d'un élément d'un lot (creer_emprunts, retourner_livres).
+    # erreur: None si succes, sinon "adherent_inconnu", "livre_inconnu", "pas_un_livre",
+    # "indisponible", "emprunt_inconnu", "deja_retourne", "doublon" ou "annule" (tout_ou_rien)
+
+    __slots__ = ("index", "succes", "erreur", "message", "emprunt")
+
+    def __init__(self, index: int, succes: bool, erreur: str = None, message: str = "", emprunt=None):
+        self.index = index  # position dans le lot
+        self.succes = succes
+        self.erreur = erreur
+        self.message = message
+        self.emprunt = emprunt  # l'Emprunt créé ou retourné
+
+    def __repr__(self):
+        if self.succes:
+            return f"ResultatCirculation({self.index}, emprunt #{self.emprunt.id})"
+        return f"ResultatCirculation({self.index}, {self.erreur}: {self.message})"
 
 
 class Bibliotheque:
 
     def __init__(self, nom: str = "Ma Bibliothèque"):
         self.nom = nom
-        self.documents = []
-        self.adherents = []
-        self.emprunts = []
+        # Dictionnaires indexés par id (l'ordre d'insertion est conservé)
+        self.documents = {}
+        self.adherents = {}
+        self.emprunts = {}
+        self._noms_adherents = set()  # (nom, prenom) pour la détection des doublons
+        self._index_recherche = IndexRecherche()  # recherche plein texte du catalogue
+        self._catalogue_a_indexer = None  # CatalogueInstantane pas encore indexé (voir charger_instantane)
+        self._index_adherents = IndexRecherche(mots_adherent)  # nom complet et email
+
+        # Index des emprunts (tenus à jour par creer_emprunt / retourner_livre)
+        self._emprunts_actifs = {}  # emprunt_id -> Emprunt non retourné
+        self._emprunts_retournes = {}  # emprunt_id -> Emprunt retourné
+        self._emprunts_actifs_par_livre = {}  # livre_id -> {adherent_id: Emprunt} (un exemplaire par adhérent)
+        self._emprunts_par_adherent = {}  # adherent_id -> {emprunt_id: Emprunt} (historique complet)
+        self._emprunts_actifs_par_adherent = {}  # adherent_id -> {emprunt_id: Emprunt}
+        self._echeancier = Echeancier()  # emprunts actifs triés par date d'emprunt
+        self.historique = HistoriqueEmprunts()  # colonnes pour les statistiques (NumPy)
+        self.statistiques = StatistiquesCirculation()  # compteurs et classements tenus à jour
+
+        # Registre d'opérations (désactivé par défaut: voir activer_registre)
+        self._registre = None
+        self._seuil_compaction = 10000
+        # Moteur de stockage (None: fichiers CSV; voir utiliser_stockage)
+        self._stockage = None
+        # Sauvegarde automatique en arrière-plan (voir sauvegarde_class.SauvegardeAuto)
+        self._sauvegarde_auto = None
+        # Fonctions appelées avec (evenement, objet) après chaque modification
+        self._abonnes = []
+        # Compteurs et latences des opérations (désactivés par défaut: voir activer_mesures)
+        self._mesures = None
+
+        # Accès concurrents (plusieurs postes ou threads du serveur). Ordre d'acquisition fixe:
+        # adhérents, puis livres (tranches croissantes), puis _verrou_index.
+        # Les verrous d'entité rendent vérification + modification atomiques pour un livre ou un
+        # adhérent; _verrou_index ne protège que la courte mise à jour des index partagés et du journal.
+        self._verrous_adherents = [threading.RLock() for _ in range(NB_VERROUS)]
+        self._verrous_livres = [threading.RLock() for _ in range(NB_VERROUS)]
+        self._verrou_index = threading.RLock()
 
     # ─────────────────────────────────
     # Document management
     # ─────────────────────────────────
 
     def ajouter_document(self, document):
-        self.documents.append(document)
+        with self._verrou_index:
+            self._indexer_document(document)
+            self._journaliser("ajout_document", document)
+        self._notifier(DOCUMENT_AJOUTE, document)
         return True
 
     def retirer_document(self, doc_id: int) -> bool:
-        for doc in self.documents:
-            if doc.id == doc_id:
-                self.documents.remove(doc)
-                return True
-        return False
+        # Sous le verrou du livre: un emprunt concurrent voit le livre présent ou retiré, jamais entre les deux
+        with self._verrous_livres[hash(doc_id) % NB_VERROUS]:
+            with self._verrou_index:
+                doc = self.documents.pop(doc_id, None)
+                if doc is None:
+                    return False
+                self._index_recherche.retirer(doc_id)
+                self._journaliser("retrait_document", doc_id)
+            self._notifier(DOCUMENT_RETIRE, doc)
+        return True
+
+    def ajouter_exemplaires(self, livre_id: int, nombre: int = 1) -> bool:
+        # Nouveaux exemplaires d'un livre du catalogue (mis en rayon immédiatement)
+        if nombre < 1:
+            return False
+        with self._verrous_livres[hash(livre_id) % NB_VERROUS]:
+            livre = self.documents.get(livre_id)
+            if not isinstance(livre, Livre):
+                return False
+            with self._verrou_index:
+                livre.ajouter_exemplaires(nombre)
+                self._journaliser("exemplaires", livre)
+            self._notifier(DISPONIBILITE_MODIFIEE, livre)
+        return True
 
     def trouver_document(self, doc_id: int):
-        for doc in self.documents:
-            if doc.id == doc_id:
-                return doc
-        return None
+        return self.documents.get(doc_id)
 
     def lister_documents(self) -> list:
-        return self.documents
+        # Copies faites sous _verrou_index: un autre thread peut ajouter ou retirer pendant la lecture
+        with self._verrou_index:
+            return list(self.documents.values())
 
     def lister_livres_disponibles(self) -> list:
-        livres = [doc for doc in self.documents if isinstance(doc, Livre)]
+        livres = [doc for doc in self.lister_documents() if isinstance(doc, Livre)]
         return [livre for livre in livres if livre.est_disponible]
 
+    def rechercher_documents(self, requete: str, limite: int = None) -> list:
+        # Recherche par préfixe sur titre, auteur, dessinateur et langue (sans accents).
+        # Les lectures d'index se font sous _verrou_index: elles trient le vocabulaire en attente
+        # et parcourent des ensembles que les écritures modifient
+        with self._verrou_index:
+            ids = self._index_documents().rechercher(requete, limite)
+            return [self.documents[doc_id] for doc_id in ids]
+
+    def suggerer_livres_disponibles(self, requete: str, limite: int = 20) -> list:
+        # Recherche à la frappe (titre, auteur): seuls les limite premiers livres sont construits
+        def disponible(doc_id):
+            doc = self.documents[doc_id]
+            return isinstance(doc, Livre) and doc.est_disponible
+        with self._verrou_index:
+            ids = self._index_documents().suggerer(requete, limite, disponible)
+            return [self.documents[doc_id] for doc_id in ids]
+
+    def _indexer_document(self, document, mots: set = None):
+        self.documents[document.id] = document
+        self._index_recherche.ajouter(document, mots)
+
+    def _index_documents(self) -> IndexRecherche:
+        # Après charger_instantane, l'index est construit à la première recherche, à partir des
+        # chaînes de l'instantané (les documents ne sont pas décodés pour autant)
+        if self._catalogue_a_indexer is not None:
+            with self._verrou_index:
+                if self._catalogue_a_indexer is not None:
+                    for doc_id, mots in self._catalogue_a_indexer.mots():
+                        self._index_recherche.ajouter_mots(doc_id, mots)
+                    self._catalogue_a_indexer = None
+        return self._index_recherche
+
     # ─────────────────────────────────
     # Member management
     # ─────────────────────────────────
 
     def ajouter_adherent(self, adherent: Adherent) -> bool:
-        # Check if member already exists
-        for adh in self.adherents:
-            if adh.nom == adherent.nom and adh.prenom == adherent.prenom:
+        with self._verrou_index:
+            # Check if member already exists
+            if (adherent.nom, adherent.prenom) in self._noms_adherents:
                 return False
-        self.adherents.append(adherent)
+            self._indexer_adherent(adherent)
+            self._journaliser("ajout_adherent", adherent)
+        self._notifier(ADHERENT_AJOUTE, adherent)
         return True
 
     def retirer_adherent(self, adherent_id: int) -> bool:
-        for adh in self.adherents:
-            if adh.id == adherent_id:
-                self.adherents.remove(adh)
-                return True
-        return False
+        with self._verrous_adherents[hash(adherent_id) % NB_VERROUS]:
+            with self._verrou_index:
+                adh = self.adherents.pop(adherent_id, None)
+                if adh is None:
+                    return False
+                self._noms_adherents.discard((adh.nom, adh.prenom))
+                self._index_adherents.retirer(adherent_id)
+                self._journaliser("retrait_adherent", adherent_id)
+            self._notifier(ADHERENT_RETIRE, adh)
+        return True
 
     def trouver_adherent(self, adherent_id: int):
-        for adh in self.adherents:
-            if adh.id == adherent_id:
-                return adh
-        return None
+        return self.adherents.get(adherent_id)
 
     def lister_adherents(self) -> list:
-        return self.adherents
+        with self._verrou_index:
+            return list(self.adherents.values())
+
+    def suggerer_adherents(self, requete: str, limite: int = 20) -> list:
+        # Recherche à la frappe sur le nom complet et l'email
+        with self._verrou_index:
+            return [self.adherents[adh_id] for adh_id in self._index_adherents.suggerer(requete, limite)]
+
+    def preparer_recherche(self):
+        # Le tri des index est différé après un chargement: le faire avant la première frappe
+        with self._verrou_index:
+            self._index_documents().preparer()
+            self._index_adherents.preparer()
+
+    def _indexer_adherent(self, adherent: Adherent):
+        self.adherents[adherent.id] = adherent
+        self._noms_adherents.add((adherent.nom, adherent.prenom))
+        self._index_adherents.ajouter(adherent)
 
     # ─────────────────────────────────
     # Borrowing management
     # ─────────────────────────────────
 
-    def creer_emprunt(self, adherent_id: int, livre_id: int) -> tuple:
+    def _verifier_emprunt(self, adherent_id: int, livre_id: int) -> tuple:
+        # (None, livre) si l'emprunt est possible, sinon (code d'erreur, message)
         # Check member exists
-        adherent = self.trouver_adherent(adherent_id)
-        if not adherent:
-            return False, "Adhérent non trouvé"
+        if adherent_id not in self.adherents:
+            return "adherent_inconnu", "Adhérent non trouvé"
 
         # Check book exists
-        livre = self.trouver_document(livre_id)
+        livre = self.documents.get(livre_id)
         if not livre:
-            return False, "Livre non trouvé"
+            return "livre_inconnu", "Livre non trouvé"
 
         # Check if it's a book
         if not isinstance(livre, Livre):
-            return False, "Document n'est pas un livre"
+            return "pas_un_livre", "Document n'est pas un livre"
 
         # Check if book is available
         if not livre.est_disponible:
-            return False, "Livre n'est pas disponible"
+            return "indisponible", "Livre n'est pas disponible"
 
-        # Create borrowing
-        emprunt = Emprunt(adherent_id, livre_id)
-        self.emprunts.append(emprunt)
+        # One copy of a title per member
+        if livre_id in self.adherents[adherent_id].livres_empruntes:
+            return "deja_emprunte", "Adhérent a déjà un exemplaire de ce livre"
+        return None, livre
 
-        # Mark book as borrowed
-        livre.est_disponible = False
-        adherent.ajouter_emprunt(livre_id)
+    def creer_emprunt(self, adherent_id: int, livre_id: int) -> tuple:
+        # Vérification et modification sous les verrous du livre et de l'adhérent:
+        # deux postes ne peuvent pas prêter le même livre
+        with self._verrous_adherents[hash(adherent_id) % NB_VERROUS], self._verrous_livres[hash(livre_id) % NB_VERROUS]:
+            erreur, detail = self._verifier_emprunt(adherent_id, livre_id)
+            if erreur:
+                return False, detail
+            livre = detail
+
+            # Create borrowing (any free copy)
+            with self._verrou_index:
+                emprunt = Emprunt(adherent_id, livre_id, exemplaire=livre.prendre_exemplaire())
+                self._appliquer_emprunt(emprunt)
+                self._journaliser("emprunt", emprunt)
+            # Notifié sous les verrous: les événements d'un même livre arrivent dans l'ordre
+            self._notifier(EMPRUNT_CREE, emprunt)
+            self._notifier(DISPONIBILITE_MODIFIEE, livre)
 
         return True, f"Emprunt créé: {emprunt}"
 
     def retourner_livre(self, emprunt_id: int) -> tuple:
-        emprunt = None
-        for e in self.emprunts:
-            if e.id == emprunt_id:
-                emprunt = e
-                break
+        emprunt = self.trouver_emprunt(emprunt_id)
         if not emprunt:
             return False, "Emprunt non trouvé"
-        if not emprunt.est_actif():
-            return False, "Livre déjà retourné"
-        emprunt.retourner_livre()
+        with self._verrous_adherents[hash(emprunt.adherent_id) % NB_VERROUS], \
+                self._verrous_livres[hash(emprunt.livre_id) % NB_VERROUS]:
+            if not emprunt.est_actif():
+                return False, "Livre déjà retourné"
+            with self._verrou_index:
+                emprunt.retourner_livre()
+                self._appliquer_retour(emprunt)
+                self._journaliser("retour", emprunt)
+            self._notifier(EMPRUNT_CLOTURE, emprunt)
+            livre = self.trouver_document(emprunt.livre_id)
+            if livre:
+                self._notifier(DISPONIBILITE_MODIFIEE, livre)
 
+        return True, f"Livre retourné: {emprunt}"
+
+    # ─────────────────────────────────
+    # Batch circulation (kiosks, drop box)
+    # ─────────────────────────────────
+
+    def creer_emprunts(self, paires, tout_ou_rien: bool = False, date_emprunt: date = None) -> list:
+        # paires: [(adherent_id, livre_id), ...] -> un ResultatCirculation par paire, dans l'ordre.
+        # Avec tout_ou_rien, un seul échec annule tout le lot; sinon les paires valides sont appliquées.
+        # Le lot est journalisé en une seule écriture.
+        # Le lot est verrouillé en entier (tous ses adhérents et livres) avant la première vérification.
+        paires = list(paires)
+        with self._verrouiller([adherent_id for adherent_id, _ in paires], [livre_id for _, livre_id in paires]):
+            # livres_du_lot: livre_id -> adhérents du lot (chacun prend un exemplaire)
+            resultats, valides, livres_du_lot = [], [], {}
+            for index, (adherent_id, livre_id) in enumerate(paires):
+                erreur, detail = self._verifier_emprunt(adherent_id, livre_id)
+                if not erreur and livre_id in livres_du_lot:
+                    adherents_du_lot = livres_du_lot[livre_id]
+                    if adherent_id in adherents_du_lot or len(adherents_du_lot) >= detail.nb_disponibles:
+                        erreur, detail = "doublon", "Livre déjà présent dans le lot"
+                if erreur:
+                    resultats.append(ResultatCirculation(index, False, erreur, detail))
+                    continue
+                livres_du_lot.setdefault(livre_id, set()).add(adherent_id)
+                resultat = ResultatCirculation(index, True)
+                resultats.append(resultat)
+                valides.append((resultat, adherent_id, detail))
+            if tout_ou_rien and len(valides) < len(resultats):
+                self._annuler_lot(valides)
+                return resultats
+
+            emprunts = []
+            with self._verrou_index:
+                for resultat, adherent_id, livre in valides:
+                    emprunt = Emprunt(adherent_id, livre.id, date_emprunt, livre.prendre_exemplaire())
+                    self._appliquer_emprunt(emprunt)
+                    resultat.emprunt = emprunt
+                    emprunts.append(emprunt)
+                self._journaliser_lot("emprunt", emprunts)
+            for resultat, _, livre in valides:
+                self._notifier(EMPRUNT_CREE, resultat.emprunt)
+                self._notifier(DISPONIBILITE_MODIFIEE, livre)
+            return resultats
+
+    def retourner_livres(self, emprunt_ids, tout_ou_rien: bool = False, date_retour: date = None) -> list:
+        # emprunt_ids: ids des emprunts à clôturer (ex.: boîte de retour vidée en fin de journée)
+        emprunt_ids = list(emprunt_ids)
+        connus = [emprunt for emprunt in map(self.emprunts.get, emprunt_ids) if emprunt is not None]
+        with self._verrouiller([emp.adherent_id for emp in connus], [emp.livre_id for emp in connus]):
+            resultats, valides, emprunts_du_lot = [], [], set()
+            for index, emprunt_id in enumerate(emprunt_ids):
+                emprunt = self._emprunts_actifs.get(emprunt_id)
+                if emprunt_id in emprunts_du_lot:
+                    resultats.append(ResultatCirculation(index, False, "doublon", "Emprunt déjà présent dans le lot"))
+                elif emprunt is not None:
+                    emprunts_du_lot.add(emprunt_id)
+                    resultat = ResultatCirculation(index, True, emprunt=emprunt)
+                    resultats.append(resultat)
+                    valides.append(resultat)
+                elif self.trouver_emprunt(emprunt_id):
+                    resultats.append(ResultatCirculation(index, False, "deja_retourne", "Livre déjà retourné"))
+                else:
+                    resultats.append(ResultatCirculation(index, False, "emprunt_inconnu", "Emprunt non trouvé"))
+            if tout_ou_rien and len(valides) < len(resultats):
+                self._annuler_lot((resultat,) for resultat in valides)
+                return resultats
+
+            emprunts = [resultat.emprunt for resultat in valides]
+            with self._verrou_index:
+                for emprunt in emprunts:
+                    emprunt.retourner_livre(date_retour)
+                    self._appliquer_retour(emprunt)
+                self._journaliser_lot("retour", emprunts)
+            for emprunt in emprunts:
+                self._notifier(EMPRUNT_CLOTURE, emprunt)
+                livre = self.documents.get(emprunt.livre_id)
+                if livre:
+                    self._notifier(DISPONIBILITE_MODIFIEE, livre)
+            return resultats
+
+    @staticmethod
+    def _annuler_lot(valides):
+        # tout_ou_rien: les éléments valides ne sont pas appliqués
+        for resultat, *_ in valides:
+            resultat.succes = False
+            resultat.erreur = "annule"
+            resultat.message = "Lot annulé: un autre élément a échoué"
+            resultat.emprunt = None
+
+    def _verrouiller(self, adherent_ids=(), livre_ids=()) -> ExitStack:
+        # Verrous des tranches d'un lot, toujours dans le même ordre (pas d'interblocage).
+        # Les opérations sur un seul livre / adhérent prennent directement leurs deux verrous.
+        pile = ExitStack()
+        for verrous, ids in ((self._verrous_adherents, adherent_ids), (self._verrous_livres, livre_ids)):
+            for tranche in sorted({hash(i) % NB_VERROUS for i in ids}):
+                pile.enter_context(verrous[tranche])
+        return pile
+
+    def _appliquer_emprunt(self, emprunt: Emprunt):
+        # Enregistrer l'emprunt et marquer son exemplaire comme emprunté
+        self._indexer_emprunt(emprunt)
         livre = self.trouver_document(emprunt.livre_id)
+        self.statistiques.ajouter(emprunt, getattr(livre, "auteur", None))
         if livre:
-            livre.est_disponible = True
+            livre.reserver_exemplaire(emprunt.exemplaire)
+        adherent = self.trouver_adherent(emprunt.adherent_id)
+        if adherent:
+            adherent.ajouter_emprunt(emprunt.livre_id)
 
+    def _appliquer_retour(self, emprunt: Emprunt):
+        # Mettre à jour les index et remettre l'exemplaire en rayon
+        self._cloturer_emprunt(emprunt)
+        self.statistiques.retourner(emprunt)
+        livre = self.trouver_document(emprunt.livre_id)
+        if livre:
+            livre.rendre_exemplaire(emprunt.exemplaire)
         adherent = self.trouver_adherent(emprunt.adherent_id)
         if adherent:
             adherent.retirer_emprunt(emprunt.livre_id)
 
-        return True, f"Livre retourné: {emprunt}"
-
     def lister_emprunts(self, filtre="tous") -> list:
-        if filtre == "actifs":
-            return [e for e in self.emprunts if e.est_actif()]
-        elif filtre == "retournes":
-            return [e for e in self.emprunts if not e.est_actif()]
+        if filtre != "actifs" and self._historique_sur_disque():
+            return self._stockage.lister_emprunts(filtre)
+        with self._verrou_index:
+            if filtre == "actifs":
+                return list(self._emprunts_actifs.values())
+            elif filtre == "retournes":
+                return list(self._emprunts_retournes.values())
+            else:
+                return list(self.emprunts.values())
+
+    def trouver_emprunt(self, emprunt_id: int):
+        emprunt = self.emprunts.get(emprunt_id)
+        if emprunt is None and self._historique_sur_disque():
+            return self._stockage.trouver_emprunt(emprunt_id)
+        return emprunt
+
+    def trouver_emprunt_actif_livre(self, livre_id: int, adherent_id: int = None):
+        # Qui a ce livre? Avec adherent_id: l'exemplaire de cet adhérent. None si aucun exemplaire n'est sorti
+        actifs = self._emprunts_actifs_par_livre.get(livre_id)
+        if not actifs:
+            return None
+        if adherent_id is None:
+            with self._verrou_index:
+                return next(iter(actifs.values()), None)
+        return actifs.get(adherent_id)
+
+    def lister_emprunts_actifs_livre(self, livre_id: int) -> list:
+        # Un emprunt par exemplaire sorti
+        with self._verrou_index:
+            return list(self._emprunts_actifs_par_livre.get(livre_id, {}).values())
+
+    def lister_emprunts_adherent(self, adherent_id: int, filtre="tous") -> list:
+        if filtre != "actifs" and self._historique_sur_disque():
+            return self._stockage.lister_emprunts_adherent(adherent_id, filtre)
+        with self._verrou_index:
+            if filtre == "actifs":
+                return list(self._emprunts_actifs_par_adherent.get(adherent_id, {}).values())
+            emprunts = self._emprunts_par_adherent.get(adherent_id, {}).values()
+            if filtre == "retournes":
+                return [e for e in emprunts if not e.est_actif()]
+            return list(emprunts)
+
+    def _indexer_emprunt(self, emprunt: Emprunt):
+        self.emprunts[emprunt.id] = emprunt
+        self.historique.ajouter(emprunt)
+        self._emprunts_par_adherent.setdefault(emprunt.adherent_id, {})[emprunt.id] = emprunt
+        if emprunt.est_actif():
+            self._emprunts_actifs[emprunt.id] = emprunt
+            self._emprunts_actifs_par_livre.setdefault(emprunt.livre_id, {})[emprunt.adherent_id] = emprunt
+            self._emprunts_actifs_par_adherent.setdefault(emprunt.adherent_id, {})[emprunt.id] = emprunt
+            self._echeancier.ajouter(emprunt)
         else:
-            return self.emprunts
+            self._emprunts_retournes[emprunt.id] = emprunt
+
+    def _charger_emprunt(self, emprunt: Emprunt):
+        # Emprunt lu depuis le stockage: indexer et reconstituer les livres détenus par l'adhérent
+        self._indexer_emprunt(emprunt)
+        if emprunt.est_actif():
+            livre = self.documents.get(emprunt.livre_id)
+            if isinstance(livre, Livre):
+                livre.reserver_exemplaire(emprunt.exemplaire)
+            adherent = self.adherents.get(emprunt.adherent_id)
+            if adherent:
+                adherent.ajouter_emprunt(emprunt.livre_id)
+
+    def _cloturer_emprunt(self, emprunt: Emprunt):
+        # Déplacer un emprunt qui vient d'être retourné vers les index des retours
+        self._emprunts_actifs.pop(emprunt.id, None)
+        self._echeancier.retirer(emprunt)
+        self.historique.retourner(emprunt)
+        actifs = self._emprunts_actifs_par_livre.get(emprunt.livre_id)
+        if actifs is not None and actifs.get(emprunt.adherent_id) is emprunt:
+            del actifs[emprunt.adherent_id]
+            if not actifs:
+                del self._emprunts_actifs_par_livre[emprunt.livre_id]
+        actifs = self._emprunts_actifs_par_adherent.get(emprunt.adherent_id)
+        if actifs is not None:
+            actifs.pop(emprunt.id, None)
+            if not actifs:
+                del self._emprunts_actifs_par_adherent[emprunt.adherent_id]
+        self._emprunts_retournes[emprunt.id] = emprunt
+
+    def lister_emprunts_en_retard(self, delai_jours: int = 30, date_ref: date = None) -> list:
+        # Sous _verrou_index: la lecture trie les emprunts en attente de l'échéancier
+        with self._verrou_index:
+            return self._echeancier.en_retard(delai_jours, date_ref)
+
+    def lister_emprunts_a_echeance(self, debut: date, fin: date, delai_jours: int = 30) -> list:
+        # Emprunts qui passent en retard entre debut et fin (pour les lettres de rappel)
+        with self._verrou_index:
+            return self._echeancier.a_echeance(debut, fin, delai_jours)
 
-    def lister_emprunts_en_retard(self, delai_jours: int = 30) -> list:
-        return [e for e in self.emprunts if e.est_en_retard(delai_jours)]
+    # ─────────────────────────────────
+    # Change notifications
+    # ─────────────────────────────────
+
+    def abonner(self, rappel):
+        # rappel(evenement, objet) est appelé après chaque ajout, retrait, emprunt ou retour.
+        # Le chargement (charger) n'émet pas d'événements.
+        self._abonnes.append(rappel)
+
+    def desabonner(self, rappel):
+        if rappel in self._abonnes:
+            self._abonnes.remove(rappel)
+
+    def _notifier(self, evenement: str, objet):
+        for rappel in list(self._abonnes):
+            rappel(evenement, objet)
 
     # ─────────────────────────────────
     # File persistence (CSV)
     # ─────────────────────────────────
 
     def sauvegarder(self):
-        # Save adherents
-        self._sauvegarder_adherents()
-        # Save documents
-        self._sauvegarder_documents()
-        # Save borrowings
-        self._sauvegarder_emprunts()
-
-    def charger(self):
-        self._charger_adherents()
-        self._charger_documents()
-        self._charger_emprunts()
+        # Avec un moteur de stockage, chaque opération est déjà écrite
+        if self._stockage is not None:
+            return
+        # Avec la sauvegarde automatique, l'écriture se fait en arrière-plan (non bloquant)
+        if self._sauvegarde_auto is not None:
+            self._sauvegarde_auto.sauvegarder_maintenant()
+            return
+        # En mode registre, les opérations sont déjà sur disque: on force seulement l'écriture
+        if self._registre is not None:
+            self._registre.synchroniser()
+            return
+        self._ecrire_csv()
+
+    def charger(self, parallele: bool = False, nb_processus: int = None, progression=None):
+        # progression(collection) est appelé dès qu'une collection ("adherents", "documents",
+        # "emprunts") est entièrement chargée; les emprunts arrivent en dernier, registre rejoué
+        progression = progression or (lambda collection: None)
+        if self._stockage is not None:
+            self._stockage.charger(self)
+            if self._historique_sur_disque():
+                # Sans quoi les statistiques NumPy ne verraient que les emprunts actifs
+                self.historique.completer(self._stockage.lignes_historique)
+            self._recaler_id_documents()
+            self._reconstruire_statistiques()
+            for collection in COLLECTIONS:
+                progression(collection)
+            return
+        if parallele:
+            # Gros fichiers: analyse des CSV répartie sur plusieurs processus
+            from chargement_class import ChargeurParallele
+            ChargeurParallele(self, nb_processus).charger(progression)
+        else:
+            self._charger_adherents()
+            progression("adherents")
+            self._charger_documents()
+            progression("documents")
+            self._charger_emprunts()
+        self._reconstruire_statistiques()
+        if self._registre is not None:
+            self._rejouer_registre()
+        progression("emprunts")
+
+    def _reconstruire_statistiques(self):
+        # Une fois par chargement: l'historique est compté d'un bloc, pas emprunt par emprunt
+        if self._historique_sur_disque():
+            self.statistiques.reconstruire(**self._stockage.agreger_emprunts())
+        else:
+            self.statistiques.reconstruire(**agreger(self.emprunts.values(), self.documents))
+
+    def _ecrire_csv(self) -> bool:
+        # Les trois fichiers sont tentés; False si l'un d'eux n'a pas pu être remplacé
+        resultats = [
+            self._sauvegarder_adherents(),  # Save adherents
+            self._sauvegarder_documents(),  # Save documents
+            self._sauvegarder_emprunts(),  # Save borrowings
+        ]
+        return all(resultats)
+
+    @staticmethod
+    def _ecrire_fichier(chemin: str, lignes):
+        # Écrire dans un fichier temporaire puis le renommer: un crash ne tronque jamais le CSV
+        temp = chemin + ".tmp"
+        with open(temp, "w", newline="", encoding="utf-8") as f:
+            for ligne in lignes:
+                f.write(ligne + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, chemin)
 
     def _sauvegarder_adherents(self):  # Save members to CSV
         try:
-            with open("adherents.csv", "w", newline="", encoding="utf-8") as f:
-                for adh in self.adherents:
-                    f.write(adh.to_csv() + "\n")
+            self._ecrire_fichier("adherents.csv", (adh.to_csv() for adh in self.adherents.values()))
         except Exception as e:
-            print(f"Erreur sauvegarde adhérents: {e}")
+            self._signaler_erreur("sauvegarde adhérents", e)
+            return False
+        return True
 
     def _charger_adherents(self):  # Load members to CSV
         try:
@@ -169,64 +611,47 @@ class Bibliotheque:
                     if line.strip():
                         adh = Adherent.from_csv(line)
                         if adh:
-                            self.adherents.append(adh)
+                            self._indexer_adherent(adh)
         except FileNotFoundError:
             pass
         except Exception as e:
-            print(f"Erreur chargement adhérents: {e}")
+            self._signaler_erreur("chargement adhérents", e)
 
     def _sauvegarder_documents(self):  # Save documents to CSV
         try:
-            with open("documents.csv", "w", newline="", encoding="utf-8") as f:
-                for doc in self.documents:
-                    doc_type = type(doc).__name__
-                    if isinstance(doc, Livre):
-                        f.write(f"Livre,{doc.id},{doc.titre},{doc.auteur},{doc.est_disponible}\n")
-                    elif isinstance(doc, BandeDessinee):
-                        f.write(f"BD,{doc.id},{doc.titre},{doc.auteur},{doc.dessinateur}\n")
-                    elif isinstance(doc, Dictionnaire):
-                        f.write(f"Dictionnaire,{doc.id},{doc.titre},{doc.langue}\n")
-                    elif isinstance(doc, Journal):
-                        f.write(f"Journal,{doc.id},{doc.titre},{doc.date_parution.strftime('%Y-%m-%d')}\n")
+            self._ecrire_fichier("documents.csv", (doc.to_csv() for doc in self.documents.values()))
         except Exception as e:
-            print(f"Erreur sauvegarde documents: {e}")
+            self._signaler_erreur("sauvegarde documents", e)
+            return False
+        return True
 
     def _charger_documents(self):
         try:
             with open("documents.csv", "r", encoding="utf-8") as f:
                 for line in f:
                     if line.strip():
-                        parts = line.strip().split(",")
-                        if len(parts) >= 4:
-                            doc_type = parts[0]
-                            doc_id = int(parts[1])
-                            titre = parts[2]
-
-                            if doc_type == "Livre":
-                                doc = Livre(titre, parts[3], parts[4] if len(parts) > 4 else True)
-                            elif doc_type == "BD":
-                                doc = BandeDessinee(titre, parts[3], parts[4] if len(parts) > 4 else "")
-                            elif doc_type == "Dictionnaire":
-                                doc = Dictionnaire(titre, parts[3])
-                            elif doc_type == "Journal":
-                                doc = Journal(titre, parts[3])
-                            else:
-                                continue
-
-                            doc.id = doc_id
-                            self.documents.append(doc)
+                        doc = Document.from_csv(line)
+                        if doc:
+                            self._indexer_document(doc)
         except FileNotFoundError:
             pass
         except Exception as e:
-            print(f"Erreur chargement documents: {e}")
+            self._signaler_erreur("chargement documents", e)
+        self._recaler_id_documents()
+
+    def _recaler_id_documents(self):
+        # Les nouveaux documents ne doivent pas réutiliser un id chargé
+        if self.documents:
+            prochain_id = max(max(self.documents) + 1, next(Document._id_gen))
+            Document._id_gen = itertools.count(prochain_id)
 
     def _sauvegarder_emprunts(self):  # Save borrowings to CSV
         try:
-            with open("emprunts.csv", "w", newline="", encoding="utf-8") as f:
-                for emp in self.emprunts:
-                    f.write(emp.to_csv() + "\n")
+            self._ecrire_fichier("emprunts.csv", (emp.to_csv() for emp in self.emprunts.values()))
         except Exception as e:
-            print(f"Erreur sauvegarde emprunts: {e}")
+            self._signaler_erreur("sauvegarde emprunts", e)
+            return False
+        return True
 
     def _charger_emprunts(self):  # Load borrowings from CSV
         try:
@@ -235,8 +660,174 @@ class Bibliotheque:
                     if line.strip():
                         emp = Emprunt.from_csv(line)
                         if emp:
-                            self.emprunts.append(emp)
+                            self._charger_emprunt(emp)
         except FileNotFoundError:
             pass
         except Exception as e:
-            print(f"Erreur chargement emprunts: {e}")
+            self._signaler_erreur("chargement emprunts", e)
+
+    # ─────────────────────────────────
+    # Binary snapshot (mmap)
+    # ─────────────────────────────────
+
+    def ecrire_instantane(self, chemin: str = "bibliotheque.snap"):
+        # Instantané binaire lisible par mmap (voir instantane_class.Instantane)
+        from instantane_class import ecrire_instantane
+        ecrire_instantane(self, chemin)
+
+    def charger_instantane(self, chemin: str = "bibliotheque.snap"):
+        # Démarrage rapide: pas d'analyse de texte ni de validation des champs. Les documents restent
+        # dans le fichier projeté (CatalogueInstantane, qui garde le fichier ouvert) et ne sont décodés
+        # qu'au premier accès; seuls les livres empruntés le sont ici, pour réserver leurs exemplaires.
+        # Adhérents et emprunts sont chargés entièrement.
+        from instantane_class import Instantane, CatalogueInstantane
+        instantane = Instantane(chemin)
+        for adh in instantane.iter_adherents():
+            self._indexer_adherent(adh)
+        anciens, self.documents = self.documents, CatalogueInstantane(instantane)
+        for doc_id, doc in anciens.items():
+            if doc_id not in self.documents:
+                self.documents[doc_id] = doc
+        self._catalogue_a_indexer = self.documents
+        for emp in instantane.iter_emprunts():
+            self._charger_emprunt(emp)
+        self._recaler_id_documents()
+        self._reconstruire_statistiques()
+        if self.adherents:
+            Adherent._id_counter = max(Adherent._id_counter, max(self.adherents))
+        if self.emprunts:
+            Emprunt._id_counter = max(Emprunt._id_counter, max(self.emprunts))
+
+    # ─────────────────────────────────
+    # Storage backend
+    # ─────────────────────────────────
+
+    def utiliser_stockage(self, stockage):
+        # Remplacer les fichiers CSV par un moteur de stockage (ex.: StockageSQLite).
+        # À appeler avant charger().
+        self._stockage = stockage
+
+    def _historique_sur_disque(self) -> bool:
+        # Les emprunts retournés ne sont pas en mémoire: les requêtes d'historique vont au stockage
+        return self._stockage is not None and self._stockage.historique_partiel
+
+    # ─────────────────────────────────
+    # Metrics and profiling
+    # ─────────────────────────────────
+
+    def activer_mesures(self, mesures=None):
+        # Compteurs, histogrammes de latence et profilage (voir mesures_class.Mesures).
+        # Désactivées, les opérations ne passent par aucune enveloppe.
+        from mesures_class import Mesures
+        self.desactiver_mesures()
+        self._mesures = mesures or Mesures()
+        self._mesures.instrumenter(self)
+        return self._mesures
+
+    def desactiver_mesures(self):
+        if self._mesures is not None:
+            self._mesures.desinstrumenter(self)
+            self._mesures = None
+
+    def _signaler_erreur(self, contexte: str, erreur):
+        logger.error("Erreur %s: %s", contexte, erreur)
+        if self._mesures is not None:
+            self._mesures.signaler(contexte, erreur)
+
+    # ─────────────────────────────────
+    # Operation log (write-ahead journal)
+    # ─────────────────────────────────
+
+    def activer_registre(self, chemin: str = "registre.jsonl", seuil_compaction: int = 10000):
+        # Chaque modification est ajoutée au registre; les CSV ne sont réécrits qu'à la compaction.
+        # À appeler avant charger() pour que le registre existant soit rejoué.
+        self._registre = Registre(chemin)
+        self._seuil_compaction = seuil_compaction
+
+    def compacter(self) -> bool:
+        # Écrire un instantané complet dans les CSV puis vider le registre. Le registre n'est vidé
+        # que si les trois CSV ont été remplacés: sinon il reste la seule copie des opérations
+        if not self._ecrire_csv():
+            return False
+        if self._registre is not None:
+            self._registre.vider()
+        return True
+
+    @staticmethod
+    def _donnees_registre(op: str, objet) -> dict:
+        # objet: l'entité ajoutée/empruntée/retournée, ou l'id de l'entité retirée
+        if op in ("retrait_document", "retrait_adherent"):
+            return {"id": objet}
+        if op == "retour":
+            return {"id": objet.id, "date": objet.date_retour.isoformat()}
+        if op == "exemplaires":
+            return {"id": objet.id, "total": objet.nb_exemplaires}
+        return {"ligne": objet.to_csv()}
+
+    def _journaliser(self, op: str, objet):
+        if self._stockage is not None:
+            self._stockage.enregistrer(op, objet)
+        if self._registre is None:
+            return
+        self._registre.ecrire(op, **self._donnees_registre(op, objet))
+        self._compacter_si_necessaire()
+
+    def _journaliser_lot(self, op: str, objets: list):
+        # Même effet que _journaliser pour chaque objet, en une transaction / une écriture
+        if not objets:
+            return
+        if self._stockage is not None:
+            self._stockage.enregistrer_lot(op, objets)
+        if self._registre is None:
+            return
+        self._registre.ecrire_lot(op, [self._donnees_registre(op, objet) for objet in objets])
+        self._compacter_si_necessaire()
+
+    def _compacter_si_necessaire(self):
+        # La sauvegarde automatique compacte elle-même le registre en arrière-plan
+        if self._sauvegarde_auto is None and self._registre.nb_operations >= self._seuil_compaction:
+            self.compacter()
+
+    def _rejouer_registre(self):
+        # Rejouer les opérations écrites depuis la dernière compaction.
+        # Chaque opération est idempotente: un registre déjà compacté peut être rejoué sans effet.
+        nb = 0
+        for operation in self._registre.lire():
+            op = operation.get("op")
+            try:
+                if op == "ajout_document":
+                    doc = Document.from_csv(operation["ligne"])
+                    if doc and doc.id not in self.documents:
+                        self._indexer_document(doc)
+                elif op == "retrait_document":
+                    if self.documents.pop(operation["id"], None) is not None:
+                        self._index_recherche.retirer(operation["id"])
+                elif op == "ajout_adherent":
+                    adh = Adherent.from_csv(operation["ligne"])
+                    if adh and adh.id not in self.adherents:
+                        self._indexer_adherent(adh)
+                elif op == "retrait_adherent":
+                    adh = self.adherents.pop(operation["id"], None)
+                    if adh:
+                        self._noms_adherents.discard((adh.nom, adh.prenom))
+                        self._index_adherents.retirer(adh.id)
+                elif op == "emprunt":
+                    emp = Emprunt.from_csv(operation["ligne"])
+                    if emp and emp.id not in self.emprunts:
+                        self._appliquer_emprunt(emp)
+                elif op == "retour":
+                    emp = self.emprunts.get(operation["id"])
+                    if emp and emp.est_actif():
+                        emp.retourner_livre(date.fromisoformat(operation["date"]))
+                        self._appliquer_retour(emp)
+                elif op == "exemplaires":
+                    livre = self.documents.get(operation["id"])
+                    if isinstance(livre, Livre) and livre.nb_exemplaires < operation["total"]:
+                        livre.ajouter_exemplaires(operation["total"] - livre.nb_exemplaires)
+                else:
+                    continue
+                nb += 1
+            except Exception as e:
+                self._signaler_erreur(f"registre ({op})", e)
+        self._recaler_id_documents()
+        self._registre.nb_operations = nb
@@ -0,0 +1,116 @@
+"""
+chargement_class.py
+Chargement parallèle des fichiers CSV au démarrage.
+    Chaque fichier est découpé en tranches d'octets (alignées sur les fins de
+    ligne) analysées dans un ProcessPoolExecutor; les trois fichiers sont lus
+    en même temps et les résultats sont fusionnés dans l'ordre du fichier.
+    """
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from document_classes import Document
+from adherent_class import Adherent
+from emprunt_class import Emprunt
+from recherche_class import mots_document
+
+FICHIERS = (("adherents", "adherents.csv"), ("documents", "documents.csv"), ("emprunts", "emprunts.csv"))
+_FABRIQUES = {"adherents": Adherent.from_csv, "documents": Document.from_csv, "emprunts": Emprunt.from_csv}
+
+
+def _analyser_tranche(genre: str, chemin: str, debut: int, fin: int) -> tuple:
+    # Exécuté dans un processus de travail: retourne (objets, erreurs).
+    # Pour les documents, chaque objet est accompagné de ses mots pour l'index de recherche.
+    fabrique = _FABRIQUES[genre]
+    objets, erreurs = [], []
+    with open(chemin, "rb") as f:
+        f.seek(debut)
+        donnees = f.read(fin - debut)
+    for line in donnees.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            objet = fabrique(line)
+        except Exception as e:
+            erreurs.append(f"{line[:60]!r}: {e}")
+            continue
+        if objet:
+            objets.append((objet, mots_document(objet)) if genre == "documents" else objet)
+    return objets, erreurs
+
+
+def decouper_fichier(chemin: str, nb_tranches: int, taille_min: int = 1 << 20) -> list:
+    # Tranches [debut, fin) qui commencent toujours au début d'une ligne.
+    # Un champ entre guillemets contenant un saut de ligne n'est pas supporté ici.
+    taille = os.path.getsize(chemin)
+    nb_tranches = max(1, min(nb_tranches, taille // taille_min))
+    bornes = [0]
+    with open(chemin, "rb") as f:
+        for i in range(1, nb_tranches):
+            f.seek(max(taille * i // nb_tranches, bornes[-1]))
+            f.readline()  # avancer jusqu'à la fin de la ligne courante
+            bornes.append(min(f.tell(), taille))
+    bornes.append(taille)
+    return [(a, b) for a, b in zip(bornes, bornes[1:]) if b > a]
+
+
+class ChargeurParallele:
+    # Remplit une Bibliotheque à partir des CSV avec plusieurs processus
+
+    def __init__(self, bibliotheque, nb_processus: int = None):
+        self.bibliotheque = bibliotheque
+        self.nb_processus = nb_processus or os.cpu_count() or 1
+        self.erreurs = []
+
+    def charger(self, progression=None):
+        resultats = {genre: [] for genre, _ in FICHIERS}
+        with ProcessPoolExecutor(max_workers=self.nb_processus) as pool:
+            # Toutes les tranches des trois fichiers sont soumises ensemble
+            for genre, chemin in FICHIERS:
+                if not os.path.exists(chemin):
+                    continue
+                for debut, fin in decouper_fichier(chemin, self.nb_processus):
+                    resultats[genre].append(pool.submit(_analyser_tranche, genre, chemin, debut, fin))
+            # Fusion déterministe: adhérents, puis documents, puis emprunts, tranches dans l'ordre
+            for genre, chemin in FICHIERS:
+                debut, avant = time.perf_counter(), len(getattr(self.bibliotheque, genre))
+                for future in resultats[genre]:
+                    objets, erreurs = future.result()
+                    self.erreurs.extend(erreurs)
+                    self._fusionner(genre, objets)
+                self._mesurer(genre, chemin, time.perf_counter() - debut, avant)
+                if progression and genre != "emprunts":
+                    progression(genre)  # emprunts: signalé par Bibliotheque après le registre
+        self._recaler_compteurs()
+        for erreur in self.erreurs:
+            self.bibliotheque._signaler_erreur("chargement", erreur)
+
+    def _mesurer(self, genre: str, chemin: str, duree: float, avant: int):
+        # Mêmes mesures que les phases _charger_* du chargement séquentiel (voir Mesures.instrumenter);
+        # la durée est l'attente des tranches du fichier plus leur fusion, les analyses étant simultanées
+        mesures = self.bibliotheque._mesures
+        if mesures is not None:
+            lignes = len(getattr(self.bibliotheque, genre)) - avant
+            octets = os.path.getsize(chemin) if os.path.exists(chemin) else 0
+            mesures.enregistrer(f"charger_{genre}", duree, lignes, octets)
+
+    def _fusionner(self, genre: str, objets: list):
+        bibliotheque = self.bibliotheque
+        if genre == "adherents":
+            for adh in objets:
+                bibliotheque._indexer_adherent(adh)
+        elif genre == "documents":
+            for doc, mots in objets:
+                bibliotheque._indexer_document(doc, mots)
+        else:
+            for emp in objets:
+                bibliotheque._charger_emprunt(emp)
+
+    def _recaler_compteurs(self):
+        # Les compteurs des processus de travail sont perdus: repartir des plus grands ids chargés
+        bibliotheque = self.bibliotheque
+        bibliotheque._recaler_id_documents()
+        if bibliotheque.adherents:
+            Adherent._id_counter = max(Adherent._id_counter, max(bibliotheque.adherents))
+        if bibliotheque.emprunts:
+            Emprunt._id_counter = max(Emprunt._id_counter, max(bibliotheque.emprunts))
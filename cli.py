@@ -0,0 +1,232 @@
+"""
+cli.py
+Interface en ligne de commande de la bibliothèque, sans interface graphique.
+    N'importe jamais PyQt6; NumPy, sqlite3 et l'importation ne sont chargés que
+    par les commandes qui en ont besoin (tâches cron, scripts).
+
+    python cli.py [--dossier D] [--sqlite F] [--temps] commande [...]
+    commandes: charger, importer, exporter, retards, stats, classements, emprunter, retourner
+    """
+
+import time
+
+_DEBUT = time.perf_counter()
+
+import argparse
+import os
+import sys
+from datetime import date
+
+from bibliotheque_class import Bibliotheque
+
+
+def _date(texte: str) -> date:
+    try:
+        return date.fromisoformat(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date invalide (AAAA-MM-JJ): {texte}")
+
+
+def _paire(texte: str) -> tuple:
+    # "12:345" -> (adherent_id, livre_id)
+    try:
+        adherent_id, livre_id = texte.split(":")
+        return int(adherent_id), int(livre_id)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"attendu ADHERENT_ID:LIVRE_ID, reçu {texte}")
+
+
+# ─────────────────────────────────
+# Commands
+# ─────────────────────────────────
+
+def cmd_charger(bibliotheque, args) -> int:
+    actifs = len(bibliotheque.lister_emprunts("actifs"))
+    print(
+        f"{len(bibliotheque.documents)} documents, {len(bibliotheque.adherents)} adhérents, "
+        f"{len(bibliotheque.emprunts)} emprunts en mémoire ({actifs} actifs)"
+    )
+    return 0
+
+
+def cmd_importer(bibliotheque, args) -> int:
+    from importation_class import Importateur
+
+    importateur = Importateur(bibliotheque)
+    code = 0
+    for chemin in args.fichiers:
+        if args.genre == "documents":
+            rapport = importateur.importer_documents(chemin)
+        else:
+            rapport = importateur.importer_adherents(chemin)
+        print(rapport)
+        for numero, raison in rapport.rejets[:50]:
+            print(f"  ligne {numero}: {raison}")
+        if rapport.rejets:
+            code = 1
+    return code
+
+
+def cmd_exporter(bibliotheque, args) -> int:
+    if args.collection == "instantane":
+        if not args.sortie:
+            print("Erreur: exporter instantane demande -o fichier.snap", file=sys.stderr)
+            return 2
+        bibliotheque.ecrire_instantane(args.sortie)
+        return 0
+    if args.collection == "documents":
+        objets = bibliotheque.documents.values()
+    elif args.collection == "adherents":
+        objets = bibliotheque.adherents.values()
+    else:
+        objets = bibliotheque.lister_emprunts()
+    if args.sortie:
+        Bibliotheque._ecrire_fichier(args.sortie, (objet.to_csv() for objet in objets))
+    else:
+        sys.stdout.writelines(objet.to_csv() + "\n" for objet in objets)
+    return 0
+
+
+def cmd_retards(bibliotheque, args) -> int:
+    date_ref = args.date or date.today()
+    for emprunt in bibliotheque.lister_emprunts_en_retard(args.delai, date_ref):
+        adherent = bibliotheque.trouver_adherent(emprunt.adherent_id)
+        nom = adherent.get_nom_complet() if adherent else "?"
+        print(f"{emprunt.id},{emprunt.adherent_id},{nom},{emprunt.livre_id},"
+              f"{emprunt.date_emprunt.isoformat()},{emprunt.jours_emprunt(date_ref)}")
+    return 0
+
+
+def cmd_stats(bibliotheque, args) -> int:
+    historique = bibliotheque.historique  # statistiques NumPy: importé seulement ici
+    date_ref = args.date or date.today()
+    retards = int(historique.masque_retard(args.delai, date_ref).sum()) if len(historique) else 0
+    print(f"Emprunts: {len(historique)} ({len(bibliotheque.lister_emprunts('actifs'))} actifs, {retards} en retard)")
+    print(f"Durée moyenne d'un emprunt rendu: {historique.duree_moyenne(date_ref):.1f} jours")
+    par_mois = historique.emprunts_par_mois() if len(historique) else {}
+    for mois in sorted(par_mois)[-12:]:
+        print(f"  {mois}: {par_mois[mois]}")
+    return 0
+
+
+def cmd_classements(bibliotheque, args) -> int:
+    # Compteurs tenus à jour par Bibliotheque (sans NumPy ni parcours de l'historique)
+    statistiques = bibliotheque.statistiques
+    print(f"Emprunts: {statistiques.nb_emprunts}, durée moyenne d'un emprunt rendu: "
+          f"{statistiques.duree_moyenne():.1f} jours")
+    print("Livres les plus empruntés:")
+    for livre_id, nombre in statistiques.livres_les_plus_empruntes(args.top):
+        livre = bibliotheque.trouver_document(livre_id)
+        print(f"  {nombre:6} {livre.titre if livre else '(retiré)'} #{livre_id}")
+    print("Adhérents les plus actifs:")
+    for adherent_id, nombre in statistiques.adherents_les_plus_actifs(args.top):
+        adherent = bibliotheque.trouver_adherent(adherent_id)
+        print(f"  {nombre:6} {adherent.get_nom_complet() if adherent else '(retiré)'} #{adherent_id}")
+    print("Auteurs les plus empruntés:")
+    for auteur, nombre in statistiques.auteurs_les_plus_populaires(args.top):
+        print(f"  {nombre:6} {auteur}")
+    return 0
+
+
+def _afficher_resultats(resultats) -> int:
+    for resultat in resultats:
+        if resultat.succes:
+            print(f"{resultat.index}: ok emprunt #{resultat.emprunt.id}")
+        else:
+            print(f"{resultat.index}: {resultat.erreur} ({resultat.message})")
+    return 0 if all(resultat.succes for resultat in resultats) else 1
+
+
+def cmd_emprunter(bibliotheque, args) -> int:
+    resultats = bibliotheque.creer_emprunts(args.paires, args.tout_ou_rien, args.date)
+    bibliotheque.sauvegarder()
+    return _afficher_resultats(resultats)
+
+
+def cmd_retourner(bibliotheque, args) -> int:
+    resultats = bibliotheque.retourner_livres(args.emprunts, args.tout_ou_rien, args.date)
+    bibliotheque.sauvegarder()
+    return _afficher_resultats(resultats)
+
+
+# ─────────────────────────────────
+# Entry point
+# ─────────────────────────────────
+
+def _analyseur() -> argparse.ArgumentParser:
+    analyseur = argparse.ArgumentParser(prog="cli.py", description="Gestion de la bibliothèque sans interface graphique")
+    analyseur.add_argument("--dossier", help="dossier des fichiers de données (défaut: dossier courant)")
+    analyseur.add_argument("--sqlite", metavar="FICHIER", help="utiliser une base SQLite au lieu des CSV")
+    analyseur.add_argument("--temps", action="store_true", help="afficher les temps de démarrage et d'exécution")
+    commandes = analyseur.add_subparsers(dest="commande", required=True)
+
+    commandes.add_parser("charger", help="charger les données et afficher leur taille").set_defaults(executer=cmd_charger)
+
+    p = commandes.add_parser("importer", help="importer des documents ou des adhérents depuis des CSV")
+    p.add_argument("genre", choices=("documents", "adherents"))
+    p.add_argument("fichiers", nargs="+")
+    p.set_defaults(executer=cmd_importer)
+
+    p = commandes.add_parser("exporter", help="écrire une collection en CSV (ou un instantané binaire)")
+    p.add_argument("collection", choices=("documents", "adherents", "emprunts", "instantane"))
+    p.add_argument("-o", "--sortie", help="fichier de sortie (défaut: sortie standard)")
+    p.set_defaults(executer=cmd_exporter)
+
+    for nom, executer, aide in (
+        ("retards", cmd_retards, "lister les emprunts en retard (CSV: id, adhérent, nom, livre, date, jours)"),
+        ("stats", cmd_stats, "statistiques des emprunts (nécessite NumPy)"),
+    ):
+        p = commandes.add_parser(nom, help=aide)
+        p.add_argument("--delai", type=int, default=30, help="jours avant retard (défaut: 30)")
+        p.add_argument("--date", type=_date, help="date de référence (défaut: aujourd'hui)")
+        p.set_defaults(executer=executer)
+
+    p = commandes.add_parser("classements", help="livres, adhérents et auteurs les plus empruntés")
+    p.add_argument("--top", type=int, default=10, help="taille des classements (défaut: 10)")
+    p.set_defaults(executer=cmd_classements)
+
+    p = commandes.add_parser("emprunter", help="créer des emprunts (lot)")
+    p.add_argument("paires", nargs="+", type=_paire, metavar="ADHERENT_ID:LIVRE_ID")
+    p.add_argument("--tout-ou-rien", action="store_true", help="annuler le lot si un emprunt échoue")
+    p.add_argument("--date", type=_date, help="date d'emprunt (défaut: aujourd'hui)")
+    p.set_defaults(executer=cmd_emprunter)
+
+    p = commandes.add_parser("retourner", help="retourner des livres (lot d'ids d'emprunt)")
+    p.add_argument("emprunts", nargs="+", type=int, metavar="EMPRUNT_ID")
+    p.add_argument("--tout-ou-rien", action="store_true", help="annuler le lot si un retour échoue")
+    p.add_argument("--date", type=_date, help="date de retour (défaut: aujourd'hui)")
+    p.set_defaults(executer=cmd_retourner)
+    return analyseur
+
+
+def main(argv=None) -> int:
+    args = _analyseur().parse_args(argv)
+    if args.dossier:
+        os.chdir(args.dossier)
+
+    bibliotheque = Bibliotheque()
+    if args.sqlite:
+        from stockage_class import StockageSQLite
+        bibliotheque.utiliser_stockage(StockageSQLite(args.sqlite))
+    else:
+        bibliotheque.activer_registre()  # mêmes fichiers que l'interface graphique
+    demarrage = time.perf_counter()
+    bibliotheque.charger()
+    chargement = time.perf_counter()
+    code = args.executer(bibliotheque, args)
+    if bibliotheque._stockage is not None:
+        bibliotheque._stockage.fermer()
+    elif bibliotheque._registre is not None:
+        bibliotheque._registre.fermer()
+    if args.temps:
+        fin = time.perf_counter()
+        print(
+            f"démarrage {1000 * (demarrage - _DEBUT):.1f} ms, chargement {1000 * (chargement - demarrage):.1f} ms, "
+            f"commande {1000 * (fin - chargement):.1f} ms",
+            file=sys.stderr,
+        )
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+client_class.py
+Bibliothèque distante: même interface que Bibliotheque pour l'interface graphique,
+    mais chaque opération est envoyée au serveur (serveur_class.py) sur une
+    connexion HTTP persistante. Les entités reçues sont gardées dans des
+    dictionnaires miroirs (un seul objet par id) pour que les modèles Qt
+    retrouvent leurs lignes par identité; les événements sont émis localement
+    après chaque opération réussie.
+    """
+
+import http.client
+import json
+import select
+import threading
+from urllib.parse import quote, urlsplit
+from bibliotheque_class import (DOCUMENT_AJOUTE, DOCUMENT_RETIRE, DISPONIBILITE_MODIFIEE,
+    ADHERENT_AJOUTE, ADHERENT_RETIRE, EMPRUNT_CREE, EMPRUNT_CLOTURE)
+from document_classes import Livre
+from serveur_class import vers_json, document_depuis_json, adherent_depuis_json, emprunt_depuis_json
+
+# Requêtes qu'on peut renvoyer sans risque si la connexion tombe (un POST a peut-être déjà été exécuté)
+_IDEMPOTENTES = ("GET", "DELETE")
+
+
+class ErreurServeur(Exception):
+    # Réponse d'erreur du serveur (statut HTTP et message)
+
+    def __init__(self, statut: int, message: str):
+        super().__init__(f"{statut}: {message}")
+        self.statut = statut
+
+
+class BibliothequeDistante:
+
+    def __init__(self, url: str = "http://127.0.0.1:8765", nom: str = "Ma Bibliothèque", delai: float = 10.0):
+        self.nom = nom
+        adresse = urlsplit(url)
+        self._hote = adresse.hostname or "127.0.0.1"
+        self._port = adresse.port or 80
+        self._delai = delai
+        self._connexion = None
+        self._verrou = threading.Lock()  # une requête à la fois sur la connexion
+        # Miroirs des entités reçues (id -> objet)
+        self.documents = {}
+        self.adherents = {}
+        self.emprunts = {}
+        self._abonnes = []
+
+    # ─────────────────────────────────
+    # HTTP
+    # ─────────────────────────────────
+
+    def _requete(self, methode: str, chemin: str, donnees=None, attendus=(200, 201)):
+        corps = json.dumps(donnees).encode("utf-8") if donnees is not None else None
+        entetes = {"Content-Type": "application/json"} if corps is not None else {}
+        tentatives = 2 if methode in _IDEMPOTENTES else 1
+        with self._verrou:
+            for tentative in range(1, tentatives + 1):
+                if self._connexion is not None and _fermee_par_le_serveur(self._connexion):
+                    self._connexion.close()
+                    self._connexion = None
+                if self._connexion is None:
+                    self._connexion = http.client.HTTPConnection(self._hote, self._port, timeout=self._delai)
+                try:
+                    self._connexion.request(methode, chemin, corps, entetes)
+                    reponse = self._connexion.getresponse()
+                    resultat = json.loads(reponse.read() or b"null")
+                    break
+                except (http.client.HTTPException, ConnectionError):
+                    # Connexion persistante fermée par le serveur: une seule nouvelle tentative,
+                    # et seulement pour une requête idempotente
+                    self._connexion.close()
+                    self._connexion = None
+                    if tentative == tentatives:
+                        raise
+            if reponse.will_close:
+                self._connexion.close()
+                self._connexion = None
+        if reponse.status not in attendus:
+            raise ErreurServeur(reponse.status, (resultat or {}).get("erreur", reponse.reason))
+        return reponse.status, resultat
+
+    def fermer(self):
+        with self._verrou:
+            if self._connexion is not None:
+                self._connexion.close()
+                self._connexion = None
+
+    # ─────────────────────────────────
+    # Mirror (un objet par id, mis à jour sur place)
+    # ─────────────────────────────────
+
+    def _document(self, donnees: dict):
+        doc = self.documents.get(donnees["id"])
+        if doc is None:
+            doc = self.documents[donnees["id"]] = document_depuis_json(donnees)
+        if isinstance(doc, Livre):
+            # Mêmes exemplaires en rayon que sur le serveur (numéros, pas seulement leur nombre)
+            total = donnees.get("exemplaires", 1)
+            if total > doc.nb_exemplaires:
+                doc.ajouter_exemplaires(total - doc.nb_exemplaires)
+            doc.definir_exemplaires_libres(donnees["libres"])
+        return doc
+
+    def _adherent(self, donnees: dict):
+        adh = self.adherents.get(donnees["id"])
+        if adh is None:
+            return self.adherents.setdefault(donnees["id"], adherent_depuis_json(donnees))
+        for livre_id in set(adh.livres_empruntes) - set(donnees["livres_empruntes"]):
+            adh.retirer_emprunt(livre_id)
+        for livre_id in donnees["livres_empruntes"]:
+            adh.ajouter_emprunt(livre_id)
+        return adh
+
+    def _emprunt(self, donnees: dict):
+        emp = self.emprunts.get(donnees["id"])
+        if emp is None:
+            return self.emprunts.setdefault(donnees["id"], emprunt_depuis_json(donnees))
+        if donnees["date_retour"] and emp.date_retour is None:
+            emp.retourner_livre(emprunt_depuis_json(donnees).date_retour)
+        return emp
+
+    # ─────────────────────────────────
+    # Documents
+    # ─────────────────────────────────
+
+    def ajouter_document(self, document):
+        _, donnees = self._requete("POST", "/documents", _sans_id(document))
+        document.id = donnees["id"]  # l'id est attribué par le serveur
+        self.documents[document.id] = document
+        self._notifier(DOCUMENT_AJOUTE, document)
+
+    def retirer_document(self, doc_id: int) -> bool:
+        try:
+            self._requete("DELETE", f"/documents/{doc_id}")
+        except ErreurServeur as e:
+            if e.statut == 404:
+                return False
+            raise
+        doc = self.documents.pop(doc_id, None)
+        if doc is not None:
+            self._notifier(DOCUMENT_RETIRE, doc)
+        return True
+
+    def ajouter_exemplaires(self, livre_id: int, nombre: int = 1) -> bool:
+        try:
+            _, donnees = self._requete("POST", f"/documents/{livre_id}/exemplaires", {"nombre": nombre})
+        except ErreurServeur as e:
+            if e.statut == 404:
+                return False
+            raise
+        self._notifier(DISPONIBILITE_MODIFIEE, self._document(donnees))
+        return True
+
+    def trouver_document(self, doc_id: int):
+        return self.documents.get(doc_id)
+
+    def lister_documents(self) -> list:
+        # Relit le catalogue du serveur (modifications des autres postes comprises)
+        _, donnees = self._requete("GET", "/documents")
+        documents = [self._document(d) for d in donnees]
+        vus = {doc.id for doc in documents}
+        for doc_id in [i for i in self.documents if i not in vus]:
+            del self.documents[doc_id]
+        return documents
+
+    def rechercher_documents(self, requete: str, limite: int = None) -> list:
+        chemin = f"/documents?q={quote(requete)}" + (f"&limite={limite}" if limite is not None else "")
+        return [self._document(d) for d in self._requete("GET", chemin)[1]]
+
+    def suggerer_livres_disponibles(self, requete: str, limite: int = 20) -> list:
+        chemin = f"/livres/disponibles?q={quote(requete)}&limite={limite}"
+        return [self._document(d) for d in self._requete("GET", chemin)[1]]
+
+    # ─────────────────────────────────
+    # Adherents
+    # ─────────────────────────────────
+
+    def ajouter_adherent(self, adherent) -> bool:
+        try:
+            _, donnees = self._requete("POST", "/adherents",
+                {"nom": adherent.nom, "prenom": adherent.prenom, "email": adherent.email})
+        except ErreurServeur as e:
+            if e.statut == 409:
+                return False
+            raise
+        adherent.id = donnees["id"]
+        self.adherents[adherent.id] = adherent
+        self._notifier(ADHERENT_AJOUTE, adherent)
+        return True
+
+    def retirer_adherent(self, adherent_id: int) -> bool:
+        try:
+            self._requete("DELETE", f"/adherents/{adherent_id}")
+        except ErreurServeur as e:
+            if e.statut == 404:
+                return False
+            raise
+        adh = self.adherents.pop(adherent_id, None)
+        if adh is not None:
+            self._notifier(ADHERENT_RETIRE, adh)
+        return True
+
+    def trouver_adherent(self, adherent_id: int):
+        return self.adherents.get(adherent_id)
+
+    def lister_adherents(self) -> list:
+        _, donnees = self._requete("GET", "/adherents")
+        adherents = [self._adherent(d) for d in donnees]
+        vus = {adh.id for adh in adherents}
+        for adherent_id in [i for i in self.adherents if i not in vus]:
+            del self.adherents[adherent_id]
+        return adherents
+
+    def suggerer_adherents(self, requete: str, limite: int = 20) -> list:
+        chemin = f"/adherents?q={quote(requete)}&limite={limite}"
+        return [self._adherent(d) for d in self._requete("GET", chemin)[1]]
+
+    # ─────────────────────────────────
+    # Borrowing
+    # ─────────────────────────────────
+
+    def creer_emprunt(self, adherent_id: int, livre_id: int) -> tuple:
+        statut, donnees = self._requete("POST", "/emprunts",
+            {"adherent_id": adherent_id, "livre_id": livre_id}, attendus=(201, 409))
+        if statut == 409:
+            return False, donnees["message"]
+        emprunt = self._emprunt(donnees["emprunt"])
+        livre = self.documents.get(livre_id)
+        if livre is not None:
+            livre.reserver_exemplaire(emprunt.exemplaire)
+            self._notifier(DISPONIBILITE_MODIFIEE, livre)
+        adherent = self.adherents.get(adherent_id)
+        if adherent is not None:
+            adherent.ajouter_emprunt(livre_id)
+        self._notifier(EMPRUNT_CREE, emprunt)
+        return True, donnees["message"]
+
+    def retourner_livre(self, emprunt_id: int) -> tuple:
+        statut, donnees = self._requete("POST", f"/emprunts/{emprunt_id}/retour", {}, attendus=(200, 409))
+        if statut == 409:
+            return False, donnees["message"]
+        emprunt = self._emprunt(donnees["emprunt"])
+        livre = self.documents.get(emprunt.livre_id)
+        if livre is not None:
+            livre.rendre_exemplaire(emprunt.exemplaire)
+            self._notifier(DISPONIBILITE_MODIFIEE, livre)
+        adherent = self.adherents.get(emprunt.adherent_id)
+        if adherent is not None:
+            adherent.retirer_emprunt(emprunt.livre_id)
+        self._notifier(EMPRUNT_CLOTURE, emprunt)
+        return True, donnees["message"]
+
+    def lister_emprunts(self, filtre="tous") -> list:
+        return [self._emprunt(d) for d in self._requete("GET", f"/emprunts?filtre={quote(filtre)}")[1]]
+
+    def lister_emprunts_en_retard(self, delai_jours: int = 30, date_ref=None) -> list:
+        chemin = f"/emprunts/retards?delai={delai_jours}" + (f"&date={date_ref.isoformat()}" if date_ref else "")
+        return [self._emprunt(d) for d in self._requete("GET", chemin)[1]]
+
+    # ─────────────────────────────────
+    # Change notifications
+    # ─────────────────────────────────
+
+    def abonner(self, rappel):
+        # Seules les opérations de ce poste sont notifiées; "Actualiser" relit le serveur
+        self._abonnes.append(rappel)
+
+    def desabonner(self, rappel):
+        if rappel in self._abonnes:
+            self._abonnes.remove(rappel)
+
+    def _notifier(self, evenement: str, objet):
+        for rappel in list(self._abonnes):
+            rappel(evenement, objet)
+
+    # ─────────────────────────────────
+    # Loading / saving (le serveur possède les fichiers)
+    # ─────────────────────────────────
+
+    def charger(self, progression=None):
+        for collection, lister in (
+            ("adherents", self.lister_adherents),
+            ("documents", self.lister_documents),
+            ("emprunts", lambda: self.lister_emprunts("actifs")),
+        ):
+            lister()
+            if progression is not None:
+                progression(collection)
+
+    def preparer_recherche(self):
+        pass  # les index de recherche sont sur le serveur
+
+    def sauvegarder(self):
+        self._requete("POST", "/sauvegarder", {})
+
+
+def _fermee_par_le_serveur(connexion) -> bool:
+    # Connexion inactive devenue lisible: le serveur l'a fermée (délai keep-alive). Vérifié avant
+    # d'envoyer, puisqu'un POST n'est pas renvoyé après coup.
+    return connexion.sock is not None and bool(select.select([connexion.sock], [], [], 0)[0])
+
+
+def _sans_id(document) -> dict:
+    donnees = vers_json(document)
+    del donnees["id"]
+    return donnees
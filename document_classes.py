@@ -1,7 +1,11 @@
 # Classes for all documents class and subclasses in the library.
 
+from abc import ABC, abstractmethod
 from datetime import date, datetime
+import csv
 import itertools
+from functools import lru_cache
+import sys
 
 # ─────────────────────────────────
 # Safe validation functions
@@ -28,6 +32,12 @@ def safe_bool(value, fallback=True) -> bool:
         return value != 0
     return fallback
 
+def safe_int(value, fallback=0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return fallback
+
 # if date is incorrect the function will replace it by today date.
 def safe_date(value, fallback=None) -> date:
     if isinstance(value, date):
@@ -39,11 +49,40 @@ def safe_date(value, fallback=None) -> date:
             pass
     return fallback or date.today()
 
+def safe_date_partagee(value, fallback=None) -> date:
+    return partager_date(safe_date(value, fallback))
+
+# Shared immutable values: one object per distinct date / repeated string.
+# Bounded cache: 65536 distinct dates cover more than a century of loans
+@lru_cache(maxsize=65536)
+def partager_date(d: date) -> date:
+    return d
+
+def partager_str(s: str) -> str:
+    return sys.intern(s)
+
+# CSV lines with proper quoting (a title may contain a comma)
+def ligne_csv(*champs) -> str:
+    valeurs = []
+    for champ in champs:
+        v = str(champ)
+        if any(c in v for c in ',"\n\r'):
+            v = '"' + v.replace('"', '""') + '"'
+        valeurs.append(v)
+    return ",".join(valeurs)
+
+def lire_ligne_csv(line: str) -> list:
+    line = line.strip()
+    if '"' not in line:
+        return line.split(",")
+    return next(csv.reader([line]))
+
 # ─────────────────────────────────
 # Super root class: Document
 # ─────────────────────────────────
 
-class Document:
+class Document(ABC):
+    __slots__ = ("id", "titre")  # pas de __dict__ par objet
     _id_gen = itertools.count()  # Auto-increment ID
 
     def __init__(self, titre: str):
@@ -54,12 +93,39 @@ class Document:
         """String representation"""
         return f"[{self.__class__.__name__} #{self.id}] '{self.titre}'"
 
+    @abstractmethod
+    def to_csv(self) -> str:
+        """Ligne CSV: type,id,titre,... (redéfinie par chaque type de document)"""
+
+    @staticmethod
+    def from_csv(line: str):
+        """Créer le bon type de document à partir d'une ligne CSV"""
+        parts = lire_ligne_csv(line)
+        if len(parts) < 4:
+            return None
+        doc_type = parts[0]
+        titre = parts[2]
+        if doc_type == "Livre":
+            nb_exemplaires = parts[5] if len(parts) > 5 else 1
+            doc = Livre(titre, parts[3], parts[4] if len(parts) > 4 else True, nb_exemplaires)
+        elif doc_type == "BD":
+            doc = BandeDessinee(titre, parts[3], parts[4] if len(parts) > 4 else "")
+        elif doc_type == "Dictionnaire":
+            doc = Dictionnaire(titre, parts[3])
+        elif doc_type == "Journal":
+            doc = Journal(titre, parts[3])
+        else:
+            return None
+        doc.id = int(parts[1])
+        return doc
+
 # ─────────────────────────────────
 # root class: Volume
 # ─────────────────────────────────
 
 class Volume(Document):
     """Classe intermédiaire pour Dictionnaire, BD et Livre"""
+    __slots__ = ("volume_id",)
 
     def __init__(self, titre: str):
         super().__init__(titre)
@@ -70,40 +136,117 @@ class Volume(Document):
 # ─────────────────────────────────
 
 class Livre(Volume):
-    def __init__(self, titre: str, auteur: str, est_disponible=True):
+    # Un titre et ses nb_exemplaires exemplaires (numérotés à partir de 1).
+    # Exemplaires libres: bits à 1 de _libres (bit 0 = exemplaire 1). Prendre ou rendre
+    # un exemplaire coûte O(1), et un livre à un exemplaire ne coûte pas plus qu'un booléen.
+    __slots__ = ("auteur", "nb_exemplaires", "_libres")
+
+    def __init__(self, titre: str, auteur: str, est_disponible=True, nb_exemplaires=1):
         super().__init__(titre)
-        self.auteur = safe_str(auteur)
-        self.est_disponible = safe_bool(est_disponible)
+        self.auteur = partager_str(safe_str(auteur))
+        self.nb_exemplaires = max(1, safe_int(nb_exemplaires, 1))
+        self._libres = (1 << self.nb_exemplaires) - 1 if safe_bool(est_disponible) else 0
+
+    @property
+    def est_disponible(self) -> bool:
+        # Au moins un exemplaire en rayon
+        return self._libres != 0
+
+    @est_disponible.setter
+    def est_disponible(self, valeur: bool):
+        # Tous les exemplaires en rayon, ou aucun (données sans détail par exemplaire)
+        self._libres = (1 << self.nb_exemplaires) - 1 if valeur else 0
+
+    @property
+    def nb_disponibles(self) -> int:
+        return self._libres.bit_count()
+
+    def exemplaires_libres(self) -> list:
+        return [n + 1 for n in range(self.nb_exemplaires) if self._libres >> n & 1]
+
+    def prendre_exemplaire(self) -> int:
+        # Numéro d'un exemplaire libre (le plus petit), marqué emprunté; None s'il n'y en a plus
+        bit = self._libres & -self._libres
+        if not bit:
+            return None
+        self._libres ^= bit
+        return bit.bit_length()
+
+    def reserver_exemplaire(self, numero: int):
+        # Marquer un exemplaire précis comme emprunté (chargement, registre): sans effet s'il l'est déjà
+        self._libres &= ~(1 << (numero - 1))
+
+    def rendre_exemplaire(self, numero: int):
+        if 1 <= numero <= self.nb_exemplaires:
+            self._libres |= 1 << (numero - 1)
+
+    def definir_exemplaires_libres(self, numeros):
+        # Exemplaires en rayon donnés par leur numéro (miroir d'une bibliothèque distante)
+        libres = 0
+        for numero in numeros:
+            if 1 <= numero <= self.nb_exemplaires:
+                libres |= 1 << (numero - 1)
+        self._libres = libres
+
+    def ajouter_exemplaires(self, nombre: int):
+        # Nouveaux exemplaires en rayon, numérotés après les existants
+        self._libres |= ((1 << nombre) - 1) << self.nb_exemplaires
+        self.nb_exemplaires += nombre
+
+    def statut(self) -> str:
+        if self.nb_exemplaires == 1:
+            return "✅ Disponible" if self._libres else "❌ Emprunté"
+        return f"{'✅' if self._libres else '❌'} {self.nb_disponibles}/{self.nb_exemplaires} disponibles"
 
     def __str__(self):
-        statut = "✅ Disponible" if self.est_disponible else "❌ Emprunté"
-        return f"[Livre #{self.id}] '{self.titre}' par {self.auteur} — {statut}"
+        return f"[Livre #{self.id}] '{self.titre}' par {self.auteur} — {self.statut()}"
+
+    def to_csv(self) -> str:
+        # Le nombre d'exemplaires n'est écrit que s'il y en a plusieurs (fichiers existants inchangés)
+        if self.nb_exemplaires == 1:
+            return ligne_csv("Livre", self.id, self.titre, self.auteur, self.est_disponible)
+        return ligne_csv("Livre", self.id, self.titre, self.auteur, self.est_disponible, self.nb_exemplaires)
 
 class BandeDessinee(Volume):
+    __slots__ = ("auteur", "dessinateur")
+
     def __init__(self, titre: str, auteur: str, dessinateur: str):
         super().__init__(titre)
-        self.auteur = safe_str(auteur)
-        self.dessinateur = safe_str(dessinateur)
+        self.auteur = partager_str(safe_str(auteur))
+        self.dessinateur = partager_str(safe_str(dessinateur))
 
     def __str__(self):
         return (f"[BD #{self.id}] '{self.titre}' — "
             f"Scénario: {self.auteur}, Dessin: {self.dessinateur}")
 
+    def to_csv(self) -> str:
+        return ligne_csv("BD", self.id, self.titre, self.auteur, self.dessinateur)
+
 class Dictionnaire(Volume):
+    __slots__ = ("langue",)
+
     def __init__(self, titre: str, langue: str):
         super().__init__(titre)
-        self.langue = safe_str(langue)
+        self.langue = partager_str(safe_str(langue))
 
     def __str__(self):
         return f"[Dictionnaire #{self.id}] '{self.titre}' — {self.langue}"
 
+    def to_csv(self) -> str:
+        return ligne_csv("Dictionnaire", self.id, self.titre, self.langue)
+
 class Journal(Document):
+    __slots__ = ("date_parution",)
+
     def __init__(self, titre: str, date_parution):
         super().__init__(titre)
-        self.date_parution = safe_date(date_parution)
+        self.date_parution = safe_date_partagee(date_parution)
 
     def __str__(self):
         return (
             f"[Journal #{self.id}] '{self.titre}' — "
             f"{self.date_parution.strftime('%d/%m/%Y')}"
         )
+
+    def to_csv(self) -> str:
+        return ligne_csv("Journal", self.id, self.titre, self.date_parution.strftime('%Y-%m-%d'))
@@ -0,0 +1,67 @@
+"""
+echeancier_class.py
+Index des emprunts actifs trié par date d'emprunt.
+    Permet de trouver les retards sans parcourir tout l'historique.
+    """
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+
+
+class Echeancier:
+    # Emprunts actifs triés par (date_emprunt, id)
+
+    def __init__(self):
+        self._cles = []  # Liste triée de (ordinal date_emprunt, emprunt_id)
+        self._emprunts = {}  # emprunt_id -> Emprunt
+        self._en_attente = []  # clés ajoutées mais pas encore triées (chargement en masse)
+
+    def __len__(self):
+        return len(self._emprunts)
+
+    def ajouter(self, emprunt):
+        # Le tri est différé jusqu'à la prochaine requête
+        if emprunt.id in self._emprunts:
+            return
+        self._en_attente.append((emprunt.date_emprunt.toordinal(), emprunt.id))
+        self._emprunts[emprunt.id] = emprunt
+
+    def _trier(self):
+        # Les nouveaux emprunts sont datés d'aujourd'hui: insort ajoute en fin de liste.
+        # Après un chargement, un seul tri est moins coûteux que des milliers d'insertions.
+        if len(self._en_attente) < 1000:
+            for cle in self._en_attente:
+                insort(self._cles, cle)
+        else:
+            self._cles.extend(self._en_attente)
+            self._cles.sort()
+        self._en_attente = []
+
+    def retirer(self, emprunt):
+        if self._emprunts.pop(emprunt.id, None) is None:
+            return
+        if self._en_attente:
+            self._trier()
+        cle = (emprunt.date_emprunt.toordinal(), emprunt.id)
+        i = bisect_left(self._cles, cle)
+        if i < len(self._cles) and self._cles[i] == cle:
+            del self._cles[i]
+
+    def en_retard(self, delai_jours: int = 30, date_ref: date = None) -> list:
+        # Emprunts actifs depuis plus de delai_jours à la date date_ref
+        if self._en_attente:
+            self._trier()
+        date_ref = date_ref or date.today()
+        limite = date_ref.toordinal() - delai_jours  # emprunté strictement avant cette date
+        fin = bisect_left(self._cles, (limite,))
+        return [self._emprunts[emprunt_id] for _, emprunt_id in self._cles[:fin]]
+
+    def a_echeance(self, debut: date, fin: date, delai_jours: int = 30) -> list:
+        # Emprunts dont le premier jour de retard tombe entre debut et fin (inclus)
+        if self._en_attente:
+            self._trier()
+        premier = (debut - timedelta(days=delai_jours + 1)).toordinal()
+        dernier = (fin - timedelta(days=delai_jours + 1)).toordinal()
+        i = bisect_left(self._cles, (premier,))
+        j = bisect_right(self._cles, (dernier, float("inf")))
+        return [self._emprunts[emprunt_id] for _, emprunt_id in self._cles[i:j]]
@@ -0,0 +1,142 @@
+"""
+historique_class.py
+Historique des emprunts en colonnes, pour les statistiques.
+    Les colonnes sont des array.array (compacts, mis à jour à chaque emprunt
+    et retour); les statistiques les copient d'un bloc dans des tableaux NumPy.
+    """
+
+from array import array
+from datetime import date
+
+_EPOQUE = date(1970, 1, 1).toordinal()  # origine de datetime64
+
+
+def _numpy():
+    # NumPy n'est nécessaire que pour les statistiques
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Les statistiques d'emprunts nécessitent NumPy (pip install numpy)") from e
+    return numpy
+
+
+class HistoriqueEmprunts:
+    # Une ligne par emprunt: id, adherent_id, livre_id, date_emprunt et date_retour (ordinaux, 0 = actif)
+
+    def __init__(self):
+        self.ids = array("q")
+        self.adherent_ids = array("q")
+        self.livre_ids = array("q")
+        self.dates_emprunt = array("i")
+        self.dates_retour = array("i")
+        self._lignes = {}  # emprunt_id -> numéro de ligne
+        self._source = None  # lignes pas encore lues (voir completer)
+
+    def __len__(self):
+        self._charger_source()
+        return len(self.ids)
+
+    def ajouter(self, emprunt):
+        if emprunt.id in self._lignes:
+            return
+        self._lignes[emprunt.id] = len(self.ids)
+        self.ids.append(emprunt.id)
+        self.adherent_ids.append(emprunt.adherent_id)
+        self.livre_ids.append(emprunt.livre_id)
+        self.dates_emprunt.append(emprunt.date_emprunt.toordinal())
+        self.dates_retour.append(emprunt.date_retour.toordinal() if emprunt.date_retour else 0)
+
+    def completer(self, source):
+        # source() donne des lignes (id, adherent_id, livre_id, date_emprunt, date_retour) en ordinaux,
+        # ex.: les emprunts rendus restés sur disque (StockageSQLite sans l'historique). Lues à la
+        # première statistique; les emprunts déjà présents sont ignorés.
+        self._source = source
+
+    def _charger_source(self):
+        source, self._source = self._source, None
+        if source is None:
+            return
+        for emprunt_id, adherent_id, livre_id, date_emprunt, date_retour in source():
+            if emprunt_id in self._lignes:
+                continue
+            self._lignes[emprunt_id] = len(self.ids)
+            self.ids.append(emprunt_id)
+            self.adherent_ids.append(adherent_id)
+            self.livre_ids.append(livre_id)
+            self.dates_emprunt.append(date_emprunt)
+            self.dates_retour.append(date_retour)
+
+    def retourner(self, emprunt):
+        ligne = self._lignes.get(emprunt.id)
+        if ligne is not None:
+            self.dates_retour[ligne] = emprunt.date_retour.toordinal()
+
+    # ─────────────────────────────────
+    # Vectorized statistics (NumPy)
+    # ─────────────────────────────────
+
+    def _colonnes(self):
+        # Copie (memcpy): une vue partagée empêcherait array.append pendant qu'elle existe
+        np = _numpy()
+        self._charger_source()
+        return (
+            np,
+            np.frombuffer(self.adherent_ids, dtype=np.int64).copy(),
+            np.frombuffer(self.livre_ids, dtype=np.int64).copy(),
+            np.frombuffer(self.dates_emprunt, dtype=np.int32).copy(),
+            np.frombuffer(self.dates_retour, dtype=np.int32).copy(),
+        )
+
+    def durees(self, date_ref: date = None, retournes_seulement: bool = False):
+        # Durée en jours de chaque emprunt (jusqu'à date_ref pour les emprunts actifs)
+        np, _, _, emprunt, retour = self._colonnes()
+        if retournes_seulement:
+            rendus = retour != 0
+            return (retour[rendus] - emprunt[rendus]).astype(np.int64)
+        fin = np.where(retour != 0, retour, (date_ref or date.today()).toordinal())
+        return (fin - emprunt).astype(np.int64)
+
+    def duree_moyenne(self, date_ref: date = None, retournes_seulement: bool = True) -> float:
+        durees = self.durees(date_ref, retournes_seulement)
+        return float(durees.mean()) if len(durees) else 0.0
+
+    def histogramme_durees(self, bornes, date_ref: date = None, retournes_seulement: bool = True) -> tuple:
+        # (effectifs, bornes) comme numpy.histogram
+        np = _numpy()
+        return np.histogram(self.durees(date_ref, retournes_seulement), bins=bornes)
+
+    def masque_retard(self, delai_jours: int = 30, date_ref: date = None, inclure_retournes: bool = False):
+        # True pour les emprunts actifs depuis plus de delai_jours; avec inclure_retournes,
+        # aussi pour les emprunts rendus après plus de delai_jours
+        np, _, _, emprunt, retour = self._colonnes()
+        actifs = retour == 0
+        masque = actifs & ((date_ref or date.today()).toordinal() - emprunt > delai_jours)
+        if inclure_retournes:
+            masque |= ~actifs & (retour - emprunt > delai_jours)
+        return masque
+
+    def emprunts_par_mois(self) -> dict:
+        # {"AAAA-MM": nombre d'emprunts}
+        np, _, _, emprunt, _ = self._colonnes()
+        mois = (emprunt.astype(np.int64) - _EPOQUE).astype("datetime64[D]").astype("datetime64[M]")
+        valeurs, nombres = np.unique(mois, return_counts=True)
+        return {str(v): int(n) for v, n in zip(valeurs, nombres)}
+
+    def _compter(self, colonne) -> dict:
+        np = _numpy()
+        valeurs, nombres = np.unique(colonne, return_counts=True)
+        return dict(zip(valeurs.tolist(), nombres.tolist()))
+
+    def compter_par_adherent(self) -> dict:
+        return self._compter(self._colonnes()[1])
+
+    def compter_par_livre(self) -> dict:
+        return self._compter(self._colonnes()[2])
+
+    def taux_retard_par_adherent(self, delai_jours: int = 30, date_ref: date = None) -> dict:
+        # Part des emprunts de chaque adhérent rendus (ou toujours actifs) après plus de delai_jours
+        np, adherents, _, _, _ = self._colonnes()
+        masque = self.masque_retard(delai_jours, date_ref, inclure_retournes=True)
+        valeurs, inverse, totaux = np.unique(adherents, return_inverse=True, return_counts=True)
+        retards = np.bincount(inverse, weights=masque, minlength=len(valeurs))
+        return dict(zip(valeurs.tolist(), (retards / totaux).tolist()))
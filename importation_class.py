@@ -0,0 +1,197 @@
+"""
+importation_class.py
+Importation en masse de fichiers CSV volumineux (documents et adhérents).
+    Les fichiers sont lus en flux avec le module csv (champs entre guillemets),
+    les dates sont analysées une seule fois par valeur distincte et les lignes
+    rejetées sont rapportées avec leur numéro.
+    """
+
+import csv
+import sys
+import time
+from datetime import date
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal, safe_bool, partager_date
+from adherent_class import Adherent
+
+
+class RapportImport:
+    # Résultat d'une importation
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self.nb_lignes = 0
+        self.nb_importes = 0
+        self.rejets = []  # (numéro de ligne, raison)
+        self.duree = 0.0  # secondes
+
+    @property
+    def debit(self) -> float:
+        # Lignes par seconde
+        return self.nb_lignes / self.duree if self.duree > 0 else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.chemin}: {self.nb_importes}/{self.nb_lignes} ligne(s) importée(s), "
+            f"{len(self.rejets)} rejet(s), {self.duree:.2f} s ({self.debit:,.0f} lignes/s)"
+        )
+
+
+class Importateur:
+    # Importe des lots d'objets dans une Bibliotheque
+
+    def __init__(self, bibliotheque, taille_lot: int = 10000, progression=None):
+        self.bibliotheque = bibliotheque
+        self.taille_lot = taille_lot
+        self.progression = progression  # appelée avec le nombre de lignes lues après chaque lot
+        self._dates = {}  # cache: texte -> date
+        self._ids = set()  # ids des lignes déjà acceptées dans l'importation en cours (lots pas encore insérés)
+
+    def _date(self, texte: str) -> date:
+        d = self._dates.get(texte)
+        if d is None:
+            d = self._dates[texte] = partager_date(date.fromisoformat(texte))
+        return d
+
+    # ─────────────────────────────────
+    # Row parsing
+    # ─────────────────────────────────
+
+    def _document(self, parts: list):
+        if len(parts) < 4:
+            raise ValueError("colonnes manquantes")
+        doc_type, doc_id, titre = parts[0], int(parts[1]), parts[2]
+        self._verifier_id(doc_id, self.bibliotheque.documents)
+        if doc_type == "Livre":
+            nb_exemplaires = int(parts[5]) if len(parts) > 5 and parts[5].strip() else 1
+            if nb_exemplaires < 1:
+                raise ValueError(f"nombre d'exemplaires invalide: {nb_exemplaires}")
+            doc = Livre(titre, parts[3], safe_bool(parts[4]) if len(parts) > 4 else True, nb_exemplaires)
+        elif doc_type == "BD":
+            doc = BandeDessinee(titre, parts[3], parts[4] if len(parts) > 4 else "")
+        elif doc_type == "Dictionnaire":
+            doc = Dictionnaire(titre, parts[3])
+        elif doc_type == "Journal":
+            doc = Journal(titre, self._date(parts[3]))
+        else:
+            raise ValueError(f"type inconnu: {doc_type}")
+        doc.id = doc_id
+        return doc
+
+    def _verifier_id(self, objet_id: int, existants: dict):
+        if objet_id in existants:
+            raise ValueError(f"id {objet_id} déjà utilisé")
+        if objet_id in self._ids:
+            raise ValueError(f"id {objet_id} en double dans le fichier")
+
+    def _adherent(self, parts: list):
+        if len(parts) < 3:
+            raise ValueError("colonnes manquantes")
+        adherent = Adherent(parts[1], parts[2], parts[3] if len(parts) > 3 else "")
+        adherent.id = int(parts[0])
+        self._verifier_id(adherent.id, self.bibliotheque.adherents)
+        if len(parts) > 4 and parts[4]:
+            adherent.date_inscription = self._date(parts[4])
+        return adherent
+
+    # ─────────────────────────────────
+    # Import
+    # ─────────────────────────────────
+
+    def importer_documents(self, chemin: str) -> RapportImport:
+        rapport = self._importer(chemin, self._document, self.bibliotheque._indexer_document, 1, "documents")
+        self.bibliotheque._recaler_id_documents()
+        return rapport
+
+    def importer_adherents(self, chemin: str) -> RapportImport:
+        noms = set(self.bibliotheque._noms_adherents)
+
+        def creer(parts):
+            adherent = self._adherent(parts)
+            cle = (adherent.nom, adherent.prenom)
+            if cle in noms:
+                raise ValueError("adhérent déjà existant")
+            noms.add(cle)
+            return adherent
+
+        rapport = self._importer(chemin, creer, self.bibliotheque._indexer_adherent, 0, "adherents")
+        Adherent._id_counter = max([Adherent._id_counter, *self.bibliotheque.adherents])
+        return rapport
+
+    def _importer(self, chemin: str, creer, indexer, colonne_id: int, collection: str) -> RapportImport:
+        rapport = RapportImport(chemin)
+        debut = time.perf_counter()
+        lot = []
+        self._ids = set()
+        with open(chemin, "r", newline="", encoding="utf-8") as f:
+            for numero, parts in enumerate(csv.reader(f), 1):
+                if not parts or not any(parts):
+                    continue
+                rapport.nb_lignes += 1
+                try:
+                    objet = creer([p.strip() for p in parts])
+                    self._ids.add(objet.id)
+                    lot.append(objet)
+                except Exception as e:
+                    # Une ligne d'en-tête (id non numérique en première ligne) n'est pas une erreur
+                    if numero == 1 and len(parts) > colonne_id and not parts[colonne_id].strip().isdigit():
+                        rapport.nb_lignes -= 1
+                        continue
+                    rapport.rejets.append((numero, str(e)))
+                    continue
+                if len(lot) >= self.taille_lot:
+                    self._inserer(lot, indexer, rapport)
+                    lot = []
+            self._inserer(lot, indexer, rapport)
+        self._ids = set()
+        self._persister(collection)
+        rapport.duree = time.perf_counter() - debut
+        return rapport
+
+    def _inserer(self, lot: list, indexer, rapport: RapportImport):
+        for objet in lot:
+            indexer(objet)
+        rapport.nb_importes += len(lot)
+        if self.progression:
+            self.progression(rapport.nb_lignes)
+
+    def _persister(self, collection: str):
+        # Une seule écriture pour tout l'import plutôt qu'une opération par ligne
+        bibliotheque = self.bibliotheque
+        if bibliotheque._stockage is not None:
+            bibliotheque._stockage.sauvegarder(bibliotheque)
+        elif bibliotheque._sauvegarde_auto is not None:
+            # Les lots ne passent pas par les événements: le cache de lignes CSV est reconstruit
+            bibliotheque._sauvegarde_auto.resynchroniser(collection)
+            bibliotheque._sauvegarde_auto.attendre()
+        elif bibliotheque._registre is not None:
+            bibliotheque.compacter()
+
+
+def main(argv=None):
+    # python importation_class.py documents|adherents fichier.csv [...]
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2 or argv[0] not in ("documents", "adherents"):
+        print("Usage: python importation_class.py documents|adherents fichier.csv [...]")
+        return 2
+    from bibliotheque_class import Bibliotheque
+
+    bibliotheque = Bibliotheque()
+    bibliotheque.activer_registre()
+    bibliotheque.charger()
+    importateur = Importateur(bibliotheque)
+    code = 0
+    for chemin in argv[1:]:
+        if argv[0] == "documents":
+            rapport = importateur.importer_documents(chemin)
+        else:
+            rapport = importateur.importer_adherents(chemin)
+        print(rapport)
+        for numero, raison in rapport.rejets[:50]:
+            print(f"  ligne {numero}: {raison}")
+        if rapport.rejets:
+            code = 1
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
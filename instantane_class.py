@@ -0,0 +1,340 @@
+"""
+instantane_class.py
+Instantané binaire de la bibliothèque, lu par mmap.
+    Le fichier contient des enregistrements de taille fixe triés par id
+    (documents, adhérents, emprunts) et une table de chaînes. Les objets ne
+    sont décodés qu'à la demande, et plusieurs processus en lecture seule
+    peuvent partager le même fichier projeté en mémoire.
+    CatalogueInstantane sert de dictionnaire des documents à une Bibliotheque
+    chargée depuis un instantané: chaque document est décodé au premier accès.
+    """
+
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from datetime import date
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal, partager_date
+from adherent_class import Adherent
+from emprunt_class import Emprunt
+from recherche_class import decouper, mots_document
+
+MAGIC = b"BIBSNAP2"
+MAGIC_V1 = b"BIBSNAP1"  # sans numéro d'exemplaire dans les emprunts (toujours lisible)
+# magic, nb documents, nb adhérents, nb emprunts, début des chaînes
+_ENTETE = struct.Struct("<8sQQQQ")
+# id, type, disponible, titre (offset, longueur), auteur/langue, dessinateur, date de parution (ordinal),
+# nb d'exemplaires (absent des fichiers v1: un seul)
+_DOCUMENT = struct.Struct("<qBB2xIIIIIIiI")
+_DOCUMENT_V1 = struct.Struct("<qBB2xIIIIIIi")
+# id, nom, prénom, email, date d'inscription
+_ADHERENT = struct.Struct("<qIIIIIIi")
+# id, adherent_id, livre_id, date d'emprunt, date de retour (0 si actif), exemplaire
+_EMPRUNT = struct.Struct("<qqqiiI")
+_EMPRUNT_V1 = struct.Struct("<qqqii")
+
+_TYPES = {Livre: 1, BandeDessinee: 2, Dictionnaire: 3, Journal: 4}
+
+
+class _TableChaines:
+    # Chaînes dédupliquées: un auteur répété n'est stocké qu'une fois
+
+    def __init__(self):
+        self.donnees = bytearray()
+        self._positions = {}
+
+    def ajouter(self, texte) -> tuple:
+        if not texte:
+            return 0, 0
+        position = self._positions.get(texte)
+        if position is None:
+            brut = texte.encode("utf-8")
+            position = self._positions[texte] = (len(self.donnees), len(brut))
+            self.donnees += brut
+        return position
+
+
+def ecrire_instantane(bibliotheque, chemin: str = "bibliotheque.snap"):
+    # Écrit l'état complet; le fichier est remplacé atomiquement
+    chaines = _TableChaines()
+    documents = bytearray()
+    for doc in sorted(bibliotheque.documents.values(), key=lambda d: d.id):
+        documents += _DOCUMENT.pack(
+            doc.id,
+            _TYPES[type(doc)],
+            int(getattr(doc, "est_disponible", False)),
+            *chaines.ajouter(doc.titre),
+            *chaines.ajouter(getattr(doc, "auteur", None) or getattr(doc, "langue", None)),
+            *chaines.ajouter(getattr(doc, "dessinateur", None)),
+            doc.date_parution.toordinal() if isinstance(doc, Journal) else 0,
+            getattr(doc, "nb_exemplaires", 1),
+        )
+    adherents = bytearray()
+    for adh in sorted(bibliotheque.adherents.values(), key=lambda a: a.id):
+        adherents += _ADHERENT.pack(
+            adh.id,
+            *chaines.ajouter(adh.nom),
+            *chaines.ajouter(adh.prenom),
+            *chaines.ajouter(adh.email),
+            adh.date_inscription.toordinal(),
+        )
+    emprunts = bytearray()
+    for emp in sorted(bibliotheque.lister_emprunts(), key=lambda e: e.id):
+        emprunts += _EMPRUNT.pack(
+            emp.id,
+            emp.adherent_id,
+            emp.livre_id,
+            emp.date_emprunt.toordinal(),
+            emp.date_retour.toordinal() if emp.date_retour else 0,
+            emp.exemplaire,
+        )
+    debut_chaines = _ENTETE.size + len(documents) + len(adherents) + len(emprunts)
+    temp = chemin + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(_ENTETE.pack(
+            MAGIC,
+            len(documents) // _DOCUMENT.size,
+            len(adherents) // _ADHERENT.size,
+            len(emprunts) // _EMPRUNT.size,
+            debut_chaines,
+        ))
+        f.write(documents)
+        f.write(adherents)
+        f.write(emprunts)
+        f.write(chaines.donnees)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, chemin)
+
+
+class _Section:
+    # Enregistrements de taille fixe triés par id (l'id est le premier champ)
+
+    def __init__(self, mm, debut: int, nombre: int, format: struct.Struct):
+        self._mm = mm
+        self._debut = debut
+        self._nombre = nombre
+        self._format = format
+
+    def __len__(self):
+        return self._nombre
+
+    def __getitem__(self, i: int) -> tuple:
+        return self._format.unpack_from(self._mm, self._debut + i * self._format.size)
+
+    def id_de(self, i: int) -> int:
+        return struct.unpack_from("<q", self._mm, self._debut + i * self._format.size)[0]
+
+    def indice(self, id_: int):
+        # Position de l'enregistrement id_ (None s'il n'existe pas). Ids consécutifs (cas
+        # habituel): lecture directe; sinon recherche dichotomique dans le fichier projeté
+        if not self._nombre:
+            return None
+        i = id_ - self.id_de(0)
+        if 0 <= i < self._nombre and self.id_de(i) == id_:
+            return i
+        i = bisect_left(range(self._nombre), id_, key=self.id_de)
+        if i < self._nombre and self.id_de(i) == id_:
+            return i
+        return None
+
+    def chercher(self, id_: int):
+        i = self.indice(id_)
+        return None if i is None else self[i]
+
+
+class Instantane:
+    # Vue en lecture seule d'un instantané; API de lecture semblable à Bibliotheque
+
+    def __init__(self, chemin: str = "bibliotheque.snap"):
+        self.chemin = chemin
+        self._fichier = open(chemin, "rb")
+        self._mm = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, nb_docs, nb_adh, nb_emp, self._debut_chaines = _ENTETE.unpack_from(self._mm, 0)
+        if magic not in (MAGIC, MAGIC_V1):
+            raise ValueError(f"{chemin}: pas un instantané de bibliothèque")
+        position = _ENTETE.size
+        format_document = _DOCUMENT if magic == MAGIC else _DOCUMENT_V1
+        self.documents = _Section(self._mm, position, nb_docs, format_document)
+        position += nb_docs * format_document.size
+        self.adherents = _Section(self._mm, position, nb_adh, _ADHERENT)
+        position += nb_adh * _ADHERENT.size
+        self.emprunts = _Section(self._mm, position, nb_emp, _EMPRUNT if magic == MAGIC else _EMPRUNT_V1)
+
+    def fermer(self):
+        self._mm.close()
+        self._fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def _chaine(self, position: int, longueur: int) -> str:
+        debut = self._debut_chaines + position
+        return self._mm[debut:debut + longueur].decode("utf-8")
+
+    # ─────────────────────────────────
+    # Record decoding
+    # ─────────────────────────────────
+
+    def _document(self, rec):
+        doc_id, doc_type, disponible, t_pos, t_len, a_pos, a_len, d_pos, d_len, parution, *exemplaires = rec
+        titre = self._chaine(t_pos, t_len)
+        if doc_type == 1:
+            doc = Livre(titre, self._chaine(a_pos, a_len), bool(disponible), exemplaires[0] if exemplaires else 1)
+        elif doc_type == 2:
+            doc = BandeDessinee(titre, self._chaine(a_pos, a_len), self._chaine(d_pos, d_len))
+        elif doc_type == 3:
+            doc = Dictionnaire(titre, self._chaine(a_pos, a_len))
+        else:
+            doc = Journal(titre, date.fromordinal(parution))
+        doc.id = doc_id
+        return doc
+
+    def _adherent(self, rec):
+        adh_id, n_pos, n_len, p_pos, p_len, e_pos, e_len, inscription = rec
+        adh = Adherent(self._chaine(n_pos, n_len), self._chaine(p_pos, p_len), self._chaine(e_pos, e_len))
+        adh.id = adh_id
+        adh.date_inscription = partager_date(date.fromordinal(inscription))
+        return adh
+
+    @staticmethod
+    def _emprunt(rec):
+        emp_id, adherent_id, livre_id, date_emprunt, date_retour, *exemplaire = rec
+        emp = Emprunt(adherent_id, livre_id, date.fromordinal(date_emprunt), exemplaire[0] if exemplaire else 1)
+        emp.id = emp_id
+        if date_retour:
+            emp.retourner_livre(date.fromordinal(date_retour))
+        return emp
+
+    # ─────────────────────────────────
+    # Read API
+    # ─────────────────────────────────
+
+    def trouver_document(self, doc_id: int):
+        rec = self.documents.chercher(doc_id)
+        return self._document(rec) if rec else None
+
+    def trouver_adherent(self, adherent_id: int):
+        rec = self.adherents.chercher(adherent_id)
+        return self._adherent(rec) if rec else None
+
+    def trouver_emprunt(self, emprunt_id: int):
+        rec = self.emprunts.chercher(emprunt_id)
+        return self._emprunt(rec) if rec else None
+
+    def iter_documents(self):
+        for i in range(len(self.documents)):
+            yield self._document(self.documents[i])
+
+    def iter_adherents(self):
+        for i in range(len(self.adherents)):
+            yield self._adherent(self.adherents[i])
+
+    def iter_emprunts(self):
+        for i in range(len(self.emprunts)):
+            yield self._emprunt(self.emprunts[i])
+
+    def mots_document(self, i: int) -> set:
+        # Mots indexés du document i, lus dans la table de chaînes sans construire l'objet
+        # (auteur ou langue partagent le même champ, comme dans mots_document)
+        _, _, _, t_pos, t_len, a_pos, a_len, d_pos, d_len, *_ = self.documents[i]
+        mots = set()
+        for position, longueur in ((t_pos, t_len), (a_pos, a_len), (d_pos, d_len)):
+            if longueur:
+                mots.update(decouper(self._chaine(position, longueur)))
+        return mots
+
+    def auteur_document(self, i: int):
+        # Auteur d'un livre ou d'une BD (None pour les autres types), sans décoder le document
+        _, doc_type, _, _, _, a_pos, a_len, *_ = self.documents[i]
+        return self._chaine(a_pos, a_len) if doc_type in (1, 2) else None
+
+
+class CatalogueInstantane(MutableMapping):
+    # Dictionnaire id -> Document adossé à un instantané ouvert. Un document n'est décodé
+    # qu'au premier accès, puis gardé (un seul objet par id, modifiable comme les autres);
+    # les ajouts et retraits sont tenus à part, le fichier n'est jamais modifié.
+
+    def __init__(self, instantane: Instantane):
+        self._instantane = instantane
+        self._section = instantane.documents
+        self._decodes = {}  # id -> Document déjà décodé ou ajouté
+        self._retires = set()  # ids de l'instantané retirés depuis le chargement
+        self._nouveaux = {}  # ids absents de l'instantané, dans l'ordre d'ajout
+        self._verrou = threading.Lock()  # deux threads ne décodent pas deux objets pour un id
+
+    def _indice(self, doc_id):
+        if doc_id in self._retires or not isinstance(doc_id, int):
+            return None
+        return self._section.indice(doc_id)
+
+    def __getitem__(self, doc_id):
+        doc = self._decodes.get(doc_id)
+        if doc is not None:
+            return doc
+        i = self._indice(doc_id)
+        if i is None:
+            raise KeyError(doc_id)
+        with self._verrou:
+            doc = self._decodes.get(doc_id)
+            if doc is None:
+                doc = self._decodes[doc_id] = self._instantane._document(self._section[i])
+        return doc
+
+    def __setitem__(self, doc_id, document):
+        self._decodes[doc_id] = document
+        if doc_id in self._retires:
+            self._retires.discard(doc_id)
+        elif self._indice(doc_id) is None:
+            self._nouveaux[doc_id] = None
+
+    def __delitem__(self, doc_id):
+        if doc_id in self._nouveaux:
+            del self._nouveaux[doc_id]
+        elif self._indice(doc_id) is not None:
+            self._retires.add(doc_id)
+        else:
+            raise KeyError(doc_id)
+        self._decodes.pop(doc_id, None)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._decodes or self._indice(doc_id) is not None
+
+    def __len__(self):
+        return len(self._section) - len(self._retires) + len(self._nouveaux)
+
+    def __iter__(self):
+        for i in range(len(self._section)):
+            doc_id = self._section.id_de(i)
+            if doc_id not in self._retires:
+                yield doc_id
+        yield from list(self._nouveaux)
+
+    @property
+    def nb_decodes(self) -> int:
+        return len(self._decodes)
+
+    def mots(self):
+        # (id, mots indexés) de chaque document, pour construire l'index de recherche
+        # sans décoder les documents
+        for i in range(len(self._section)):
+            doc_id = self._section.id_de(i)
+            if doc_id in self._retires:
+                continue
+            doc = self._decodes.get(doc_id)
+            yield doc_id, (mots_document(doc) if doc is not None else self._instantane.mots_document(i))
+        for doc_id in list(self._nouveaux):
+            yield doc_id, mots_document(self._decodes[doc_id])
+
+    def auteur(self, doc_id):
+        # Auteur d'un document (None: pas d'auteur ou document inconnu), sans le décoder
+        doc = self._decodes.get(doc_id)
+        if doc is not None:
+            return getattr(doc, "auteur", None)
+        i = self._indice(doc_id)
+        return None if i is None else self._instantane.auteur_document(i)
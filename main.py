@@ -3,19 +3,98 @@
 import sys
 from datetime import date
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QLineEdit, QComboBox, QListWidget, QListWidgetItem,
-    QDialog, QMessageBox, QTabWidget, QSpinBox, QScrollArea)
-from PyQt6.QtCore import Qt
+    QPushButton, QLabel, QLineEdit, QComboBox, QListView, QTableView, QHeaderView,
+    QAbstractItemView, QDialog, QMessageBox, QTabWidget, QSpinBox, QScrollArea, QProgressBar, QCompleter)
+from PyQt6.QtCore import Qt, QObject, QThread, QModelIndex, QTimer, pyqtSignal
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
 from document_classes import Livre, BandeDessinee, Dictionnaire, Journal
 from adherent_class import Adherent
-from bibliotheque_class import Bibliotheque
+from bibliotheque_class import (Bibliotheque, COLLECTIONS, DOCUMENT_AJOUTE, DOCUMENT_RETIRE,
+    DISPONIBILITE_MODIFIEE, ADHERENT_AJOUTE, ADHERENT_RETIRE, EMPRUNT_CREE, EMPRUNT_CLOTURE)
+from modeles_class import DocumentsModel, EntitiesModel, ID_ROLE
+from sauvegarde_class import SauvegardeAuto
+
+class ChargementWorker(QObject): #Loads the library files in a background thread
+
+    collection_chargee = pyqtSignal(str)  # "adherents", "documents" or "emprunts"
+    echec = pyqtSignal(str)
+    termine = pyqtSignal()
+
+    def __init__(self, bibliotheque, sauvegarde_auto=None):
+        super().__init__()
+        self.bibliotheque = bibliotheque
+        self.sauvegarde_auto = sauvegarde_auto
+
+    def run(self):
+        try:
+            self.bibliotheque.charger(progression=self.collection_chargee.emit)
+            self.bibliotheque.preparer_recherche()  # first keystroke in a picker stays instant
+            if self.sauvegarde_auto is not None:
+                self.sauvegarde_auto.demarrer()  # builds its CSV line cache off the GUI thread
+        except Exception as e:
+            self.echec.emit(str(e))
+        self.termine.emit()
+
+class EntityPicker(QLineEdit): #Type-ahead selector: only the top matches are ever built
+
+    def __init__(self, rechercher, libelle, placeholder: str, limite: int = 20):
+        super().__init__()
+        self.rechercher = rechercher  # rechercher(texte, limite) -> entities
+        self.libelle = libelle  # libelle(entity) -> text shown in the suggestions
+        self.limite = limite
+        self.selected_id = None
+        self.setPlaceholderText(placeholder)
+        self.suggestions = QStandardItemModel(self)
+        # The suggestions are already filtered by the library index: show them as they are
+        self.completer_popup = QCompleter(self.suggestions, self)
+        self.completer_popup.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer_popup.setWidget(self)
+        self.completer_popup.activated[QModelIndex].connect(self.choisir)
+        self.textEdited.connect(self.suggerer)
+
+    def suggerer(self, texte: str):
+        self.selected_id = None
+        self.suggestions.clear()
+        for entity in self.rechercher(texte, self.limite) if texte.strip() else ():
+            item = QStandardItem(self.libelle(entity))
+            item.setData(entity.id, ID_ROLE)
+            self.suggestions.appendRow(item)
+        if self.suggestions.rowCount():
+            self.completer_popup.complete()
+        else:
+            self.completer_popup.popup().hide()
+
+    def choisir(self, index):
+        self.selected_id = index.data(ID_ROLE)
+        self.setText(index.data())
+
+    def valeur(self):
+        # Chosen id, or the only suggestion left for the typed text
+        if self.selected_id is None and self.suggestions.rowCount() == 1:
+            return self.suggestions.item(0).data(ID_ROLE)
+        return self.selected_id
+
+    def effacer(self):
+        self.selected_id = None
+        self.suggestions.clear()
+        self.clear()
 
 class LibraryApp(QMainWindow): #Main application window
 
-    def __init__(self):
+    def __init__(self, bibliotheque=None):
         super().__init__()
-        self.bibliotheque = Bibliotheque("Ma Bibliothèque")
-        self.bibliotheque.charger()
+        if bibliotheque is None:
+            self.bibliotheque = Bibliotheque("Ma Bibliothèque")
+            self.bibliotheque.activer_registre()  # each change is appended to registre.jsonl
+            # Changed collections are rewritten in the background a few seconds after each burst
+            self.sauvegarde_auto = SauvegardeAuto(self.bibliotheque)
+        else:
+            # Remote library (BibliothequeDistante): the server owns the files and saves them
+            self.bibliotheque = bibliotheque
+            self.sauvegarde_auto = None
+        self.chargement_thread = None
+        # Widgets that modify or query the library: enabled once loading is complete
+        self.actions_chargement = []
 
         self.setWindowTitle("📚 Gestion de Bibliothèque")
         self.setGeometry(100, 100, 1200, 800)
@@ -32,6 +111,18 @@ class LibraryApp(QMainWindow): #Main application window
         self.tabs.addTab(self.tab_adherents, "👥 Adhérents")
         self.tabs.addTab(self.tab_emprunts, "📤 Emprunts")
 
+        # Loading progress (files are read in the background, see demarrer_chargement)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, len(COLLECTIONS))
+        self.progress_bar.setFormat("Chargement… %v/%m")
+        self.progress_bar.setMaximumWidth(200)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        for widget in self.actions_chargement:
+            widget.setEnabled(False)
+
+        # Incremental updates: only the affected rows change
+        self.bibliotheque.abonner(self.traiter_evenement)
+
     # ─────────────────────────────────
     # DOCUMENTS TAB
     # ─────────────────────────────────
@@ -57,6 +148,7 @@ class LibraryApp(QMainWindow): #Main application window
         top_button_layout.addWidget(btn_save)
         top_button_layout.addStretch()
         layout.addLayout(top_button_layout)
+        self.actions_chargement += [btn_refresh_docs, btn_delete_doc, btn_save]
 
         # Scroll area for document types
         scroll_area = QScrollArea()
@@ -75,6 +167,10 @@ class LibraryApp(QMainWindow): #Main application window
         self.livre_auteur_input = QLineEdit()
         self.livre_auteur_input.setPlaceholderText("Auteur")
         livre_layout.addWidget(self.livre_auteur_input)
+        self.livre_exemplaires_input = QSpinBox()
+        self.livre_exemplaires_input.setRange(1, 999)
+        self.livre_exemplaires_input.setPrefix("Exemplaires: ")
+        livre_layout.addWidget(self.livre_exemplaires_input)
         btn_add_livre = QPushButton("➕ Ajouter Livre")
         btn_add_livre.clicked.connect(lambda: self.ajouter_document_type("Livre"))
         livre_layout.addWidget(btn_add_livre)
@@ -135,10 +231,30 @@ class LibraryApp(QMainWindow): #Main application window
         scroll_widget.setLayout(scroll_layout)
         scroll_area.setWidget(scroll_widget)
         layout.addWidget(scroll_area)
-
-        # List of documents
+        self.actions_chargement.append(scroll_widget)
+
+        # Search box (filters the list through the catalog index)
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("🔍 Rechercher:"))
+        self.doc_search_input = QLineEdit()
+        self.doc_search_input.setPlaceholderText("Titre, auteur, dessinateur ou langue")
+        self.doc_search_input.textChanged.connect(self.actualiser_documents)
+        search_layout.addWidget(self.doc_search_input)
+        layout.addLayout(search_layout)
+        self.actions_chargement.append(self.doc_search_input)
+
+        # List of documents (model/view: only visible rows are formatted)
         layout.addWidget(QLabel("Tous les documents:"))
-        self.doc_list = QListWidget()
+        self.doc_model = DocumentsModel(self)
+        self.doc_list = QTableView()
+        self.doc_list.setModel(self.doc_model)
+        self.doc_list.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.doc_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.doc_list.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.doc_list.verticalHeader().hide()
+        self.doc_list.horizontalHeader().setStretchLastSection(True)
+        self.doc_list.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.doc_list.setSortingEnabled(True)
         layout.addWidget(self.doc_list)
         widget.setLayout(layout)
         return widget
@@ -153,9 +269,10 @@ class LibraryApp(QMainWindow): #Main application window
                     return
 
                 auteur = auteur or "Inconnu"
-                document = Livre(titre, auteur)
+                document = Livre(titre, auteur, nb_exemplaires=self.livre_exemplaires_input.value())
                 self.livre_titre_input.clear()
                 self.livre_auteur_input.clear()
+                self.livre_exemplaires_input.setValue(1)
             elif doc_type == "BD":
                 titre = self.bd_titre_input.text().strip()
                 auteur = self.bd_auteur_input.text().strip()
@@ -191,35 +308,34 @@ class LibraryApp(QMainWindow): #Main application window
                 self.journal_date_input.clear()
             self.bibliotheque.ajouter_document(document)
             QMessageBox.information(self, "Succès", f"Document ajouté: {document}")
-            self.actualiser_documents()
-            self.actualiser_combos_emprunts()
             
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
 
     def supprimer_document(self):
-        item = self.doc_list.currentItem()
-        if not item:
+        index = self.doc_list.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "Erreur", "Sélectionnez un document!")
             return
 
-        # Extract ID from display text
         try:
-            text = item.text()
-            doc_id = int(text.split("#")[1].split("]")[0])
+            doc_id = index.data(ID_ROLE)
             if self.bibliotheque.retirer_document(doc_id):
                 QMessageBox.information(self, "Succès", "Document supprimé!")
-                self.actualiser_documents()
-                self.actualiser_combos_emprunts()
             else:
                 QMessageBox.warning(self, "Erreur", "Impossible de supprimer!")
         except:
             QMessageBox.critical(self, "Erreur", "Erreur de suppression!")
 
     def actualiser_documents(self):
-        self.doc_list.clear()
-        for doc in self.bibliotheque.lister_documents():
-            self.doc_list.addItem(str(doc))
+        requete = self.doc_search_input.text().strip()
+        if requete:
+            documents = self.bibliotheque.rechercher_documents(requete)
+        else:
+            documents = self.bibliotheque.lister_documents()
+        self.doc_model.set_rows(documents)
+        header = self.doc_list.horizontalHeader()
+        self.doc_model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
 
     # ─────────────────────────────────
     # ADHERENTS TAB
@@ -252,10 +368,14 @@ class LibraryApp(QMainWindow): #Main application window
         btn_add_adh.clicked.connect(self.ajouter_adherent)
         add_layout.addWidget(btn_add_adh)
         layout.addLayout(add_layout)
+        self.actions_chargement.append(btn_add_adh)
 
         # List of members
         layout.addWidget(QLabel("Tous les adhérents:"))
-        self.adh_list = QListWidget()
+        self.adh_model = EntitiesModel(self)
+        self.adh_list = QListView()
+        self.adh_list.setModel(self.adh_model)
+        self.adh_list.setUniformItemSizes(True)
         layout.addWidget(self.adh_list)
 
         # Refresh, Delete  and save buttons
@@ -270,6 +390,7 @@ class LibraryApp(QMainWindow): #Main application window
         btn_save.clicked.connect(self.sauvegarder)
         button_layout.addWidget(btn_save)
         layout.addLayout(button_layout)
+        self.actions_chargement += [btn_refresh_adh, btn_delete_adh, btn_save]
         widget.setLayout(layout)
         return widget
 
@@ -287,34 +408,27 @@ class LibraryApp(QMainWindow): #Main application window
                 self.adh_nom_input.clear()
                 self.adh_prenom_input.clear()
                 self.adh_email_input.clear()
-                self.actualiser_adherents()
-                self.actualiser_combos_emprunts()
             else:
                 QMessageBox.warning(self, "Erreur", "Adhérent déjà existant!")
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
 
     def supprimer_adherent(self):
-        item = self.adh_list.currentItem()
-        if not item:
+        index = self.adh_list.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "Erreur", "Sélectionnez un adhérent!")
             return
         try:
-            text = item.text()
-            adh_id = int(text.split("#")[1].split("]")[0])
+            adh_id = index.data(ID_ROLE)
             if self.bibliotheque.retirer_adherent(adh_id):
                 QMessageBox.information(self, "Succès", "Adhérent supprimé!")
-                self.actualiser_adherents()
-                self.actualiser_combos_emprunts()
             else:
                 QMessageBox.warning(self, "Erreur", "Impossible de supprimer!")
         except:
             QMessageBox.critical(self, "Erreur", "Erreur de suppression!")
 
     def actualiser_adherents(self):
-        self.adh_list.clear()
-        for adh in self.bibliotheque.lister_adherents():
-            self.adh_list.addItem(str(adh))
+        self.adh_model.set_rows(self.bibliotheque.lister_adherents())
 
     # ─────────────────────────────────
     # EMPRUNTS TAB
@@ -331,20 +445,31 @@ class LibraryApp(QMainWindow): #Main application window
 
         # Create borrowing section
         borrow_layout = QHBoxLayout()
+        # Type-ahead pickers: suggestions come from the library indexes, never from full lists
         borrow_layout.addWidget(QLabel("Adhérent:"))
-        self.emp_adh_combo = QComboBox()
-        borrow_layout.addWidget(self.emp_adh_combo)
+        self.emp_adh_picker = EntityPicker(
+            self.bibliotheque.suggerer_adherents,
+            lambda adh: f"{adh.get_nom_complet()} <{adh.email}>" if adh.email else adh.get_nom_complet(),
+            "Nom, prénom ou email")
+        borrow_layout.addWidget(self.emp_adh_picker)
         borrow_layout.addWidget(QLabel("Livre:"))
-        self.emp_livre_combo = QComboBox()
-        borrow_layout.addWidget(self.emp_livre_combo)
+        self.emp_livre_picker = EntityPicker(
+            self.bibliotheque.suggerer_livres_disponibles,
+            lambda livre: f"{livre.titre} ({livre.auteur})",
+            "Titre ou auteur (livres disponibles)")
+        borrow_layout.addWidget(self.emp_livre_picker)
         btn_create_emp = QPushButton("📤 Créer Emprunt")
         btn_create_emp.clicked.connect(self.creer_emprunt)
         borrow_layout.addWidget(btn_create_emp)
         layout.addLayout(borrow_layout)
+        self.actions_chargement += [self.emp_adh_picker, self.emp_livre_picker, btn_create_emp]
 
         # List of borrowings
         layout.addWidget(QLabel("Emprunts actifs:"))
-        self.emp_list = QListWidget()
+        self.emp_model = EntitiesModel(self)
+        self.emp_list = QListView()
+        self.emp_list.setModel(self.emp_model)
+        self.emp_list.setUniformItemSizes(True)
         layout.addWidget(self.emp_list)
 
         # Refresh, Hand Back and save buttons
@@ -359,86 +484,145 @@ class LibraryApp(QMainWindow): #Main application window
         btn_save.clicked.connect(self.sauvegarder)
         button_layout.addWidget(btn_save)
         layout.addLayout(button_layout)
+        self.actions_chargement += [btn_refresh_emp, btn_return_book, btn_save]
         widget.setLayout(layout)
         return widget
 
-    def actualiser_combos_emprunts(self):
-        # Store selected values
-        current_adh = self.emp_adh_combo.currentData() if self.emp_adh_combo.count() > 0 else None
-        current_livre = self.emp_livre_combo.currentData() if self.emp_livre_combo.count() > 0 else None
-
-        # Clear and populate adherent combo
-        self.emp_adh_combo.clear()
-        for adh in self.bibliotheque.lister_adherents():
-            self.emp_adh_combo.addItem(adh.get_nom_complet(), adh.id)
-
-        # Clear and populate livre combo (only available books)
-        self.emp_livre_combo.clear()
-        for livre in self.bibliotheque.lister_livres_disponibles():
-            self.emp_livre_combo.addItem(f"{livre.titre} ({livre.auteur})", livre.id)
-
     def creer_emprunt(self):
         try:
-            if self.emp_adh_combo.count() == 0 or self.emp_livre_combo.count() == 0:
-                QMessageBox.warning(self, "Erreur", "Veuillez ajouter des adhérents et des livres!")
+            adh_id = self.emp_adh_picker.valeur()
+            livre_id = self.emp_livre_picker.valeur()
+            if adh_id is None or livre_id is None:
+                QMessageBox.warning(self, "Erreur", "Choisissez un adhérent et un livre dans les suggestions!")
                 return
-            adh_id = self.emp_adh_combo.currentData()
-            livre_id = self.emp_livre_combo.currentData()
             success, message = self.bibliotheque.creer_emprunt(adh_id, livre_id)
             if success:
+                self.emp_livre_picker.effacer()  # the book is no longer available
                 QMessageBox.information(self, "Succès", message)
-                self.actualiser_emprunts()
-                self.actualiser_combos_emprunts()
             else:
                 QMessageBox.warning(self, "Erreur", message)
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
 
     def retourner_livre(self):
-        item = self.emp_list.currentItem()
-        if not item:
+        index = self.emp_list.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, "Erreur", "Sélectionnez un emprunt!")
             return
         try:
-            text = item.text()
-            emp_id = int(text.split("#")[1].split("]")[0])
+            emp_id = index.data(ID_ROLE)
             success, message = self.bibliotheque.retourner_livre(emp_id)
             if success:
                 QMessageBox.information(self, "Succès", message)
-                self.actualiser_emprunts()
-                self.actualiser_combos_emprunts()
             else:
                 QMessageBox.warning(self, "Erreur", message)
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
 
     def actualiser_emprunts(self):
-        self.emp_list.clear()
-        for emp in self.bibliotheque.lister_emprunts("actifs"):
-            self.emp_list.addItem(str(emp))
+        self.emp_model.set_rows(self.bibliotheque.lister_emprunts("actifs"))
+
+    # ─────────────────────────────────
+    # Background loading
+    # ─────────────────────────────────
+
+    def demarrer_chargement(self):
+        # The window is already visible: files are read by a worker thread and
+        # each list is filled as soon as its collection has arrived
+        self.chargement_thread = QThread(self)
+        self.chargement_worker = ChargementWorker(self.bibliotheque, self.sauvegarde_auto)
+        self.chargement_worker.moveToThread(self.chargement_thread)
+        self.chargement_thread.started.connect(self.chargement_worker.run)
+        self.chargement_worker.collection_chargee.connect(self.collection_chargee)
+        self.chargement_worker.echec.connect(self.chargement_echoue)
+        self.chargement_worker.termine.connect(self.chargement_termine)
+        self.chargement_worker.termine.connect(self.chargement_thread.quit)
+        self.chargement_thread.finished.connect(self.chargement_worker.deleteLater)
+        self.statusBar().showMessage("Chargement des données…")
+        self.chargement_thread.start()
+
+    def collection_chargee(self, collection: str):
+        # Runs in the GUI thread (queued signal); the lists are read-only until the end
+        self.progress_bar.setValue(COLLECTIONS.index(collection) + 1)
+        if collection == "adherents":
+            self.actualiser_adherents()
+        elif collection == "documents":
+            self.actualiser_documents()
+
+    def chargement_echoue(self, message: str):
+        QMessageBox.critical(self, "Erreur", f"Erreur de chargement: {message}")
+
+    def chargement_termine(self):
+        # The journal replay may have touched every collection: refresh everything once
+        self.actualiser_documents()
+        self.actualiser_adherents()
+        self.actualiser_emprunts()
+        for widget in self.actions_chargement:
+            widget.setEnabled(True)
+        self.progress_bar.hide()
+        self.statusBar().showMessage(
+            f"{len(self.bibliotheque.documents)} documents, "
+            f"{len(self.bibliotheque.adherents)} adhérents chargés", 5000)
+
+    def closeEvent(self, event):
+        # Never destroy the window while the worker is still filling the library
+        if self.chargement_thread is not None:
+            self.chargement_thread.quit()
+            self.chargement_thread.wait()
+        if self.sauvegarde_auto is not None:
+            self.sauvegarde_auto.arreter()  # writes the last changes
+        super().closeEvent(event)
 
     # ─────────────────────────────────
     # General methods
     # ─────────────────────────────────
 
+    def traiter_evenement(self, evenement: str, objet):
+        # Called by Bibliotheque after each change
+        if evenement == DOCUMENT_AJOUTE:
+            if self.doc_search_input.text().strip():
+                self.actualiser_documents()  # the new document may not match the search
+            else:
+                self.doc_model.insert_row(objet)
+        elif evenement == DOCUMENT_RETIRE:
+            self.doc_model.remove_row(objet)
+        elif evenement == DISPONIBILITE_MODIFIEE:
+            self.doc_model.update_row(objet)
+        elif evenement == ADHERENT_AJOUTE:
+            self.adh_model.insert_row(objet)
+        elif evenement == ADHERENT_RETIRE:
+            self.adh_model.remove_row(objet)
+        elif evenement in (EMPRUNT_CREE, EMPRUNT_CLOTURE):
+            if evenement == EMPRUNT_CREE:
+                self.emp_model.insert_row(objet)
+            else:
+                self.emp_model.remove_row(objet)
+            adherent = self.bibliotheque.trouver_adherent(objet.adherent_id)
+            if adherent:
+                self.adh_model.update_row(adherent)  # "(n emprunt(s))" changed
+
     def sauvegarder(self):
         try:
-            self.bibliotheque.sauvegarder()
-            QMessageBox.information(self, "Succès", "Données sauvegardées!")
+            self.bibliotheque.sauvegarder()  # returns at once: the autosave thread writes the files
+            QMessageBox.information(self, "Succès", "Sauvegarde lancée!")
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur de sauvegarde: {e}")
 
 
 def main():
     app = QApplication(sys.argv)
-    window = LibraryApp()
+    # --serveur URL: several circulation desks share the library served by serveur_class.py
+    bibliotheque = None
+    arguments = app.arguments()
+    if "--serveur" in arguments[:-1]:
+        from client_class import BibliothequeDistante
+        bibliotheque = BibliothequeDistante(arguments[arguments.index("--serveur") + 1])
+    window = LibraryApp(bibliotheque)
     window.show()
 
-    # Refresh all displays at startup
-    window.actualiser_documents()
-    window.actualiser_adherents()
-    window.actualiser_emprunts()
-    window.actualiser_combos_emprunts()
+    # Load the data after the first paint (queued until the event loop runs);
+    # the lists fill in as collections arrive
+    QTimer.singleShot(0, window.demarrer_chargement)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+"""
+mesures_class.py
+Mesures des opérations de la bibliothèque: nombre d'appels, histogrammes de
+    latence, lignes et octets des phases de chargement / sauvegarde, erreurs.
+    Désactivées, elles ne coûtent rien: les méthodes ne sont enveloppées (sur
+    l'instance) qu'après Bibliotheque.activer_mesures(). Export JSON ou texte
+    Prometheus (fichier lu par un collecteur local), profilage cProfile à la demande.
+    """
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from chargement_class import FICHIERS
+
+# Bornes supérieures des tranches de l'histogramme (secondes)
+BORNES = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+          1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Méthodes publiques mesurées
+OPERATIONS = (
+    "trouver_document", "trouver_adherent", "trouver_emprunt", "trouver_emprunt_actif_livre",
+    "rechercher_documents", "suggerer_livres_disponibles", "suggerer_adherents",
+    "ajouter_document", "retirer_document", "ajouter_exemplaires", "ajouter_adherent", "retirer_adherent",
+    "creer_emprunt", "retourner_livre", "creer_emprunts", "retourner_livres",
+    "lister_emprunts", "lister_emprunts_adherent", "lister_emprunts_en_retard",
+    "charger", "sauvegarder", "compacter",
+)
+
+# Phases de chargement / sauvegarde: méthode -> (nom de la mesure, collection, fichier).
+# Le chargement parallèle n'appelle pas ces méthodes: ChargeurParallele enregistre les mêmes mesures.
+PHASES = {
+    f"_{action}_{collection}": (f"{action}_{collection}", collection, fichier)
+    for action in ("charger", "sauvegarder") for collection, fichier in FICHIERS
+}
+
+
+class StatistiquesOperation:
+    # Compteurs d'une opération; les tranches ne sont pas cumulées (voir texte_prometheus)
+
+    __slots__ = ("nombre", "somme", "maximum", "tranches", "erreurs", "lignes", "octets")
+
+    def __init__(self):
+        self.nombre = 0
+        self.somme = 0.0
+        self.maximum = 0.0
+        self.tranches = [0] * (len(BORNES) + 1)  # la dernière: au-delà de la plus grande borne
+        self.erreurs = 0
+        self.lignes = 0
+        self.octets = 0
+
+    def quantile(self, q: float) -> float:
+        # Borne supérieure de la tranche qui contient le quantile q (estimation par excès)
+        if not self.nombre:
+            return 0.0
+        rang = q * self.nombre
+        cumul = 0
+        for i, nombre in enumerate(self.tranches):
+            cumul += nombre
+            if cumul >= rang:
+                return BORNES[i] if i < len(BORNES) else self.maximum
+        return self.maximum
+
+    def en_dict(self) -> dict:
+        return {
+            "nombre": self.nombre, "somme_s": self.somme, "moyenne_s": self.somme / self.nombre if self.nombre else 0.0,
+            "max_s": self.maximum, "p50_s": self.quantile(0.5), "p95_s": self.quantile(0.95),
+            "p99_s": self.quantile(0.99), "erreurs": self.erreurs, "lignes": self.lignes, "octets": self.octets,
+            "tranches": dict(zip([str(b) for b in BORNES] + ["+Inf"], self.tranches)),
+        }
+
+
+class Mesures:
+
+    def __init__(self, nb_erreurs_gardees: int = 100):
+        self.operations = {}  # nom -> StatistiquesOperation
+        self.erreurs = {}  # contexte -> erreurs non bloquantes (voir signaler)
+        self.dernieres_erreurs = deque(maxlen=nb_erreurs_gardees)  # (horodatage, contexte, message)
+        self.traceur = None  # traceur(operation, duree_s) après chaque appel mesuré (ex.: journal des lenteurs)
+        self._profils = {}  # opération -> cProfile.Profile (voir profiler)
+        self._verrou = threading.Lock()
+        self._originales = {}  # méthodes enveloppées sur l'instance (pour desinstrumenter)
+        self.debut = time.time()
+
+    # ─────────────────────────────────
+    # Recording
+    # ─────────────────────────────────
+
+    def _stats(self, nom: str) -> StatistiquesOperation:
+        stats = self.operations.get(nom)
+        if stats is None:
+            stats = self.operations.setdefault(nom, StatistiquesOperation())
+        return stats
+
+    def enregistrer(self, nom: str, duree: float, lignes: int = 0, octets: int = 0, erreur: bool = False):
+        with self._verrou:
+            stats = self._stats(nom)
+            stats.nombre += 1
+            stats.somme += duree
+            if duree > stats.maximum:
+                stats.maximum = duree
+            stats.tranches[bisect_left(BORNES, duree)] += 1
+            stats.lignes += lignes
+            stats.octets += octets
+            stats.erreurs += erreur
+        if self.traceur is not None:
+            self.traceur(nom, duree)
+
+    def signaler(self, contexte: str, erreur):
+        # Erreur non bloquante (fichier illisible, écriture échouée...)
+        with self._verrou:
+            self.erreurs[contexte] = self.erreurs.get(contexte, 0) + 1
+            self.dernieres_erreurs.append((time.time(), contexte, str(erreur)))
+
+    # ─────────────────────────────────
+    # Instrumentation (wrappers on the instance only)
+    # ─────────────────────────────────
+
+    def instrumenter(self, bibliotheque):
+        for nom in OPERATIONS:
+            self._envelopper(bibliotheque, nom, self._chronometre(nom, getattr(bibliotheque, nom)))
+        for methode, (nom, collection, fichier) in PHASES.items():
+            self._envelopper(bibliotheque, methode, self._phase(bibliotheque, nom, collection, fichier,
+                                                                getattr(bibliotheque, methode)))
+        # Appelé par charger() seulement si un registre est actif (même activé après les mesures)
+        self._envelopper(bibliotheque, "_rejouer_registre", self._rejeu(bibliotheque, bibliotheque._rejouer_registre))
+
+    def desinstrumenter(self, bibliotheque):
+        for methode in self._originales.pop(id(bibliotheque), ()):
+            vars(bibliotheque).pop(methode, None)  # la méthode de la classe redevient visible
+
+    def _envelopper(self, bibliotheque, methode: str, enveloppe):
+        setattr(bibliotheque, methode, enveloppe)
+        self._originales.setdefault(id(bibliotheque), []).append(methode)
+
+    def _chronometre(self, nom: str, methode):
+        enregistrer = self.enregistrer
+        profils = self._profils
+        horloge = time.perf_counter
+
+        def mesuree(*args, **kwargs):
+            profil = profils.get(nom)
+            debut = horloge()
+            try:
+                if profil is not None:
+                    resultat = profil.runcall(methode, *args, **kwargs)
+                else:
+                    resultat = methode(*args, **kwargs)
+            except Exception:
+                enregistrer(nom, horloge() - debut, erreur=True)
+                raise
+            enregistrer(nom, horloge() - debut)
+            return resultat
+
+        return mesuree
+
+    def _phase(self, bibliotheque, nom: str, collection: str, fichier: str, methode):
+        # Lignes: entités ajoutées (chargement) ou écrites (sauvegarde); octets: taille du fichier
+        def phase(*args, **kwargs):
+            avant = len(getattr(bibliotheque, collection))
+            debut = time.perf_counter()
+            resultat = methode(*args, **kwargs)
+            duree = time.perf_counter() - debut
+            apres = len(getattr(bibliotheque, collection))
+            lignes = apres - avant if nom.startswith("charger") else apres
+            octets = os.path.getsize(fichier) if os.path.exists(fichier) else 0
+            self.enregistrer(nom, duree, lignes, octets)
+            return resultat
+
+        return phase
+
+    def _rejeu(self, bibliotheque, methode):
+        def rejeu(*args, **kwargs):
+            registre = bibliotheque._registre
+            octets = sum(os.path.getsize(chemin) for chemin in _fichiers_registre(registre))
+            debut = time.perf_counter()
+            resultat = methode(*args, **kwargs)
+            self.enregistrer("rejouer_registre", time.perf_counter() - debut, registre.nb_operations, octets)
+            return resultat
+
+        return rejeu
+
+    # ─────────────────────────────────
+    # Profiling
+    # ─────────────────────────────────
+
+    def profiler(self, operation: str, actif: bool = True):
+        # Profile (cProfile) chaque appel de operation jusqu'à profiler(operation, False)
+        if actif:
+            self._profils.setdefault(operation, cProfile.Profile())
+        else:
+            self._profils.pop(operation, None)
+
+    def profil(self, operation: str, tri: str = "cumulative", lignes: int = 25) -> str:
+        # Rapport pstats des appels profilés de operation
+        profil = self._profils.get(operation)
+        if profil is None:
+            return ""
+        sortie = io.StringIO()
+        pstats.Stats(profil, stream=sortie).sort_stats(tri).print_stats(lignes)
+        return sortie.getvalue()
+
+    def exporter_profil(self, operation: str, chemin: str):
+        # Fichier pstats (lisible par python -m pstats, snakeviz...)
+        profil = self._profils.get(operation)
+        if profil is not None:
+            profil.dump_stats(chemin)
+
+    # ─────────────────────────────────
+    # Export
+    # ─────────────────────────────────
+
+    def en_dict(self) -> dict:
+        with self._verrou:
+            return {
+                "debut": self.debut, "horodatage": time.time(),
+                "operations": {nom: stats.en_dict() for nom, stats in sorted(self.operations.items())},
+                "erreurs": dict(sorted(self.erreurs.items())),
+                "dernieres_erreurs": [
+                    {"horodatage": t, "contexte": contexte, "message": message}
+                    for t, contexte, message in self.dernieres_erreurs
+                ],
+            }
+
+    def exporter_json(self, chemin: str):
+        _ecrire(chemin, json.dumps(self.en_dict(), indent=2, ensure_ascii=False))
+
+    def texte_prometheus(self) -> str:
+        # Format d'exposition texte de Prometheus (histogrammes cumulés, +Inf compris)
+        lignes = [
+            "# HELP bibliotheque_operation_duree_secondes Durée des opérations de la bibliothèque.",
+            "# TYPE bibliotheque_operation_duree_secondes histogram",
+        ]
+        with self._verrou:
+            operations = sorted(self.operations.items())
+            for nom, stats in operations:
+                cumul = 0
+                for borne, nombre in zip([repr(b) for b in BORNES] + ["+Inf"], stats.tranches):
+                    cumul += nombre
+                    lignes.append(f'bibliotheque_operation_duree_secondes_bucket{{operation="{nom}",le="{borne}"}} {cumul}')
+                lignes.append(f'bibliotheque_operation_duree_secondes_sum{{operation="{nom}"}} {stats.somme!r}')
+                lignes.append(f'bibliotheque_operation_duree_secondes_count{{operation="{nom}"}} {stats.nombre}')
+            for metrique, attribut, aide in (
+                ("bibliotheque_operation_erreurs_total", "erreurs", "Appels terminés par une exception."),
+                ("bibliotheque_lignes_total", "lignes", "Lignes (entités) lues ou écrites par phase."),
+                ("bibliotheque_octets_total", "octets", "Octets des fichiers lus ou écrits par phase."),
+            ):
+                lignes.append(f"# HELP {metrique} {aide}")
+                lignes.append(f"# TYPE {metrique} counter")
+                for nom, stats in operations:
+                    lignes.append(f'{metrique}{{operation="{nom}"}} {getattr(stats, attribut)}')
+            lignes.append("# HELP bibliotheque_erreurs_total Erreurs non bloquantes (chargement, sauvegarde, registre).")
+            lignes.append("# TYPE bibliotheque_erreurs_total counter")
+            for contexte, nombre in sorted(self.erreurs.items()):
+                contexte = contexte.replace("\\", "\\\\").replace('"', '\\"')
+                lignes.append(f'bibliotheque_erreurs_total{{contexte="{contexte}"}} {nombre}')
+        return "\n".join(lignes)
+
+    def exporter_prometheus(self, chemin: str = "bibliotheque.prom"):
+        _ecrire(chemin, self.texte_prometheus())
+
+
+def _ecrire(chemin: str, texte: str):
+    # Fichier temporaire puis renommage: le collecteur ne lit jamais un fichier à moitié écrit
+    temp = chemin + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(texte + "\n")
+    os.replace(temp, chemin)
+
+
+def _fichiers_registre(registre) -> list:
+    chemins = [f"{registre.chemin}.{n}" for n in registre._generations()] + [registre.chemin]
+    return [chemin for chemin in chemins if os.path.exists(chemin)]
@@ -0,0 +1,173 @@
+# Qt models backing the lists of the GUI (only visible rows are formatted)
+
+from operator import attrgetter
+from PyQt6.QtCore import Qt, QAbstractListModel, QAbstractTableModel, QModelIndex
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal
+
+ID_ROLE = Qt.ItemDataRole.UserRole  # entity id stored as item data
+
+
+class _RowsMixin:
+    """Incremental row updates shared by the models (self._rows holds the entities,
+    self._positions maps entity id -> row)"""
+
+    _NB_COLONNES = 1
+
+    def _init_rows(self):
+        self._rows = []
+        self._positions = {}
+        self._a_jour = 0  # self._positions is exact for rows below this one
+
+    def set_rows(self, objets):
+        self.beginResetModel()
+        self._rows = list(objets)
+        self._positions = {}
+        self._a_jour = 0
+        self.endResetModel()
+
+    def _position_insertion(self, objet) -> int:
+        return len(self._rows)
+
+    def insert_row(self, objet):
+        row = self._position_insertion(objet)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, objet)
+        self._a_jour = min(self._a_jour, row)
+        self.endInsertRows()
+
+    def _renumber(self):
+        # Rows from _a_jour on moved (insert/remove above them, sort) or are new: one pass in C
+        debut = self._a_jour
+        self._positions.update(zip(map(attrgetter("id"), self._rows[debut:]), range(debut, len(self._rows))))
+        self._a_jour = len(self._rows)
+
+    def _row_of(self, objet) -> int:
+        # O(1) for the frequent case (status update after a loan or return, rows appended);
+        # after a removal or a sorted insert, the rows below it are renumbered once
+        row = self._positions.get(objet.id)
+        if row is None or row >= self._a_jour:
+            self._renumber()
+            row = self._positions.get(objet.id)
+        if row is None or self._rows[row] is not objet:
+            return -1
+        return row
+
+    def remove_row(self, objet):
+        row = self._row_of(objet)
+        if row >= 0:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rows[row]
+            del self._positions[objet.id]
+            self._a_jour = min(self._a_jour, row)
+            self.endRemoveRows()
+
+    def update_row(self, objet):
+        row = self._row_of(objet)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self._NB_COLONNES - 1))
+
+
+def _type_document(doc) -> str:
+    return "BD" if isinstance(doc, BandeDessinee) else type(doc).__name__
+
+
+def _auteur_document(doc) -> str:
+    if isinstance(doc, (Livre, BandeDessinee)):
+        return doc.auteur
+    if isinstance(doc, Dictionnaire):
+        return doc.langue
+    if isinstance(doc, Journal):
+        return doc.date_parution.strftime("%d/%m/%Y")
+    return ""
+
+
+def _statut_document(doc) -> str:
+    if isinstance(doc, Livre):
+        return doc.statut()
+    return ""
+
+
+class DocumentsModel(_RowsMixin, QAbstractTableModel):
+    """Documents table: Type, Titre, Auteur, Statut"""
+
+    COLUMNS = ("Type", "Titre", "Auteur", "Statut")
+    _NB_COLONNES = len(COLUMNS)
+    _VALEURS = (_type_document, lambda d: d.titre, _auteur_document, _statut_document)
+    _CLES_TRI = (_type_document, lambda d: d.titre.casefold(), lambda d: _auteur_document(d).casefold(), _statut_document)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._init_rows()
+        self._tri = None  # (column, descending) of the last sort
+
+    def _position_insertion(self, doc) -> int:
+        # Keep a sorted table sorted: binary search on the sort key
+        if self._tri is None:
+            return len(self._rows)
+        column, descending = self._tri
+        cle_tri = self._CLES_TRI[column]
+        cle = cle_tri(doc)
+        bas, haut = 0, len(self._rows)
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            autre = cle_tri(self._rows[milieu])
+            if (cle < autre) if not descending else (cle > autre):
+                haut = milieu
+            else:
+                bas = milieu + 1
+        return bas
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        doc = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._VALEURS[index.column()](doc)
+        if role == ID_ROLE:
+            return doc.id
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return str(doc)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column < 0:  # no sort indicator: keep the library order
+            self._tri = None
+            return
+        descending = order == Qt.SortOrder.DescendingOrder
+        self.layoutAboutToBeChanged.emit()
+        self._rows.sort(key=self._CLES_TRI[column], reverse=descending)
+        self._a_jour = 0
+        self._tri = (column, descending)
+        self.layoutChanged.emit()
+
+
+class EntitiesModel(_RowsMixin, QAbstractListModel):
+    """Single-column list of entities displayed with str() (adherents, emprunts)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._init_rows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        objet = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(objet)
+        if role == ID_ROLE:
+            return objet.id
+        return None
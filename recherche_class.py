@@ -0,0 +1,165 @@
+"""
+recherche_class.py
+Index inversé pour la recherche plein texte dans le catalogue et les adhérents.
+    Les mots sont normalisés (minuscules, sans accents) et chaque terme
+    de la requête est traité comme un préfixe.
+    """
+
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+CHAMPS_INDEXES = ("titre", "auteur", "dessinateur", "langue")
+_MOT = re.compile(r"\w+")
+
+
+def normaliser(texte: str) -> str:
+    # "Élise" -> "elise"
+    texte = str(texte)
+    if texte.isascii():
+        return texte.lower()
+    return _normaliser_unicode(texte)
+
+
+@lru_cache(maxsize=65536)
+def _normaliser_unicode(texte: str) -> str:
+    # Les auteurs et les langues se répètent beaucoup: le cache évite de recalculer
+    decompose = unicodedata.normalize("NFKD", texte)
+    sans_accents = "".join(c for c in decompose if not unicodedata.combining(c))
+    return sans_accents.casefold()
+
+
+def decouper(texte: str) -> list:
+    return _MOT.findall(normaliser(texte))
+
+
+def mots_document(document) -> set:
+    # Mots indexés d'un document (peut être calculé dans un autre processus)
+    mots = set()
+    for champ in CHAMPS_INDEXES:
+        valeur = getattr(document, champ, None)
+        if valeur:
+            mots.update(decouper(valeur))
+    return mots
+
+
+def mots_adherent(adherent) -> set:
+    # Nom complet et email ("jean.dupont@exemple.fr" -> jean, dupont, exemple, fr)
+    mots = set(decouper(adherent.get_nom_complet()))
+    if adherent.email:
+        mots.update(decouper(adherent.email))
+    return mots
+
+
+class IndexRecherche:
+    # Associe chaque mot normalisé aux ids des objets qui le contiennent.
+    # mots_de(objet) donne les mots indexés (par défaut ceux d'un document).
+
+    def __init__(self, mots_de=mots_document):
+        self._mots_de = mots_de
+        self._postings = {}  # mot -> set(doc_id)
+        self._vocabulaire = []  # mots triés, pour la recherche par préfixe
+        self._nouveaux = set()  # mots pas encore insérés dans _vocabulaire (tri différé)
+        self._mots_par_document = {}  # doc_id -> set(mots), pour la suppression
+
+    def __len__(self):
+        return len(self._mots_par_document)
+
+    def ajouter(self, document, mots: set = None):
+        self.ajouter_mots(document.id, self._mots_de(document) if mots is None else mots)
+
+    def ajouter_mots(self, doc_id: int, mots: set):
+        # Mots déjà calculés (ex.: lus dans un instantané sans construire le document)
+        if doc_id in self._mots_par_document:
+            self.retirer(doc_id)
+        for mot in mots:
+            ids = self._postings.get(mot)
+            if ids is None:
+                self._postings[mot] = ids = set()
+                self._nouveaux.add(mot)
+            ids.add(doc_id)
+        self._mots_par_document[doc_id] = mots
+
+    def retirer(self, doc_id: int):
+        for mot in self._mots_par_document.pop(doc_id, ()):
+            ids = self._postings[mot]
+            ids.discard(doc_id)
+            if not ids:
+                del self._postings[mot]
+                if mot in self._nouveaux:
+                    self._nouveaux.discard(mot)
+                else:
+                    del self._vocabulaire[bisect_left(self._vocabulaire, mot)]
+
+    def _trier_vocabulaire(self):
+        # Insérer les nouveaux mots: un par un s'ils sont peu nombreux, sinon un seul tri (import en masse)
+        if len(self._nouveaux) < 1000:
+            for mot in self._nouveaux:
+                insort(self._vocabulaire, mot)
+        else:
+            self._vocabulaire = sorted(self._vocabulaire + list(self._nouveaux))
+        self._nouveaux.clear()
+
+    def preparer(self):
+        # Trier maintenant les mots ajoutés (ex.: en fin de chargement, hors du thread de l'interface)
+        if self._nouveaux:
+            self._trier_vocabulaire()
+
+    def _ids_prefixe(self, prefixe: str) -> set:
+        # Union des documents de tous les mots commençant par prefixe
+        if self._nouveaux:
+            self._trier_vocabulaire()
+        debut = bisect_left(self._vocabulaire, prefixe)
+        fin = bisect_left(self._vocabulaire, prefixe + "\U0010ffff")
+        if fin - debut == 1:
+            return self._postings[self._vocabulaire[debut]]
+        ids = set()
+        for mot in self._vocabulaire[debut:fin]:
+            ids |= self._postings[mot]
+        return ids
+
+    def rechercher(self, requete: str, limite: int = None) -> list:
+        # Tous les termes doivent correspondre (ET); retourne les ids triés
+        termes = decouper(requete)
+        if not termes:
+            return []
+        # Commencer par les termes les plus longs, généralement les plus sélectifs
+        termes.sort(key=len, reverse=True)
+        resultat = None
+        for terme in termes:
+            ids = self._ids_prefixe(terme)
+            resultat = set(ids) if resultat is None else resultat & ids
+            if not resultat:
+                return []
+        ids = sorted(resultat)
+        return ids[:limite] if limite is not None else ids
+
+    def suggerer(self, requete: str, limite: int = 20, filtre=None) -> list:
+        # Recherche à la frappe: au plus limite ids, dans l'ordre alphabétique du mot trouvé.
+        # Le vocabulaire est parcouru à partir du préfixe et le parcours s'arrête dès que
+        # limite résultats sont trouvés: un préfixe d'une lettre ne construit pas d'ensemble.
+        # filtre(id) -> bool écarte des résultats (ex.: livres déjà empruntés).
+        termes = decouper(requete)
+        if not termes or limite <= 0:
+            return []
+        if self._nouveaux:
+            self._trier_vocabulaire()
+        termes.sort(key=len, reverse=True)
+        principal, autres = termes[0], termes[1:]
+        resultat, vus = [], set()
+        for i in range(bisect_left(self._vocabulaire, principal), len(self._vocabulaire)):
+            mot = self._vocabulaire[i]
+            if not mot.startswith(principal):
+                break
+            for objet_id in self._postings[mot]:
+                if objet_id in vus:
+                    continue
+                vus.add(objet_id)
+                # Les autres termes sont vérifiés sur les mots de l'objet, sans union de postings
+                mots = self._mots_par_document[objet_id]
+                if all(any(m.startswith(t) for m in mots) for t in autres) and (filtre is None or filtre(objet_id)):
+                    resultat.append(objet_id)
+                    if len(resultat) >= limite:
+                        return resultat
+        return resultat
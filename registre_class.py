@@ -0,0 +1,124 @@
+"""
+registre_class.py
+Registre (journal d'écriture anticipée) des opérations de la bibliothèque.
+    Chaque modification ajoute une ligne JSON au fichier au lieu de réécrire
+    tous les CSV; le registre est rejoué au chargement puis vidé à la compaction.
+    La sauvegarde automatique fait pivoter le fichier (registre.jsonl.1, .2, ...)
+    pour compacter en arrière-plan sans bloquer les écritures.
+    """
+
+import glob
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Registre:
+    # Fichier d'opérations en ajout seul, une opération JSON par ligne
+
+    def __init__(self, chemin: str = "registre.jsonl"):
+        self.chemin = chemin
+        self.nb_operations = 0  # opérations écrites depuis la dernière compaction
+        self._fichier = None
+        self._verrou = threading.Lock()  # ecrire() et pivoter() peuvent venir de deux threads
+        generations = self._generations()
+        self._generation = generations[-1] if generations else 0
+
+    def _generations(self) -> list:
+        # Numéros des fichiers pivotés présents sur disque, dans l'ordre
+        numeros = []
+        for chemin in glob.glob(glob.escape(self.chemin) + ".*"):
+            suffixe = chemin[len(self.chemin) + 1:]
+            if suffixe.isdigit():
+                numeros.append(int(suffixe))
+        return sorted(numeros)
+
+    def _ouvrir(self):
+        if self._fichier is None:
+            self._fichier = open(self.chemin, "a", encoding="utf-8")
+        return self._fichier
+
+    def ecrire(self, op: str, **donnees):
+        # Ajouter une opération; flush immédiat pour ne perdre au plus que la dernière en cas de crash
+        donnees["op"] = op
+        ligne = json.dumps(donnees, ensure_ascii=False) + "\n"
+        with self._verrou:
+            f = self._ouvrir()
+            f.write(ligne)
+            f.flush()
+            self.nb_operations += 1
+
+    def ecrire_lot(self, op: str, operations: list):
+        # Plusieurs opérations du même type en une seule écriture (un seul flush)
+        lignes = []
+        for donnees in operations:
+            donnees["op"] = op
+            lignes.append(json.dumps(donnees, ensure_ascii=False) + "\n")
+        with self._verrou:
+            f = self._ouvrir()
+            f.write("".join(lignes))
+            f.flush()
+            self.nb_operations += len(lignes)
+
+    def synchroniser(self):
+        # Forcer l'écriture sur disque (fsync)
+        with self._verrou:
+            if self._fichier is not None:
+                self._fichier.flush()
+                os.fsync(self._fichier.fileno())
+
+    def pivoter(self) -> int:
+        # Renommer le fichier courant en registre.jsonl.N et repartir d'un fichier vide.
+        # Retourne N (0 si le registre était vide); les opérations suivantes vont dans le nouveau fichier.
+        with self._verrou:
+            self._fermer()
+            self.nb_operations = 0
+            if not os.path.exists(self.chemin) or os.path.getsize(self.chemin) == 0:
+                return 0
+            self._generation += 1
+            os.replace(self.chemin, f"{self.chemin}.{self._generation}")
+            return self._generation
+
+    def purger(self, generation: int):
+        # Supprimer les fichiers pivotés jusqu'à generation (inclus), couverts par les CSV
+        for numero in self._generations():
+            if numero <= generation:
+                os.remove(f"{self.chemin}.{numero}")
+
+    def lire(self):
+        # Parcourir les opérations enregistrées (fichiers pivotés d'abord, dans l'ordre);
+        # une dernière ligne tronquée est ignorée
+        chemins = [f"{self.chemin}.{numero}" for numero in self._generations()] + [self.chemin]
+        for chemin in chemins:
+            try:
+                with open(chemin, "r", encoding="utf-8") as f:
+                    for numero, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            logger.warning("Registre: %s ligne %d illisible ignorée", chemin, numero)
+            except FileNotFoundError:
+                continue
+
+    def vider(self):
+        # Appelé après la compaction, une fois les CSV écrits
+        with self._verrou:
+            self._fermer()
+            self.purger(self._generation)
+            with open(self.chemin, "w", encoding="utf-8"):
+                pass
+            self.nb_operations = 0
+
+    def _fermer(self):
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+
+    def fermer(self):
+        with self._verrou:
+            self._fermer()
@@ -0,0 +1,299 @@
+"""
+repartition_class.py
+Bibliothèque répartie sur plusieurs succursales, une Bibliotheque par processus.
+    Chaque succursale garde ses fichiers et ses ids; la façade BibliothequeRepartie
+    expose des ids globaux (id local * nb_succursales + numéro de succursale).
+    trouver_*, creer_emprunt et retourner_livre sont envoyés à la succursale
+    propriétaire; les recherches et les retards sont diffusés à toutes les
+    succursales, qui travaillent en parallèle, puis les résultats sont fusionnés.
+    Un adhérent n'emprunte que dans sa succursale d'inscription: creer_emprunt
+    refuse un livre d'une autre succursale. Chaque succursale reste ainsi seule
+    responsable de ses prêts (un emprunt ne touche qu'un processus, sans
+    transaction entre succursales ni copie des adhérents). Pour prêter ailleurs,
+    inscrire l'adhérent dans cette succursale.
+    """
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from bibliotheque_class import Bibliotheque
+from document_classes import Document
+from adherent_class import Adherent
+from emprunt_class import Emprunt
+
+
+# ─────────────────────────────────
+# Branch process
+# ─────────────────────────────────
+
+def _operations(bibliotheque) -> dict:
+    # Opérations exécutées dans le processus d'une succursale (ids locaux)
+
+    def ajouter_document(document):
+        document.id = next(Document._id_gen)  # l'id reçu vient du compteur d'un autre processus
+        bibliotheque.ajouter_document(document)
+        return document.id
+
+    def ajouter_adherent(adherent):
+        Adherent._id_counter += 1
+        adherent.id = Adherent._id_counter
+        return adherent.id if bibliotheque.ajouter_adherent(adherent) else None
+
+    def creer_emprunt(adherent_id, livre_id):
+        succes, message = bibliotheque.creer_emprunt(adherent_id, livre_id)
+        return succes, message, bibliotheque.trouver_emprunt_actif_livre(livre_id, adherent_id) if succes else None
+
+    def retourner_livre(emprunt_id):
+        succes, message = bibliotheque.retourner_livre(emprunt_id)
+        return succes, message, bibliotheque.trouver_emprunt(emprunt_id) if succes else None
+
+    operations = {
+        nom: getattr(bibliotheque, nom) for nom in (
+            "trouver_document", "trouver_adherent", "trouver_emprunt", "retirer_document", "retirer_adherent",
+            "ajouter_exemplaires",
+            "rechercher_documents", "suggerer_livres_disponibles", "suggerer_adherents",
+            "lister_emprunts_en_retard", "lister_emprunts_a_echeance", "sauvegarder",
+        )
+    }
+    operations.update(
+        ajouter_document=ajouter_document, ajouter_adherent=ajouter_adherent,
+        creer_emprunt=creer_emprunt, retourner_livre=retourner_livre,
+        taille=lambda: (len(bibliotheque.documents), len(bibliotheque.adherents), len(bibliotheque.emprunts)),
+        temps_cpu=time.process_time,
+    )
+    return operations
+
+
+def _servir_succursale(connexion, dossier: str):
+    # Boucle d'un processus de succursale: (nom, args) -> (True, résultat) ou (False, exception)
+    bibliotheque = Bibliotheque()
+    if dossier is not None:
+        os.chdir(dossier)
+        bibliotheque.activer_registre()
+        bibliotheque.charger()
+    bibliotheque.preparer_recherche()
+    operations = _operations(bibliotheque)
+    connexion.send((True, None))  # prête
+    while True:
+        requete = connexion.recv()
+        if requete is None:
+            break
+        nom, args = requete
+        try:
+            reponse = (True, operations[nom](*args))
+        except Exception as e:
+            reponse = (False, e)
+        connexion.send(reponse)
+    if dossier is not None:
+        bibliotheque.compacter()  # CSV à jour, registre vidé
+        bibliotheque._registre.fermer()
+    connexion.close()
+
+
+# ─────────────────────────────────
+# Facade
+# ─────────────────────────────────
+
+class BibliothequeRepartie:
+    # dossiers: un dossier de données par succursale (fichiers CSV habituels);
+    # sans dossiers, nb_succursales bibliothèques vides en mémoire (tests, mesures).
+    # Un emprunt appartient à la succursale du livre: l'adhérent doit y être inscrit.
+
+    def __init__(self, dossiers=None, nb_succursales: int = None):
+        dossiers = list(dossiers) if dossiers else [None] * (nb_succursales or 1)
+        self.nb_succursales = len(dossiers)
+        self._connexions = []
+        self._processus = []
+        self._verrous = [threading.Lock() for _ in dossiers]  # une requête à la fois par succursale
+        self._prochaine = itertools.cycle(range(self.nb_succursales))  # placement des nouveaux documents
+        for dossier in dossiers:
+            parent, enfant = multiprocessing.Pipe()
+            processus = multiprocessing.Process(target=_servir_succursale, args=(enfant, dossier), daemon=True)
+            processus.start()
+            enfant.close()
+            self._connexions.append(parent)
+            self._processus.append(processus)
+        for connexion in self._connexions:
+            self._recevoir(connexion)  # attendre la fin des chargements (faits en parallèle)
+
+    def fermer(self):
+        # Arrête les succursales; celles qui ont un dossier réécrivent leurs CSV
+        for connexion in self._connexions:
+            connexion.send(None)
+        for processus in self._processus:
+            processus.join()
+        self._connexions = []
+        self._processus = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    # ─────────────────────────────────
+    # Routing
+    # ─────────────────────────────────
+
+    def succursale_de(self, objet_id: int) -> int:
+        return objet_id % self.nb_succursales
+
+    def _local(self, objet_id: int) -> tuple:
+        # id global -> (succursale, id local)
+        local, succursale = divmod(objet_id, self.nb_succursales)
+        return succursale, local
+
+    def _global(self, objet, succursale: int):
+        # Réécrit sur place les ids d'une entité reçue (une copie) en ids globaux
+        if objet is None:
+            return None
+        n = self.nb_succursales
+        objet.id = objet.id * n + succursale
+        if isinstance(objet, Emprunt):
+            objet.adherent_id = objet.adherent_id * n + succursale
+            objet.livre_id = objet.livre_id * n + succursale
+        elif isinstance(objet, Adherent) and objet.livres_empruntes:
+            objet.livres_empruntes = {livre_id * n + succursale for livre_id in objet.livres_empruntes}
+        return objet
+
+    @staticmethod
+    def _recevoir(connexion):
+        succes, resultat = connexion.recv()
+        if not succes:
+            raise resultat
+        return resultat
+
+    def _appeler(self, succursale: int, nom: str, *args):
+        with self._verrous[succursale]:
+            connexion = self._connexions[succursale]
+            connexion.send((nom, args))
+            return self._recevoir(connexion)
+
+    def _diffuser(self, nom: str, *args) -> list:
+        # Envoie la requête à toutes les succursales avant de lire la première réponse:
+        # elles calculent en même temps. Résultats dans l'ordre des succursales.
+        for verrou in self._verrous:
+            verrou.acquire()
+        try:
+            for connexion in self._connexions:
+                connexion.send((nom, args))
+            # Toutes les réponses sont lues avant de lever une erreur: une réponse
+            # laissée dans un tube serait lue à la place de la suivante
+            reponses = [connexion.recv() for connexion in self._connexions]
+        finally:
+            for verrou in self._verrous:
+                verrou.release()
+        for succes, resultat in reponses:
+            if not succes:
+                raise resultat
+        return [resultat for _, resultat in reponses]
+
+    def _diffuser_entites(self, nom: str, *args) -> list:
+        # Listes d'entités de chaque succursale, avec leurs ids globaux
+        return [
+            [self._global(objet, succursale) for objet in objets]
+            for succursale, objets in enumerate(self._diffuser(nom, *args))
+        ]
+
+    # ─────────────────────────────────
+    # Documents and members
+    # ─────────────────────────────────
+
+    def ajouter_document(self, document, succursale: int = None):
+        # Sans succursale, les documents sont répartis à tour de rôle
+        succursale = next(self._prochaine) if succursale is None else succursale
+        document.id = self._appeler(succursale, "ajouter_document", document) * self.nb_succursales + succursale
+        return True
+
+    def ajouter_adherent(self, adherent: Adherent, succursale: int = 0) -> bool:
+        # Les doublons (nom, prénom) sont détectés dans la succursale d'inscription
+        local = self._appeler(succursale, "ajouter_adherent", adherent)
+        if local is None:
+            return False
+        adherent.id = local * self.nb_succursales + succursale
+        return True
+
+    def trouver_document(self, doc_id: int):
+        succursale, local = self._local(doc_id)
+        return self._global(self._appeler(succursale, "trouver_document", local), succursale)
+
+    def trouver_adherent(self, adherent_id: int):
+        succursale, local = self._local(adherent_id)
+        return self._global(self._appeler(succursale, "trouver_adherent", local), succursale)
+
+    def trouver_emprunt(self, emprunt_id: int):
+        succursale, local = self._local(emprunt_id)
+        return self._global(self._appeler(succursale, "trouver_emprunt", local), succursale)
+
+    def retirer_document(self, doc_id: int) -> bool:
+        succursale, local = self._local(doc_id)
+        return self._appeler(succursale, "retirer_document", local)
+
+    def retirer_adherent(self, adherent_id: int) -> bool:
+        succursale, local = self._local(adherent_id)
+        return self._appeler(succursale, "retirer_adherent", local)
+
+    def ajouter_exemplaires(self, livre_id: int, nombre: int = 1) -> bool:
+        succursale, local = self._local(livre_id)
+        return self._appeler(succursale, "ajouter_exemplaires", local, nombre)
+
+    # ─────────────────────────────────
+    # Borrowing (routed to the owning branch)
+    # ─────────────────────────────────
+
+    def creer_emprunt(self, adherent_id: int, livre_id: int) -> tuple:
+        succursale, livre_local = self._local(livre_id)
+        succursale_adherent, adherent_local = self._local(adherent_id)
+        if succursale_adherent != succursale:
+            return False, "Livre d'une autre succursale: l'adhérent n'y est pas inscrit"
+        succes, message, emprunt = self._appeler(succursale, "creer_emprunt", adherent_local, livre_local)
+        if not succes:
+            return False, message
+        return True, f"Emprunt créé: {self._global(emprunt, succursale)}"
+
+    def retourner_livre(self, emprunt_id: int) -> tuple:
+        succursale, local = self._local(emprunt_id)
+        succes, message, emprunt = self._appeler(succursale, "retourner_livre", local)
+        if not succes:
+            return False, message
+        return True, f"Livre retourné: {self._global(emprunt, succursale)}"
+
+    # ─────────────────────────────────
+    # Federated queries (all branches in parallel)
+    # ─────────────────────────────────
+
+    def rechercher_documents(self, requete: str, limite: int = None) -> list:
+        # Chaque succursale renvoie ses ids triés: la fusion garde l'ordre des ids globaux
+        listes = self._diffuser_entites("rechercher_documents", requete, limite)
+        return list(itertools.islice(heapq.merge(*listes, key=lambda doc: doc.id), limite))
+
+    def suggerer_livres_disponibles(self, requete: str, limite: int = 20) -> list:
+        return self._entrelacer(self._diffuser_entites("suggerer_livres_disponibles", requete, limite), limite)
+
+    def suggerer_adherents(self, requete: str, limite: int = 20) -> list:
+        return self._entrelacer(self._diffuser_entites("suggerer_adherents", requete, limite), limite)
+
+    @staticmethod
+    def _entrelacer(listes: list, limite: int) -> list:
+        # Une suggestion de chaque succursale à tour de rôle (aucune n'est favorisée)
+        tours = itertools.zip_longest(*listes)
+        return list(itertools.islice((objet for tour in tours for objet in tour if objet is not None), limite))
+
+    def lister_emprunts_en_retard(self, delai_jours: int = 30, date_ref=None) -> list:
+        # Listes déjà triées par date d'emprunt dans chaque succursale
+        listes = self._diffuser_entites("lister_emprunts_en_retard", delai_jours, date_ref)
+        return list(heapq.merge(*listes, key=lambda emp: emp.date_emprunt))
+
+    def lister_emprunts_a_echeance(self, debut, fin, delai_jours: int = 30) -> list:
+        listes = self._diffuser_entites("lister_emprunts_a_echeance", debut, fin, delai_jours)
+        return list(heapq.merge(*listes, key=lambda emp: emp.date_emprunt))
+
+    def tailles(self) -> list:
+        # [(documents, adhérents, emprunts)] par succursale
+        return self._diffuser("taille")
+
+    def sauvegarder(self):
+        self._diffuser("sauvegarder")
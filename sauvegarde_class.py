@@ -0,0 +1,185 @@
+"""
+sauvegarde_class.py
+Sauvegarde automatique de la bibliothèque en arrière-plan.
+    Chaque modification (événement de Bibliotheque) marque sa collection comme
+    modifiée; après une rafale, un thread réécrit uniquement les CSV modifiés à
+    partir d'un instantané cohérent (fichier temporaire puis renommage). Le
+    thread qui modifie la bibliothèque n'attend jamais le disque.
+    """
+
+import os
+import threading
+import time
+from bibliotheque_class import (Bibliotheque, COLLECTIONS, DOCUMENT_AJOUTE, DOCUMENT_RETIRE,
+    DISPONIBILITE_MODIFIEE, ADHERENT_AJOUTE, ADHERENT_RETIRE, EMPRUNT_CREE, EMPRUNT_CLOTURE)
+from chargement_class import FICHIERS
+
+_COLLECTION_EVENEMENT = {
+    DOCUMENT_AJOUTE: "documents",
+    DOCUMENT_RETIRE: "documents",
+    DISPONIBILITE_MODIFIEE: "documents",
+    ADHERENT_AJOUTE: "adherents",
+    ADHERENT_RETIRE: "adherents",
+    EMPRUNT_CREE: "emprunts",
+    EMPRUNT_CLOTURE: "emprunts",
+}
+_RETRAITS = (DOCUMENT_RETIRE, ADHERENT_RETIRE)
+
+
+class SauvegardeAuto:
+    # Une collection modifiée est écrite quand delai secondes passent sans nouvelle modification,
+    # et au plus tard delai_max secondes après la première. Chaque entité garde sa ligne CSV en
+    # cache, mise à jour à chaque événement: l'instantané n'est qu'une copie de ces lignes.
+
+    def __init__(self, bibliotheque, delai: float = 2.0, delai_max: float = 30.0):
+        self.bibliotheque = bibliotheque
+        self.delai = delai
+        self.delai_max = delai_max
+        self.nb_sauvegardes = 0
+        self.derniere_erreur = None
+        self._lignes = {collection: {} for collection in COLLECTIONS}  # collection -> {id: ligne CSV}
+        self._modifiees = set()
+        self._premiere = self._derniere = 0.0  # instants de la première et de la dernière modification
+        self._immediat = False
+        self._en_cours = False
+        self._arret = False
+        self._generation_precedente = 0  # fichier de registre pivoté au cycle précédent
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def demarrer(self):
+        # À appeler une fois charger() terminé
+        bibliotheque = self.bibliotheque
+        if bibliotheque._stockage is not None:
+            raise ValueError("La sauvegarde automatique écrit les CSV: inutile avec un moteur de stockage")
+        self._lignes = {
+            "adherents": {adh.id: adh.to_csv() for adh in bibliotheque.adherents.values()},
+            "documents": {doc.id: doc.to_csv() for doc in bibliotheque.documents.values()},
+            "emprunts": {emp.id: emp.to_csv() for emp in bibliotheque.emprunts.values()},
+        }
+        with self._condition:
+            registre = bibliotheque._registre
+            if registre is not None and registre.nb_operations:
+                self._marquer(*COLLECTIONS)  # registre rejoué: les CSV sont en retard
+        bibliotheque.abonner(self._evenement)
+        bibliotheque._sauvegarde_auto = self
+        self._thread = threading.Thread(target=self._boucle, name="SauvegardeAuto", daemon=True)
+        self._thread.start()
+
+    def resynchroniser(self, *collections):
+        # Modifications faites sans événement (importation en masse): relire les lignes des collections
+        bibliotheque = self.bibliotheque
+        lignes = {collection: {objet.id: objet.to_csv() for objet in getattr(bibliotheque, collection).values()}
+                  for collection in collections}
+        with self._condition:
+            self._lignes.update(lignes)
+            self._marquer(*collections)
+
+    def sauvegarder_maintenant(self):
+        # Écrire sans attendre la fin de la rafale (ne bloque pas)
+        with self._condition:
+            if self._modifiees:
+                self._immediat = True
+                self._condition.notify_all()
+
+    def attendre(self):
+        # Bloquer jusqu'à ce que toutes les modifications soient sur disque
+        with self._condition:
+            if self._modifiees:
+                self._immediat = True
+                self._condition.notify_all()
+            while self._modifiees or self._en_cours:
+                self._condition.wait()
+
+    def arreter(self):
+        # Écrire les dernières modifications puis arrêter le thread
+        with self._condition:
+            self._arret = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.bibliotheque.desabonner(self._evenement)
+        self.bibliotheque._sauvegarde_auto = None
+
+    # ─────────────────────────────────
+    # Change tracking (thread qui modifie la bibliothèque)
+    # ─────────────────────────────────
+
+    def _evenement(self, evenement: str, objet):
+        collection = _COLLECTION_EVENEMENT.get(evenement)
+        if collection is None:
+            return
+        ligne = None if evenement in _RETRAITS else objet.to_csv()
+        with self._condition:
+            if ligne is None:
+                self._lignes[collection].pop(objet.id, None)
+            else:
+                self._lignes[collection][objet.id] = ligne
+            self._marquer(collection)
+
+    def _marquer(self, *collections):
+        # Appelé avec le verrou
+        maintenant = time.monotonic()
+        if not self._modifiees:
+            self._premiere = maintenant
+        self._derniere = maintenant
+        self._modifiees.update(collections)
+        self._condition.notify_all()
+
+    # ─────────────────────────────────
+    # Writer thread
+    # ─────────────────────────────────
+
+    def _boucle(self):
+        while True:
+            with self._condition:
+                while not self._modifiees and not self._arret:
+                    self._condition.wait()
+                if not self._modifiees:
+                    return
+                # Regrouper les modifications d'une rafale
+                while not self._arret and not self._immediat:
+                    attente = min(self._derniere + self.delai, self._premiere + self.delai_max) - time.monotonic()
+                    if attente <= 0:
+                        break
+                    self._condition.wait(attente)
+                instantane = {c: list(self._lignes[c].values()) for c in COLLECTIONS if c in self._modifiees}
+                self._modifiees = set()
+                self._immediat = False
+                self._en_cours = True
+            try:
+                self._ecrire(instantane)
+            finally:
+                with self._condition:
+                    self._en_cours = False
+                    self._condition.notify_all()
+
+    def _ecrire(self, instantane: dict):
+        # Les opérations écrites au registre à partir d'ici vont dans un nouveau fichier
+        registre = self.bibliotheque._registre
+        generation = registre.pivoter() if registre is not None else 0
+        chemins = dict(FICHIERS)
+        debut = time.perf_counter()
+        try:
+            for collection, lignes in instantane.items():
+                Bibliotheque._ecrire_fichier(chemins[collection], lignes)
+        except Exception as e:
+            self.derniere_erreur = e
+            self.bibliotheque._signaler_erreur("sauvegarde automatique", e)
+            if not self._arret:
+                with self._condition:
+                    self._marquer(*instantane)  # réessayer au prochain cycle
+            return
+        self.nb_sauvegardes += 1
+        mesures = self.bibliotheque._mesures
+        if mesures is not None:
+            mesures.enregistrer("sauvegarde_auto", time.perf_counter() - debut,
+                                sum(len(lignes) for lignes in instantane.values()),
+                                sum(os.path.getsize(chemins[collection]) for collection in instantane))
+        if registre is not None:
+            # Une opération journalisée juste avant le pivot peut manquer à cet instantané,
+            # mais elle a marqué sa collection: elle sera dans le suivant. Le fichier pivoté
+            # n'est donc supprimé qu'au cycle d'après.
+            registre.purger(self._generation_precedente)
+            self._generation_precedente = max(self._generation_precedente, generation)
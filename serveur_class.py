@@ -0,0 +1,427 @@
+"""
+serveur_class.py
+Serveur HTTP/JSON local (asyncio) exposant une Bibliotheque à plusieurs postes.
+    Un seul processus possède les fichiers de données; les postes de prêt
+    passent par le serveur (voir client_class.BibliothequeDistante).
+    Connexions persistantes (keep-alive) et requêtes en pipeline: toutes les
+    requêtes complètes reçues sont traitées d'un coup et leurs réponses
+    envoyées en une seule écriture, dans l'ordre des requêtes. Une connexion
+    sans requête pendant _DELAI_INACTIVITE secondes est fermée.
+
+    python serveur_class.py [--hote 127.0.0.1] [--port 8765] [--dossier D]
+    """
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal
+from adherent_class import Adherent
+from emprunt_class import Emprunt
+
+PORT_DEFAUT = 8765
+_TAILLE_MAX_ENTETE = 64 * 1024
+_TAILLE_MAX_CORPS = 16 * 1024 * 1024
+_DELAI_INACTIVITE = 15.0  # secondes sans requête avant de fermer une connexion keep-alive
+_STATUTS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 411: "Length Required", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+    500: "Internal Server Error", 501: "Not Implemented",
+}
+_TYPES = {Livre: "Livre", BandeDessinee: "BD", Dictionnaire: "Dictionnaire", Journal: "Journal"}
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────
+# JSON representation of the entities
+# ─────────────────────────────────
+
+def vers_json(objet) -> dict:
+    # Document, Adherent ou Emprunt -> dict sérialisable
+    if isinstance(objet, Adherent):
+        return {
+            "id": objet.id, "nom": objet.nom, "prenom": objet.prenom, "email": objet.email,
+            "date_inscription": objet.date_inscription.isoformat(), "livres_empruntes": sorted(objet.livres_empruntes),
+        }
+    if isinstance(objet, Emprunt):
+        return {
+            "id": objet.id, "adherent_id": objet.adherent_id, "livre_id": objet.livre_id,
+            "date_emprunt": objet.date_emprunt.isoformat(),
+            "date_retour": objet.date_retour.isoformat() if objet.date_retour else None,
+            "exemplaire": objet.exemplaire,
+        }
+    donnees = {"id": objet.id, "type": _TYPES[type(objet)], "titre": objet.titre}
+    if isinstance(objet, Livre):
+        donnees.update(auteur=objet.auteur, disponible=objet.est_disponible,
+                       exemplaires=objet.nb_exemplaires, disponibles=objet.nb_disponibles,
+                       libres=objet.exemplaires_libres())
+    elif isinstance(objet, BandeDessinee):
+        donnees.update(auteur=objet.auteur, dessinateur=objet.dessinateur)
+    elif isinstance(objet, Dictionnaire):
+        donnees.update(langue=objet.langue)
+    else:
+        donnees.update(date_parution=objet.date_parution.isoformat())
+    return donnees
+
+
+def document_depuis_json(donnees: dict):
+    # Sans "id", le document reçoit un nouvel id (création)
+    genre = donnees.get("type")
+    if genre == "Livre":
+        doc = Livre(donnees["titre"], donnees.get("auteur") or "Inconnu", donnees.get("disponible", True),
+                    donnees.get("exemplaires", 1))
+        if "libres" in donnees:
+            doc.definir_exemplaires_libres(donnees["libres"])
+    elif genre == "BD":
+        doc = BandeDessinee(donnees["titre"], donnees.get("auteur") or "Inconnu", donnees.get("dessinateur") or "Inconnu")
+    elif genre == "Dictionnaire":
+        doc = Dictionnaire(donnees["titre"], donnees.get("langue") or "Français")
+    elif genre == "Journal":
+        doc = Journal(donnees["titre"], donnees.get("date_parution") or date.today())
+    else:
+        raise ValueError(f"type de document inconnu: {genre}")
+    if "id" in donnees:
+        doc.id = donnees["id"]
+    return doc
+
+
+def adherent_depuis_json(donnees: dict):
+    adh = Adherent(donnees["nom"], donnees["prenom"], donnees.get("email", ""))
+    if "id" in donnees:
+        adh.id = donnees["id"]
+    if donnees.get("date_inscription"):
+        adh.date_inscription = date.fromisoformat(donnees["date_inscription"])
+    for livre_id in donnees.get("livres_empruntes", ()):
+        adh.ajouter_emprunt(livre_id)
+    return adh
+
+
+def emprunt_depuis_json(donnees: dict):
+    emp = Emprunt(donnees["adherent_id"], donnees["livre_id"], date.fromisoformat(donnees["date_emprunt"]),
+                  donnees.get("exemplaire", 1))
+    emp.id = donnees["id"]
+    if donnees.get("date_retour"):
+        emp.retourner_livre(date.fromisoformat(donnees["date_retour"]))
+    return emp
+
+
+# ─────────────────────────────────
+# Routing (no network: testable directly)
+# ─────────────────────────────────
+
+class ErreurRequete(Exception):
+    # Réponse d'erreur HTTP (statut, message)
+
+    def __init__(self, statut: int, message: str):
+        super().__init__(message)
+        self.statut = statut
+
+
+def _entier(valeur, nom: str) -> int:
+    try:
+        return int(valeur)
+    except (TypeError, ValueError):
+        raise ErreurRequete(400, f"{nom} doit être un entier")
+
+
+class ServeurBibliotheque:
+    # Traduit les requêtes HTTP en appels à la Bibliotheque (toujours depuis la boucle asyncio)
+
+    def __init__(self, bibliotheque):
+        self.bibliotheque = bibliotheque
+        self.nb_requetes = 0
+
+    def executer(self, methode: str, cible: str, corps: bytes = b"") -> tuple:
+        # -> (statut, données JSON)
+        self.nb_requetes += 1
+        url = urlsplit(cible)
+        parties = [p for p in url.path.split("/") if p]
+        params = {cle: valeurs[-1] for cle, valeurs in parse_qs(url.query).items()}
+        try:
+            donnees = json.loads(corps) if corps else {}
+        except ValueError:
+            return 400, {"erreur": "corps JSON invalide"}
+        try:
+            return self._router(methode, parties, params, donnees)
+        except ErreurRequete as e:
+            return e.statut, {"erreur": str(e)}
+        except (KeyError, ValueError, TypeError) as e:
+            return 400, {"erreur": f"requête invalide: {e}"}
+
+    def _router(self, methode: str, parties: list, params: dict, donnees: dict) -> tuple:
+        bib = self.bibliotheque
+        ressource = parties[0] if parties else ""
+        reste = parties[1:]
+        limite = _entier(params["limite"], "limite") if "limite" in params else None
+
+        if ressource == "documents":
+            if not reste:
+                if methode == "GET":
+                    requete = params.get("q", "").strip()
+                    documents = bib.rechercher_documents(requete, limite) if requete else bib.lister_documents()[:limite]
+                    return 200, [vers_json(doc) for doc in documents]
+                if methode == "POST":
+                    doc = document_depuis_json({k: v for k, v in donnees.items() if k != "id"})
+                    bib.ajouter_document(doc)
+                    return 201, vers_json(doc)
+            elif len(reste) == 1:
+                doc_id = _entier(reste[0], "id")
+                if methode == "GET":
+                    doc = bib.trouver_document(doc_id)
+                    if doc is None:
+                        raise ErreurRequete(404, "Document non trouvé")
+                    return 200, vers_json(doc)
+                if methode == "DELETE":
+                    if not bib.retirer_document(doc_id):
+                        raise ErreurRequete(404, "Document non trouvé")
+                    return 200, {"succes": True}
+            elif len(reste) == 2 and reste[1] == "exemplaires" and methode == "POST":
+                doc_id = _entier(reste[0], "id")
+                nombre = _entier(donnees.get("nombre", 1), "nombre")
+                if nombre < 1:
+                    raise ErreurRequete(400, "nombre doit être positif")
+                if not bib.ajouter_exemplaires(doc_id, nombre):
+                    raise ErreurRequete(404, "Livre non trouvé")
+                return 200, vers_json(bib.trouver_document(doc_id))
+        elif ressource == "livres" and reste == ["disponibles"] and methode == "GET":
+            livres = bib.suggerer_livres_disponibles(params.get("q", ""), limite or 20)
+            return 200, [vers_json(livre) for livre in livres]
+        elif ressource == "adherents":
+            if not reste:
+                if methode == "GET":
+                    requete = params.get("q", "").strip()
+                    adherents = bib.suggerer_adherents(requete, limite or 20) if requete else bib.lister_adherents()[:limite]
+                    return 200, [vers_json(adh) for adh in adherents]
+                if methode == "POST":
+                    adh = adherent_depuis_json({k: v for k, v in donnees.items() if k in ("nom", "prenom", "email")})
+                    if not bib.ajouter_adherent(adh):
+                        raise ErreurRequete(409, "Adhérent déjà existant")
+                    return 201, vers_json(adh)
+            elif len(reste) == 1:
+                adherent_id = _entier(reste[0], "id")
+                if methode == "GET":
+                    adh = bib.trouver_adherent(adherent_id)
+                    if adh is None:
+                        raise ErreurRequete(404, "Adhérent non trouvé")
+                    return 200, vers_json(adh)
+                if methode == "DELETE":
+                    if not bib.retirer_adherent(adherent_id):
+                        raise ErreurRequete(404, "Adhérent non trouvé")
+                    return 200, {"succes": True}
+        elif ressource == "emprunts":
+            return self._router_emprunts(methode, reste, params, donnees)
+        elif ressource == "sauvegarder" and methode == "POST":
+            bib.sauvegarder()
+            return 200, {"succes": True}
+        raise ErreurRequete(404, f"Ressource inconnue: {methode} /{'/'.join(parties)}")
+
+    def _router_emprunts(self, methode: str, reste: list, params: dict, donnees: dict) -> tuple:
+        bib = self.bibliotheque
+        if not reste:
+            if methode == "GET":
+                filtre = params.get("filtre", "tous")
+                if "adherent" in params:
+                    emprunts = bib.lister_emprunts_adherent(_entier(params["adherent"], "adherent"), filtre)
+                else:
+                    emprunts = bib.lister_emprunts(filtre)
+                return 200, [vers_json(emp) for emp in emprunts]
+            if methode == "POST":
+                adherent_id = _entier(donnees.get("adherent_id"), "adherent_id")
+                livre_id = _entier(donnees.get("livre_id"), "livre_id")
+                succes, message = bib.creer_emprunt(adherent_id, livre_id)
+                if not succes:
+                    return 409, {"succes": False, "message": message}
+                emprunt = bib.trouver_emprunt_actif_livre(livre_id, adherent_id)
+                return 201, {"succes": True, "message": message, "emprunt": vers_json(emprunt)}
+        elif reste == ["retards"] and methode == "GET":
+            delai = _entier(params.get("delai", 30), "delai")
+            date_ref = date.fromisoformat(params["date"]) if "date" in params else None
+            return 200, [vers_json(emp) for emp in bib.lister_emprunts_en_retard(delai, date_ref)]
+        elif reste == ["lot"] and methode == "POST":
+            paires = [(_entier(a, "adherent_id"), _entier(l, "livre_id")) for a, l in donnees["paires"]]
+            resultats = bib.creer_emprunts(paires, bool(donnees.get("tout_ou_rien")))
+            return 200, [self._resultat_json(r) for r in resultats]
+        elif reste == ["retours"] and methode == "POST":
+            ids = [_entier(i, "emprunt_id") for i in donnees["emprunts"]]
+            resultats = bib.retourner_livres(ids, bool(donnees.get("tout_ou_rien")))
+            return 200, [self._resultat_json(r) for r in resultats]
+        elif len(reste) == 2 and reste[1] == "retour" and methode == "POST":
+            emprunt_id = _entier(reste[0], "id")
+            succes, message = bib.retourner_livre(emprunt_id)
+            if not succes:
+                return 409, {"succes": False, "message": message}
+            return 200, {"succes": True, "message": message, "emprunt": vers_json(bib.trouver_emprunt(emprunt_id))}
+        raise ErreurRequete(404, f"Ressource inconnue: {methode} /emprunts/{'/'.join(reste)}")
+
+    @staticmethod
+    def _resultat_json(resultat) -> dict:
+        return {
+            "succes": resultat.succes, "erreur": resultat.erreur, "message": resultat.message,
+            "emprunt": vers_json(resultat.emprunt) if resultat.emprunt else None,
+        }
+
+
+# ─────────────────────────────────
+# HTTP/1.1 over asyncio (keep-alive, pipelining)
+# ─────────────────────────────────
+
+def _reponse(statut: int, donnees, fermer: bool = False) -> bytes:
+    corps = json.dumps(donnees, ensure_ascii=False).encode("utf-8")
+    entete = (
+        f"HTTP/1.1 {statut} {_STATUTS.get(statut, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(corps)}\r\n"
+        f"{'Connection: close' if fermer else 'Connection: keep-alive'}\r\n\r\n"
+    )
+    return entete.encode("latin-1") + corps
+
+
+class _ProtocoleHTTP(asyncio.Protocol):
+    # Une instance par connexion; les requêtes sont traitées dans l'ordre d'arrivée
+
+    def __init__(self, serveur: ServeurBibliotheque):
+        self.serveur = serveur
+        self.transport = None
+        self._tampon = bytearray()
+        self._fermer = False
+        self._reponse_erreur = None  # réponse d'erreur, envoyée après celles des requêtes précédentes
+        self._minuteur = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._armer_minuteur()
+
+    def connection_lost(self, exc):
+        if self._minuteur is not None:
+            self._minuteur.cancel()
+
+    def _armer_minuteur(self):
+        # Délai d'inactivité, repris à chaque requête
+        if self._minuteur is not None:
+            self._minuteur.cancel()
+        self._minuteur = asyncio.get_running_loop().call_later(_DELAI_INACTIVITE, self.transport.close)
+
+    def pause_writing(self):
+        # Le client ne lit pas ses réponses: arrêter de lire ses requêtes
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def data_received(self, data: bytes):
+        self._tampon += data
+        reponses = []
+        while not self._fermer:
+            requete = self._extraire_requete()
+            if requete is None:
+                break
+            reponses.append(self._traiter(*requete))
+        if self._reponse_erreur is not None:
+            reponses.append(self._reponse_erreur)
+            self._reponse_erreur = None
+        if reponses:
+            self._armer_minuteur()
+            self.transport.write(b"".join(reponses))  # une écriture pour tout le pipeline
+        if self._fermer:
+            self.transport.close()
+
+    def _extraire_requete(self):
+        # (méthode, cible, en-têtes, corps) si une requête complète est dans le tampon
+        fin_entete = self._tampon.find(b"\r\n\r\n")
+        if fin_entete < 0:
+            if len(self._tampon) > _TAILLE_MAX_ENTETE:
+                self._erreur(431, "en-têtes trop longs")
+            return None
+        lignes = bytes(self._tampon[:fin_entete]).decode("latin-1").split("\r\n")
+        try:
+            methode, cible, version = lignes[0].split(" ")
+        except ValueError:
+            self._erreur(400, "ligne de requête invalide")
+            return None
+        entetes = {}
+        for ligne in lignes[1:]:
+            nom, _, valeur = ligne.partition(":")
+            entetes[nom.strip().lower()] = valeur.strip()
+        if "transfer-encoding" in entetes:
+            self._erreur(501, "Transfer-Encoding non supporté (utiliser Content-Length)")
+            return None
+        try:
+            longueur = int(entetes.get("content-length", 0))
+        except ValueError:
+            self._erreur(400, "Content-Length invalide")
+            return None
+        if longueur > _TAILLE_MAX_CORPS:
+            self._erreur(413, "corps trop long")
+            return None
+        debut = fin_entete + 4
+        if len(self._tampon) < debut + longueur:
+            return None  # corps incomplet: attendre la suite
+        corps = bytes(self._tampon[debut:debut + longueur])
+        del self._tampon[:debut + longueur]
+        connexion = entetes.get("connection", "").lower()
+        if connexion == "close" or (version == "HTTP/1.0" and connexion != "keep-alive"):
+            self._fermer = True
+        return methode, cible, entetes, corps
+
+    def _traiter(self, methode: str, cible: str, entetes: dict, corps: bytes) -> bytes:
+        try:
+            statut, donnees = self.serveur.executer(methode, cible, corps)
+        except Exception as e:
+            logger.exception("Erreur serveur (%s %s)", methode, cible)
+            statut, donnees = 500, {"erreur": "erreur interne"}
+        return _reponse(statut, donnees, self._fermer)
+
+    def _erreur(self, statut: int, message: str):
+        self._reponse_erreur = _reponse(statut, {"erreur": message}, fermer=True)
+        self._tampon.clear()
+        self._fermer = True
+
+
+async def demarrer_serveur(bibliotheque, hote: str = "127.0.0.1", port: int = PORT_DEFAUT):
+    # Retourne l'asyncio.Server (port=0: port libre choisi par le système, voir server.sockets)
+    serveur = ServeurBibliotheque(bibliotheque)
+    boucle = asyncio.get_running_loop()
+    return await boucle.create_server(lambda: _ProtocoleHTTP(serveur), hote, port)
+
+
+def main(argv=None) -> int:
+    analyseur = argparse.ArgumentParser(prog="serveur_class.py", description="Serveur HTTP/JSON de la bibliothèque")
+    analyseur.add_argument("--hote", default="127.0.0.1")
+    analyseur.add_argument("--port", type=int, default=PORT_DEFAUT)
+    analyseur.add_argument("--dossier", help="dossier des fichiers de données (défaut: dossier courant)")
+    args = analyseur.parse_args(argv)
+    if args.dossier:
+        os.chdir(args.dossier)
+
+    from bibliotheque_class import Bibliotheque
+    from sauvegarde_class import SauvegardeAuto
+
+    bibliotheque = Bibliotheque()
+    bibliotheque.activer_registre()
+    bibliotheque.charger()
+    bibliotheque.preparer_recherche()
+    sauvegarde = SauvegardeAuto(bibliotheque)
+    sauvegarde.demarrer()
+
+    async def servir():
+        serveur = await demarrer_serveur(bibliotheque, args.hote, args.port)
+        print(f"Bibliothèque servie sur http://{args.hote}:{args.port} (Ctrl+C pour arrêter)")
+        async with serveur:
+            await serveur.serve_forever()
+
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sauvegarde.arreter()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
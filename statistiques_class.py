@@ -0,0 +1,167 @@
+"""
+statistiques_class.py
+Statistiques de circulation tenues à jour à chaque emprunt et retour.
+    Nombre d'emprunts par livre, par adhérent et par auteur, emprunts par jour,
+    durée moyenne des emprunts rendus. Les classements (les plus empruntés) sont
+    lus dans un petit tas de meneurs: leur coût ne dépend pas de la taille de
+    l'historique. Reconstruites d'un bloc au chargement (agreger, ou requêtes
+    groupées du stockage), puis mises à jour à chaque opération.
+    """
+
+import heapq
+from collections import Counter
+from datetime import date, timedelta
+from operator import attrgetter
+
+
+class Classement:
+    # Compteur qui ne fait que croître, avec ses `capacite` clés les plus fréquentes.
+    # Une clé hors des meneurs n'y entre qu'en dépassant le plus petit d'entre eux:
+    # les meneurs sont toujours le vrai classement (ex æquo: les premiers arrivés restent).
+
+    def __init__(self, capacite: int = 100):
+        self.capacite = capacite
+        self.compteurs = {}  # clé -> nombre (toutes les clés)
+        self._meneurs = {}  # clé -> nombre, au plus capacite clés
+        self._tas = []  # (nombre, clé), tas min des meneurs; entrées périmées ignorées
+        self._seuil = 0  # ne dépasse jamais le plus petit meneur (qui ne fait que croître)
+
+    def __len__(self):
+        return len(self.compteurs)
+
+    def remplir(self, compteurs: dict):
+        # Remplace tous les compteurs (reconstruction): meneurs choisis en une passe
+        self.compteurs = compteurs
+        self._meneurs = dict(heapq.nlargest(self.capacite, compteurs.items(), key=lambda paire: paire[1]))
+        self._tas = [(n, c) for c, n in self._meneurs.items()]
+        heapq.heapify(self._tas)
+        # Tant qu'il reste de la place parmi les meneurs, toute clé peut y entrer
+        self._seuil = self._tas[0][0] if len(self._meneurs) >= self.capacite else 0
+
+    def incrementer(self, cle, n: int = 1):
+        compteurs = self.compteurs
+        nombre = compteurs.get(cle, 0) + n
+        compteurs[cle] = nombre
+        if nombre <= self._seuil:
+            return  # cas courant: ni meneur (un meneur dépasse toujours _seuil), ni candidat
+        meneurs = self._meneurs
+        if cle in meneurs:
+            meneurs[cle] = nombre
+            heapq.heappush(self._tas, (nombre, cle))  # l'ancienne entrée devient périmée
+            if len(self._tas) > 2 * self.capacite + 16:
+                self._tas = [(n, c) for c, n in meneurs.items()]
+                heapq.heapify(self._tas)
+        elif len(meneurs) < self.capacite:
+            meneurs[cle] = nombre
+            heapq.heappush(self._tas, (nombre, cle))
+        else:
+            # Candidat: _seuil peut être en retard sur le plus petit meneur
+            self._seuil = self._plus_petit_meneur()
+            if nombre > self._seuil:
+                _, evince = heapq.heapreplace(self._tas, (nombre, cle))
+                del meneurs[evince]
+                meneurs[cle] = nombre
+                self._seuil = self._plus_petit_meneur()
+
+    def _plus_petit_meneur(self) -> int:
+        tas, meneurs = self._tas, self._meneurs
+        while meneurs.get(tas[0][1]) != tas[0][0]:
+            heapq.heappop(tas)
+        return tas[0][0]
+
+    def nombre(self, cle) -> int:
+        return self.compteurs.get(cle, 0)
+
+    def meilleurs(self, k: int = 10) -> list:
+        # [(clé, nombre)] par nombre décroissant; au-delà de capacite, parcours complet des compteurs
+        source = self._meneurs if k <= self.capacite else self.compteurs
+        return heapq.nlargest(k, source.items(), key=lambda paire: paire[1])
+
+
+class StatistiquesCirculation:
+    # Reconstruites par Bibliotheque.charger, puis alimentées par Bibliotheque._appliquer_emprunt
+    # et _appliquer_retour (opérations et registre rejoué)
+
+    def __init__(self, capacite: int = 100):
+        self.livres = Classement(capacite)  # livre_id -> emprunts
+        self.adherents = Classement(capacite)  # adherent_id -> emprunts
+        self.auteurs = Classement(capacite)  # auteur -> emprunts de ses livres
+        self.par_jour = {}  # ordinal de la date d'emprunt -> emprunts
+        self.nb_emprunts = 0
+        self.nb_retournes = 0
+        self.jours_retournes = 0  # somme des durées des emprunts rendus
+
+    def ajouter(self, emprunt, auteur: str = None):
+        self.nb_emprunts += 1
+        self.livres.incrementer(emprunt.livre_id)
+        self.adherents.incrementer(emprunt.adherent_id)
+        if auteur:
+            self.auteurs.incrementer(auteur)
+        jour = emprunt.date_emprunt.toordinal()
+        self.par_jour[jour] = self.par_jour.get(jour, 0) + 1
+        if emprunt.date_retour:
+            self.retourner(emprunt)
+
+    def retourner(self, emprunt):
+        self.nb_retournes += 1
+        self.jours_retournes += (emprunt.date_retour - emprunt.date_emprunt).days
+
+    def reconstruire(self, par_livre: dict, par_adherent: dict, par_auteur: dict, par_jour: dict,
+                     nb_retournes: int, jours_retournes: int):
+        # Agrégats de tout l'historique (voir agreger et StockageSQLite.agreger_emprunts)
+        self.livres.remplir(par_livre)
+        self.adherents.remplir(par_adherent)
+        self.auteurs.remplir(par_auteur)
+        self.par_jour = par_jour
+        self.nb_emprunts = sum(par_livre.values())
+        self.nb_retournes = nb_retournes
+        self.jours_retournes = jours_retournes
+
+    # ─────────────────────────────────
+    # Dashboard queries
+    # ─────────────────────────────────
+
+    def livres_les_plus_empruntes(self, k: int = 10) -> list:
+        return self.livres.meilleurs(k)
+
+    def adherents_les_plus_actifs(self, k: int = 10) -> list:
+        return self.adherents.meilleurs(k)
+
+    def auteurs_les_plus_populaires(self, k: int = 10) -> list:
+        return self.auteurs.meilleurs(k)
+
+    def duree_moyenne(self) -> float:
+        # En jours, emprunts rendus seulement (comme HistoriqueEmprunts.duree_moyenne)
+        return self.jours_retournes / self.nb_retournes if self.nb_retournes else 0.0
+
+    def emprunts_du_jour(self, jour: date) -> int:
+        return self.par_jour.get(jour.toordinal(), 0)
+
+    def emprunts_par_jour(self, debut: date, fin: date) -> dict:
+        # {date: emprunts} pour chaque jour de debut à fin inclus (zéros compris)
+        return {
+            debut + timedelta(days=i): self.par_jour.get(debut.toordinal() + i, 0)
+            for i in range((fin - debut).days + 1)
+        }
+
+
+def agreger(emprunts, documents: dict) -> dict:
+    # Arguments de StatistiquesCirculation.reconstruire, comptés en C (Counter) sur une collection
+    # d'emprunts en mémoire; l'auteur vient du livre (documents retirés: pas d'auteur)
+    par_livre = Counter(map(attrgetter("livre_id"), emprunts))
+    par_auteur = Counter()
+    # Catalogue chargé d'un instantané: l'auteur est lu sans décoder le document
+    auteur_de = getattr(documents, "auteur", None) or (lambda livre_id: getattr(documents.get(livre_id), "auteur", None))
+    for livre_id, nombre in par_livre.items():
+        auteur = auteur_de(livre_id)
+        if auteur:
+            par_auteur[auteur] += nombre
+    rendus = [emprunt for emprunt in emprunts if emprunt.date_retour]
+    return {
+        "par_livre": par_livre,
+        "par_adherent": Counter(map(attrgetter("adherent_id"), emprunts)),
+        "par_auteur": par_auteur,
+        "par_jour": Counter(map(date.toordinal, map(attrgetter("date_emprunt"), emprunts))),
+        "nb_retournes": len(rendus),
+        "jours_retournes": sum((emprunt.date_retour - emprunt.date_emprunt).days for emprunt in rendus),
+    }
@@ -0,0 +1,359 @@
+"""
+stockage_class.py
+Moteurs de stockage de la bibliothèque.
+    Stockage définit l'interface d'un moteur (chargement, enregistrement de chaque
+    opération, réécriture complète pour les imports et la migration);
+    StockageSQLite conserve les données dans une base sqlite3 (tables indexées,
+    mode WAL, une transaction par opération).
+    """
+
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import date
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal, partager_date
+from adherent_class import Adherent
+from emprunt_class import Emprunt
+
+
+class Stockage(ABC):
+    # Interface d'un moteur de stockage
+
+    # True si charger() ne met pas en mémoire les emprunts déjà retournés
+    historique_partiel = False
+
+    @abstractmethod
+    def charger(self, bibliotheque):
+        pass
+
+    @abstractmethod
+    def sauvegarder(self, bibliotheque):
+        # Réécriture complète: imports en masse (ImportateurCSV) et migrer_csv_vers_sqlite.
+        # Bibliotheque.sauvegarder ne l'appelle pas: chaque opération est déjà enregistrée.
+        pass
+
+    def enregistrer(self, op: str, objet):
+        # Appelé après chaque modification (ajout_document, retrait_document, ajout_adherent,
+        # retrait_adherent, emprunt, retour, exemplaires); objet est l'entité concernée ou son id
+        pass
+
+    def enregistrer_lot(self, op: str, objets: list):
+        # Lot d'opérations du même type (creer_emprunts, retourner_livres)
+        for objet in objets:
+            self.enregistrer(op, objet)
+
+    def fermer(self):
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    titre TEXT NOT NULL,
+    auteur TEXT,
+    dessinateur TEXT,
+    langue TEXT,
+    date_parution TEXT,
+    est_disponible INTEGER,
+    nb_exemplaires INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS adherents (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    prenom TEXT NOT NULL,
+    email TEXT,
+    date_inscription TEXT
+);
+CREATE TABLE IF NOT EXISTS emprunts (
+    id INTEGER PRIMARY KEY,
+    adherent_id INTEGER NOT NULL,
+    livre_id INTEGER NOT NULL,
+    date_emprunt TEXT NOT NULL,
+    date_retour TEXT,
+    exemplaire INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_emprunts_adherent ON emprunts(adherent_id);
+CREATE INDEX IF NOT EXISTS idx_emprunts_livre ON emprunts(livre_id);
+CREATE INDEX IF NOT EXISTS idx_emprunts_retour ON emprunts(date_retour);
+"""
+
+# Colonnes ajoutées depuis la première version du schéma (bases existantes: ALTER TABLE)
+_COLONNES_AJOUTEES = (
+    ("documents", "nb_exemplaires", "INTEGER NOT NULL DEFAULT 1"),
+    ("emprunts", "exemplaire", "INTEGER NOT NULL DEFAULT 1"),
+)
+
+_COLONNES_DOCUMENTS = "id, type, titre, auteur, dessinateur, langue, date_parution, est_disponible, nb_exemplaires"
+_COLONNES_EMPRUNTS = "id, adherent_id, livre_id, date_emprunt, date_retour, exemplaire"
+
+# Disponibilité en base des livres à un seul exemplaire (voir _disponible_en_base)
+_MARQUER_EMPRUNTE = "UPDATE documents SET est_disponible = 0 WHERE id = ? AND nb_exemplaires = 1"
+_MARQUER_RENDU = "UPDATE documents SET est_disponible = 1 WHERE id = ? AND nb_exemplaires = 1"
+
+_TYPES = {Livre: "Livre", BandeDessinee: "BD", Dictionnaire: "Dictionnaire", Journal: "Journal"}
+
+
+def _ligne_document(doc) -> tuple:
+    return (
+        doc.id,
+        _TYPES[type(doc)],
+        doc.titre,
+        getattr(doc, "auteur", None),
+        getattr(doc, "dessinateur", None),
+        getattr(doc, "langue", None),
+        doc.date_parution.isoformat() if isinstance(doc, Journal) else None,
+        _disponible_en_base(doc) if isinstance(doc, Livre) else None,
+        doc.nb_exemplaires if isinstance(doc, Livre) else 1,
+    )
+
+
+def _disponible_en_base(livre) -> int:
+    # Plusieurs exemplaires: toujours 1, les exemplaires sortis sont ceux des emprunts actifs
+    # (rechargés avec les documents); un seul exemplaire: la disponibilité, comme avant
+    return int(livre.est_disponible or livre.nb_exemplaires > 1)
+
+
+def _document_depuis_ligne(row):
+    doc_id, doc_type, titre, auteur, dessinateur, langue, date_parution, est_disponible, nb_exemplaires = row
+    if doc_type == "Livre":
+        doc = Livre(titre, auteur, bool(est_disponible), nb_exemplaires)
+    elif doc_type == "BD":
+        doc = BandeDessinee(titre, auteur, dessinateur)
+    elif doc_type == "Dictionnaire":
+        doc = Dictionnaire(titre, langue)
+    elif doc_type == "Journal":
+        doc = Journal(titre, date_parution)
+    else:
+        return None
+    doc.id = doc_id
+    return doc
+
+
+def _ligne_adherent(adh) -> tuple:
+    return (adh.id, adh.nom, adh.prenom, adh.email, adh.date_inscription.isoformat())
+
+
+def _adherent_depuis_ligne(row):
+    adh = Adherent(row[1], row[2], row[3])
+    adh.id = row[0]
+    if row[4]:
+        adh.date_inscription = partager_date(date.fromisoformat(row[4]))
+    return adh
+
+
+def _ligne_emprunt(emp) -> tuple:
+    return (
+        emp.id,
+        emp.adherent_id,
+        emp.livre_id,
+        emp.date_emprunt.isoformat(),
+        emp.date_retour.isoformat() if emp.date_retour else None,
+        emp.exemplaire,
+    )
+
+
+def _emprunt_depuis_ligne(row):
+    # Sans passer par Emprunt.__init__: relire l'historique ne consomme pas d'id
+    emp = Emprunt.__new__(Emprunt)
+    emp.id, emp.adherent_id, emp.livre_id, emp.exemplaire = row[0], row[1], row[2], row[5]
+    emp.date_emprunt = partager_date(date.fromisoformat(row[3]))
+    emp.date_retour = partager_date(date.fromisoformat(row[4])) if row[4] else None
+    return emp
+
+
+class StockageSQLite(Stockage):
+    # Base sqlite3: chaque opération est écrite dans sa propre transaction
+
+    def __init__(self, chemin: str = "bibliotheque.db", charger_historique: bool = False):
+        self.chemin = chemin
+        # Sans l'historique, seuls les emprunts actifs sont chargés; le reste est lu sur disque
+        self.historique_partiel = not charger_historique
+        # Les écritures arrivent sous le verrou d'index de Bibliotheque, quel que soit le thread
+        self.connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.executescript(_SCHEMA)
+        self._migrer()
+
+    def _migrer(self):
+        with self.connexion:
+            for table, colonne, definition in _COLONNES_AJOUTEES:
+                colonnes = {ligne[1] for ligne in self.connexion.execute(f"PRAGMA table_info({table})")}
+                if colonne not in colonnes:
+                    self.connexion.execute(f"ALTER TABLE {table} ADD COLUMN {colonne} {definition}")
+
+    def fermer(self):
+        self.connexion.close()
+
+    # ─────────────────────────────────
+    # Loading / full save
+    # ─────────────────────────────────
+
+    def charger(self, bibliotheque):
+        cur = self.connexion.cursor()
+        for row in cur.execute("SELECT id, nom, prenom, email, date_inscription FROM adherents ORDER BY id"):
+            bibliotheque._indexer_adherent(_adherent_depuis_ligne(row))
+        for row in cur.execute(f"SELECT {_COLONNES_DOCUMENTS} FROM documents ORDER BY id"):
+            doc = _document_depuis_ligne(row)
+            if doc:
+                bibliotheque._indexer_document(doc)
+
+        requete = f"SELECT {_COLONNES_EMPRUNTS} FROM emprunts"
+        if self.historique_partiel:
+            requete += " WHERE date_retour IS NULL"
+        for row in cur.execute(requete + " ORDER BY id"):
+            bibliotheque._charger_emprunt(_emprunt_depuis_ligne(row))
+
+        # Les compteurs d'id doivent dépasser tout ce qui est sur disque, y compris l'historique non chargé
+        max_adh = cur.execute("SELECT MAX(id) FROM adherents").fetchone()[0] or 0
+        max_emp = cur.execute("SELECT MAX(id) FROM emprunts").fetchone()[0] or 0
+        Adherent._id_counter = max(Adherent._id_counter, max_adh)
+        Emprunt._id_counter = max(Emprunt._id_counter, max_emp)
+
+    def sauvegarder(self, bibliotheque):
+        # Réécriture complète (migration); en usage normal chaque opération est déjà enregistrée
+        with self.connexion:
+            self.connexion.execute("DELETE FROM adherents")
+            self.connexion.execute("DELETE FROM documents")
+            self.connexion.executemany(
+                "INSERT INTO adherents VALUES (?, ?, ?, ?, ?)",
+                (_ligne_adherent(adh) for adh in bibliotheque.adherents.values()),
+            )
+            self.connexion.executemany(
+                "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_ligne_document(doc) for doc in bibliotheque.documents.values()),
+            )
+            # L'historique non chargé reste en base: on ne remplace que les emprunts en mémoire
+            self.connexion.executemany(
+                "INSERT OR REPLACE INTO emprunts VALUES (?, ?, ?, ?, ?, ?)",
+                (_ligne_emprunt(emp) for emp in bibliotheque.emprunts.values()),
+            )
+
+    # ─────────────────────────────────
+    # Per-operation writes
+    # ─────────────────────────────────
+
+    def enregistrer(self, op: str, objet):
+        with self.connexion:
+            self._executer(op, objet)
+
+    def _executer(self, op: str, objet):
+        # Appelé dans une transaction
+        if op == "ajout_document":
+            self.connexion.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", _ligne_document(objet)
+            )
+        elif op == "retrait_document":
+            self.connexion.execute("DELETE FROM documents WHERE id = ?", (objet,))
+        elif op == "ajout_adherent":
+            self.connexion.execute("INSERT OR REPLACE INTO adherents VALUES (?, ?, ?, ?, ?)", _ligne_adherent(objet))
+        elif op == "retrait_adherent":
+            self.connexion.execute("DELETE FROM adherents WHERE id = ?", (objet,))
+        elif op == "emprunt":
+            self.connexion.execute("INSERT OR REPLACE INTO emprunts VALUES (?, ?, ?, ?, ?, ?)", _ligne_emprunt(objet))
+            self.connexion.execute(_MARQUER_EMPRUNTE, (objet.livre_id,))
+        elif op == "retour":
+            self.connexion.execute(
+                "UPDATE emprunts SET date_retour = ? WHERE id = ?", (objet.date_retour.isoformat(), objet.id)
+            )
+            self.connexion.execute(_MARQUER_RENDU, (objet.livre_id,))
+        elif op == "exemplaires":
+            self.connexion.execute(
+                "UPDATE documents SET nb_exemplaires = ?, est_disponible = ? WHERE id = ?",
+                (objet.nb_exemplaires, _disponible_en_base(objet), objet.id),
+            )
+
+    def enregistrer_lot(self, op: str, objets: list):
+        # Une seule transaction pour tout le lot
+        with self.connexion:
+            if op == "emprunt":
+                self.connexion.executemany(
+                    "INSERT OR REPLACE INTO emprunts VALUES (?, ?, ?, ?, ?, ?)", [_ligne_emprunt(emp) for emp in objets]
+                )
+                self.connexion.executemany(_MARQUER_EMPRUNTE, [(emp.livre_id,) for emp in objets])
+            elif op == "retour":
+                self.connexion.executemany(
+                    "UPDATE emprunts SET date_retour = ? WHERE id = ?",
+                    [(emp.date_retour.isoformat(), emp.id) for emp in objets],
+                )
+                self.connexion.executemany(_MARQUER_RENDU, [(emp.livre_id,) for emp in objets])
+            else:
+                for objet in objets:
+                    self._executer(op, objet)
+
+    # ─────────────────────────────────
+    # On-disk queries (history not loaded in memory)
+    # ─────────────────────────────────
+
+    def _emprunts(self, condition: str = "", params: tuple = ()) -> list:
+        requete = f"SELECT {_COLONNES_EMPRUNTS} FROM emprunts"
+        if condition:
+            requete += " WHERE " + condition
+        return [_emprunt_depuis_ligne(row) for row in self.connexion.execute(requete + " ORDER BY id", params)]
+
+    def trouver_emprunt(self, emprunt_id: int):
+        resultat = self._emprunts("id = ?", (emprunt_id,))
+        return resultat[0] if resultat else None
+
+    def lister_emprunts(self, filtre="tous") -> list:
+        if filtre == "actifs":
+            return self._emprunts("date_retour IS NULL")
+        if filtre == "retournes":
+            return self._emprunts("date_retour IS NOT NULL")
+        return self._emprunts()
+
+    def lister_emprunts_adherent(self, adherent_id: int, filtre="tous") -> list:
+        if filtre == "actifs":
+            return self._emprunts("adherent_id = ? AND date_retour IS NULL", (adherent_id,))
+        if filtre == "retournes":
+            return self._emprunts("adherent_id = ? AND date_retour IS NOT NULL", (adherent_id,))
+        return self._emprunts("adherent_id = ?", (adherent_id,))
+
+    def lister_emprunts_livre(self, livre_id: int) -> list:
+        return self._emprunts("livre_id = ?", (livre_id,))
+
+    def lignes_historique(self):
+        # Emprunts rendus pour HistoriqueEmprunts.completer: dates converties en ordinaux par SQLite
+        # (julianday du 0001-01-01 = 1721425.5, ordinal 1)
+        return self.connexion.execute(
+            "SELECT id, adherent_id, livre_id, CAST(julianday(date_emprunt) - 1721424.5 AS INTEGER), "
+            "CAST(julianday(date_retour) - 1721424.5 AS INTEGER) FROM emprunts "
+            "WHERE date_retour IS NOT NULL ORDER BY id"
+        )
+
+    def agreger_emprunts(self) -> dict:
+        # Agrégats de tout l'historique pour StatistiquesCirculation.reconstruire (requêtes groupées)
+        execute = self.connexion.execute
+        rendus, jours = execute(
+            "SELECT COUNT(*), SUM(julianday(date_retour) - julianday(date_emprunt)) "
+            "FROM emprunts WHERE date_retour IS NOT NULL"
+        ).fetchone()
+        return {
+            "par_livre": dict(execute("SELECT livre_id, COUNT(*) FROM emprunts GROUP BY livre_id")),
+            "par_adherent": dict(execute("SELECT adherent_id, COUNT(*) FROM emprunts GROUP BY adherent_id")),
+            "par_auteur": dict(execute(
+                "SELECT d.auteur, COUNT(*) FROM emprunts e JOIN documents d ON d.id = e.livre_id "
+                "WHERE d.auteur IS NOT NULL AND d.auteur != '' GROUP BY d.auteur"
+            )),
+            "par_jour": {
+                date.fromisoformat(jour).toordinal(): nombre
+                for jour, nombre in execute("SELECT date_emprunt, COUNT(*) FROM emprunts GROUP BY date_emprunt")
+            },
+            "nb_retournes": rendus,
+            "jours_retournes": round(jours or 0),
+        }
+
+
+def migrer_csv_vers_sqlite(chemin: str = "bibliotheque.db"):
+    # Importer une fois adherents.csv, documents.csv et emprunts.csv dans la base
+    import os
+    from bibliotheque_class import Bibliotheque
+
+    bibliotheque = Bibliotheque()
+    if os.path.exists("registre.jsonl"):
+        bibliotheque.activer_registre()  # inclure les opérations pas encore compactées
+    bibliotheque.charger()
+    stockage = StockageSQLite(chemin, charger_historique=True)
+    stockage.sauvegarder(bibliotheque)
+    stockage.fermer()
+    return bibliotheque
@@ -0,0 +1,60 @@
+"""
+conftest.py
+Fixtures communes: chaque test travaille dans un dossier temporaire (les
+    fichiers de données sont relatifs au dossier courant).
+    """
+
+import asyncio
+import threading
+
+import pytest
+
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre
+from adherent_class import Adherent
+
+
+@pytest.fixture(autouse=True)
+def dossier(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def bibliotheque():
+    # Trois livres (dont un à trois exemplaires) et trois adhérents
+    bib = Bibliotheque()
+    for titre, auteur, exemplaires in (("Dune", "Herbert", 3), ("Solaris", "Lem", 1), ("Ubik", "Dick", 1)):
+        bib.ajouter_document(Livre(titre, auteur, nb_exemplaires=exemplaires))
+    for nom in ("Martin", "Bernard", "Dubois"):
+        bib.ajouter_adherent(Adherent(nom, "Alex", f"{nom.lower()}@exemple.fr"))
+    return bib
+
+
+@pytest.fixture
+def serveur(bibliotheque):
+    # ServeurBibliotheque sur un port libre de localhost, boucle asyncio dans un thread
+    from serveur_class import demarrer_serveur
+
+    boucle = asyncio.new_event_loop()
+    pret = threading.Event()
+    etat = {}
+
+    async def servir():
+        etat["serveur"] = await demarrer_serveur(bibliotheque, "127.0.0.1", 0)
+        pret.set()
+
+    thread = threading.Thread(target=lambda: (boucle.run_until_complete(servir()), boucle.run_forever()), daemon=True)
+    thread.start()
+    assert pret.wait(10)
+    port = etat["serveur"].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+
+    async def arreter():
+        etat["serveur"].close()
+        await etat["serveur"].wait_closed()
+
+    asyncio.run_coroutine_threadsafe(arreter(), boucle).result(10)
+    boucle.call_soon_threadsafe(boucle.stop)
+    thread.join(10)
+    boucle.close()
@@ -0,0 +1,25 @@
+from datetime import date
+
+import pytest
+
+import cli
+from stockage_class import StockageSQLite
+
+
+def test_stats_sqlite_compte_les_emprunts_rendus(bibliotheque, capsys):
+    pytest.importorskip("numpy")
+    adherents = list(bibliotheque.adherents)
+    livres = list(bibliotheque.documents)
+    resultats = bibliotheque.creer_emprunts([(adherents[0], livres[0]), (adherents[1], livres[1])],
+                                            date_emprunt=date(2025, 1, 1))
+    bibliotheque.retourner_livres([resultat.emprunt.id for resultat in resultats], date_retour=date(2025, 1, 11))
+    bibliotheque.creer_emprunts([(adherents[2], livres[2])], date_emprunt=date(2025, 1, 5))
+    stockage = StockageSQLite("b.db")
+    stockage.sauvegarder(bibliotheque)
+    stockage.fermer()
+
+    assert cli.main(["--sqlite", "b.db", "stats", "--date", "2025-01-21"]) == 0
+    sortie = capsys.readouterr().out
+    assert "Emprunts: 3 (1 actifs, 0 en retard)" in sortie
+    assert "Durée moyenne d'un emprunt rendu: 10.0 jours" in sortie
+    assert "2025-01: 3" in sortie
@@ -0,0 +1,82 @@
+import random
+import sys
+import threading
+from collections import Counter
+from datetime import date
+
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre
+from adherent_class import Adherent
+
+NB_THREADS = 8
+NB_OPERATIONS = 1500
+
+
+def _poste(bib, graine, livres, adherents, bilans, erreurs, depart):
+    # Aucune exception n'est attrapée ici: elle est remontée au test
+    try:
+        hasard = random.Random(graine)
+        crees = rendus = 0
+        depart.wait()
+        for _ in range(NB_OPERATIONS):
+            tirage = hasard.random()
+            if tirage < 0.4:
+                crees += bib.creer_emprunt(hasard.choice(adherents), hasard.choice(livres))[0]
+            elif tirage < 0.55:
+                paires = [(hasard.choice(adherents), hasard.choice(livres)) for _ in range(3)]
+                crees += sum(r.succes for r in bib.creer_emprunts(paires, tout_ou_rien=hasard.random() < 0.5))
+            elif tirage < 0.85:
+                emprunt = bib.trouver_emprunt_actif_livre(hasard.choice(livres))
+                if emprunt is not None:
+                    rendus += bib.retourner_livre(emprunt.id)[0]
+            elif tirage < 0.87:
+                # Nouveaux mots dans l'index pendant que d'autres postes cherchent
+                bib.ajouter_document(Livre(f"Titre poste {graine} {hasard.random()}", "Auteur"))
+            else:
+                bib.lister_emprunts("actifs")
+                bib.lister_emprunts_adherent(hasard.choice(adherents), "actifs")
+                bib.lister_emprunts_en_retard(0, date.max)
+                bib.lister_emprunts_a_echeance(date(2000, 1, 1), date(2100, 1, 1), 0)
+                bib.rechercher_documents("titre auteur")
+                bib.suggerer_livres_disponibles("tit", 5)
+                bib.suggerer_adherents("nom", 5)
+        bilans.append((crees, rendus))
+    except BaseException as e:
+        erreurs.append(e)
+
+
+def test_emprunts_et_retours_concurrents():
+    bib = Bibliotheque()
+    for i in range(30):
+        bib.ajouter_document(Livre(f"Titre {i}", f"Auteur {i % 5}", nb_exemplaires=1 + i % 3))
+    for i in range(12):
+        bib.ajouter_adherent(Adherent(f"Nom{i}", "Alex"))
+    livres, adherents = list(bib.documents), list(bib.adherents)
+    bilans, erreurs = [], []
+    depart = threading.Barrier(NB_THREADS)
+    intervalle = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # multiplie les entrelacements
+    try:
+        postes = [threading.Thread(target=_poste, args=(bib, graine, livres, adherents, bilans, erreurs, depart))
+                  for graine in range(NB_THREADS)]
+        for poste in postes:
+            poste.start()
+        for poste in postes:
+            poste.join()
+    finally:
+        sys.setswitchinterval(intervalle)
+
+    assert erreurs == []
+    actifs = bib.lister_emprunts("actifs")
+    assert sum(c for c, _ in bilans) - sum(r for _, r in bilans) == len(actifs)
+    assert {e.id for e in bib.lister_emprunts_en_retard(0, date.max)} == {e.id for e in actifs}
+    assert len(bib.rechercher_documents("titre")) == len(bib.lister_documents())
+    for livre in bib.lister_documents():
+        sortis = bib.lister_emprunts_actifs_livre(livre.id)
+        assert len(sortis) == livre.nb_exemplaires - livre.nb_disponibles
+        assert sorted(e.exemplaire for e in sortis) == sorted(
+            set(range(1, livre.nb_exemplaires + 1)) - set(livre.exemplaires_libres()))
+    for adherent in bib.lister_adherents():
+        livres_detenus = Counter(e.livre_id for e in bib.lister_emprunts_adherent(adherent.id, "actifs"))
+        assert all(n == 1 for n in livres_detenus.values())
+        assert set(adherent.livres_empruntes) == set(livres_detenus)
@@ -0,0 +1,29 @@
+import logging
+from datetime import date, timedelta
+
+import pytest
+
+from bibliotheque_class import Bibliotheque
+from document_classes import Document, partager_date
+
+
+def test_document_est_abstrait():
+    with pytest.raises(TypeError):
+        Document("Sans type")
+
+
+def test_erreur_de_chargement_journalisee(dossier, caplog, capsys):
+    (dossier / "documents.csv").write_bytes(b"\xff\xfe pas de l'utf-8\n")
+    with caplog.at_level(logging.ERROR, logger="bibliotheque_class"):
+        Bibliotheque().charger()
+    assert "chargement documents" in caplog.text
+    assert capsys.readouterr().out == ""
+
+
+def test_partager_date_cache_borne():
+    debut = date(2000, 1, 1)
+    assert partager_date(date(2000, 1, 1)) is partager_date(date(2000, 1, 1))
+    assert partager_date(None) is None
+    for jour in range(100000):
+        partager_date(debut + timedelta(days=jour))
+    assert partager_date.cache_info().currsize <= 65536
@@ -0,0 +1,74 @@
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre, Document
+from emprunt_class import Emprunt
+from stockage_class import StockageSQLite
+
+
+def _dune(bib):
+    return next(doc for doc in bib.documents.values() if doc.titre == "Dune")
+
+
+def test_un_exemplaire_libre_par_emprunt(bibliotheque):
+    dune = _dune(bibliotheque)
+    adherents = sorted(bibliotheque.adherents)
+    for adherent_id in adherents:
+        assert bibliotheque.creer_emprunt(adherent_id, dune.id)[0]
+    assert dune.nb_disponibles == 0 and not dune.est_disponible
+    assert sorted(emp.exemplaire for emp in bibliotheque.lister_emprunts_actifs_livre(dune.id)) == [1, 2, 3]
+
+    emprunt = bibliotheque.trouver_emprunt_actif_livre(dune.id, adherents[1])
+    bibliotheque.retourner_livre(emprunt.id)
+    assert dune.exemplaires_libres() == [emprunt.exemplaire]
+    assert dune.statut() == "✅ 1/3 disponibles"
+
+
+def test_un_seul_exemplaire_par_adherent(bibliotheque):
+    dune = _dune(bibliotheque)
+    adherent = min(bibliotheque.adherents)
+    assert bibliotheque.creer_emprunt(adherent, dune.id)[0]
+    succes, message = bibliotheque.creer_emprunt(adherent, dune.id)
+    assert not succes and "déjà" in message
+
+
+def test_lot_limite_aux_exemplaires_libres(bibliotheque):
+    dune = _dune(bibliotheque)
+    bibliotheque.ajouter_exemplaires(dune.id, -1)  # refusé
+    a, b, c = sorted(bibliotheque.adherents)
+    bibliotheque.creer_emprunt(a, dune.id)
+    resultats = bibliotheque.creer_emprunts([(b, dune.id), (b, dune.id), (c, dune.id)])
+    assert [r.succes for r in resultats] == [True, False, True]
+    assert dune.nb_disponibles == 0 and dune.nb_exemplaires == 3
+
+
+def test_listes_et_recherche_par_titre(bibliotheque):
+    dune = _dune(bibliotheque)
+    assert bibliotheque.rechercher_documents("dune") == [dune]
+    assert bibliotheque.lister_documents().count(dune) == 1
+
+
+def test_exemplaires_persistes(bibliotheque):
+    dune = _dune(bibliotheque)
+    bibliotheque.creer_emprunt(min(bibliotheque.adherents), dune.id)
+    bibliotheque.ajouter_exemplaires(dune.id, 2)
+    bibliotheque.sauvegarder()
+    relue = Bibliotheque()
+    relue.charger()
+    assert _dune(relue).nb_exemplaires == 5 and _dune(relue).nb_disponibles == 4
+
+    stockage = StockageSQLite("b.db", charger_historique=True)
+    stockage.sauvegarder(bibliotheque)
+    stockage.fermer()
+    depuis_base = Bibliotheque()
+    depuis_base.utiliser_stockage(StockageSQLite("b.db"))
+    depuis_base.charger()
+    assert _dune(depuis_base).exemplaires_libres() == dune.exemplaires_libres()
+    depuis_base._stockage.fermer()
+
+
+def test_anciennes_lignes_csv():
+    assert Document.from_csv("Livre,1,T,A,True").nb_exemplaires == 1
+    assert Document.from_csv("Livre,1,T,A,True,4").nb_exemplaires == 4
+    assert Emprunt.from_csv("1,2,3,2024-01-01,").exemplaire == 1
+    assert Emprunt.from_csv("1,2,3,2024-01-01,2024-02-01,3").exemplaire == 3
+    assert Livre("T", "A", nb_exemplaires=2).to_csv().endswith(",True,2")
+    assert Livre("T", "A").to_csv().endswith(",True")
@@ -0,0 +1,90 @@
+from bibliotheque_class import Bibliotheque
+from importation_class import Importateur
+
+
+def _ecrire(chemin, lignes):
+    chemin.write_text("\n".join(lignes) + "\n", encoding="utf-8")
+
+
+def test_importer_documents_et_rejets(dossier):
+    _ecrire(dossier / "docs.csv", [
+        "type,id,titre,auteur,disponible",
+        "Livre,10,Dune,Herbert,True",
+        "BD,11,Tintin,Hergé,Hergé",
+        "Journal,12,Le Monde,2024-02-30",
+        "Livre,13,Solaris",
+        'Livre,14,"Titre, avec virgule",Lem,True,4',
+    ])
+    bib = Bibliotheque()
+    rapport = Importateur(bib).importer_documents(str(dossier / "docs.csv"))
+
+    assert rapport.nb_lignes == 5
+    assert rapport.nb_importes == 3
+    assert [numero for numero, _ in rapport.rejets] == [4, 5]
+    assert sorted(bib.documents) == [10, 11, 14]
+    assert bib.documents[14].titre == "Titre, avec virgule"
+    assert bib.documents[14].nb_exemplaires == 4
+    assert bib.rechercher_documents("virgule") == [bib.documents[14]]
+
+
+def test_importer_adherents_refuse_les_homonymes(dossier):
+    _ecrire(dossier / "adh.csv", [
+        "1,Martin,Alex,alex@exemple.fr,2024-01-05",
+        "2,Martin,Alex,autre@exemple.fr,2024-01-06",
+        "3,Bernard,Lou,,",
+    ])
+    bib = Bibliotheque()
+    rapport = Importateur(bib).importer_adherents(str(dossier / "adh.csv"))
+
+    assert rapport.nb_importes == 2
+    assert rapport.rejets == [(2, "adhérent déjà existant")]
+    assert sorted(bib.adherents) == [1, 3]
+
+
+def test_import_persiste_avec_le_registre(dossier):
+    _ecrire(dossier / "docs.csv", ["Livre,1,Dune,Herbert,True"])
+    bib = Bibliotheque()
+    bib.activer_registre()
+    bib.charger()
+    Importateur(bib).importer_documents(str(dossier / "docs.csv"))
+
+    relue = Bibliotheque()
+    relue.activer_registre()
+    relue.charger()
+    assert [doc.titre for doc in relue.documents.values()] == ["Dune"]
+
+
+def test_id_en_double_dans_le_meme_lot(dossier):
+    _ecrire(dossier / "docs.csv", [
+        "Livre,1,Dune,Herbert,True",
+        "Livre,2,Solaris,Lem,True",
+        "Livre,1,Ubik,Dick,True",
+    ])
+    bib = Bibliotheque()
+    rapport = Importateur(bib, taille_lot=10000).importer_documents(str(dossier / "docs.csv"))
+
+    assert rapport.nb_importes == 2
+    assert rapport.rejets == [(3, "id 1 en double dans le fichier")]
+    assert bib.documents[1].titre == "Dune"
+
+
+def test_import_avec_sauvegarde_automatique(dossier):
+    from sauvegarde_class import SauvegardeAuto
+
+    bib = Bibliotheque()
+    bib.activer_registre()
+    bib.charger()
+    sauvegarde = SauvegardeAuto(bib, delai=0.01)
+    sauvegarde.demarrer()
+    try:
+        _ecrire(dossier / "docs.csv", ["Livre,1,Dune,Herbert,True", "Livre,2,Solaris,Lem,True"])
+        Importateur(bib).importer_documents(str(dossier / "docs.csv"))
+        # Une modification ordinaire ensuite: la prochaine écriture de documents.csv garde les lignes importées
+        bib.retirer_document(2)
+        sauvegarde.attendre()
+    finally:
+        sauvegarde.arreter()
+
+    relue = Bibliotheque()
+    relue.charger()
+    assert [doc.titre for doc in relue.documents.values()] == ["Dune"]
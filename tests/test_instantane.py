@@ -0,0 +1,84 @@
+from datetime import date
+
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre, BandeDessinee, Dictionnaire, Journal
+from instantane_class import Instantane
+
+
+def test_aller_retour_instantane(bibliotheque, dossier):
+    bibliotheque.ajouter_document(BandeDessinee("Tintin", "Hergé", "Hergé"))
+    bibliotheque.ajouter_document(Dictionnaire("Robert", "Français"))
+    bibliotheque.ajouter_document(Journal("Le Monde", date(2024, 3, 1)))
+    livres = [doc.id for doc in bibliotheque.documents.values() if isinstance(doc, Livre)]
+    adherents = list(bibliotheque.adherents)
+    bibliotheque.creer_emprunt(adherents[0], livres[0])
+    bibliotheque.creer_emprunt(adherents[1], livres[0])
+    bibliotheque.retourner_livre(bibliotheque.trouver_emprunt_actif_livre(livres[0], adherents[0]).id)
+    bibliotheque.ecrire_instantane("b.snap")
+
+    relue = Bibliotheque()
+    relue.charger_instantane("b.snap")
+
+    assert sorted(map(str, relue.documents.values())) == sorted(map(str, bibliotheque.documents.values()))
+    assert sorted(map(str, relue.adherents.values())) == sorted(map(str, bibliotheque.adherents.values()))
+    assert sorted(map(str, relue.lister_emprunts())) == sorted(map(str, bibliotheque.lister_emprunts()))
+    assert relue.documents[livres[0]].exemplaires_libres() == bibliotheque.documents[livres[0]].exemplaires_libres()
+
+
+def test_instantane_lecture_par_id(bibliotheque):
+    bibliotheque.ecrire_instantane("b.snap")
+    with Instantane("b.snap") as instantane:
+        premier = min(bibliotheque.documents)
+        assert str(instantane.trouver_document(premier)) == str(bibliotheque.documents[premier])
+        assert instantane.trouver_document(10 ** 9) is None
+        assert len(instantane.adherents) == len(bibliotheque.adherents)
+
+
+def test_livre_a_plus_de_65535_exemplaires():
+    bib = Bibliotheque()
+    livre = Livre("Manuel", "Collectif", nb_exemplaires=70000)
+    bib.ajouter_document(livre)
+    bib.ecrire_instantane("b.snap")
+
+    relue = Bibliotheque()
+    relue.charger_instantane("b.snap")
+    assert relue.documents[livre.id].nb_exemplaires == 70000
+    assert relue.documents[livre.id].nb_disponibles == 70000
+
+
+def test_documents_decodes_a_la_demande(bibliotheque):
+    livre_emprunte = next(doc.id for doc in bibliotheque.documents.values() if isinstance(doc, Livre))
+    bibliotheque.creer_emprunt(next(iter(bibliotheque.adherents)), livre_emprunte)
+    bibliotheque.ecrire_instantane("b.snap")
+
+    relue = Bibliotheque()
+    relue.charger_instantane("b.snap")
+    # Seul le livre emprunté est décodé au chargement
+    assert relue.documents.nb_decodes == 1
+    assert len(relue.documents) == len(bibliotheque.documents)
+    assert relue.statistiques.auteurs_les_plus_populaires() == bibliotheque.statistiques.auteurs_les_plus_populaires()
+    assert relue.documents.nb_decodes == 1
+
+    assert [doc.titre for doc in relue.rechercher_documents("solaris")] == ["Solaris"]
+    assert relue.documents.nb_decodes == 2
+    assert relue.trouver_document(10 ** 9) is None
+    assert relue.documents[livre_emprunte] is relue.trouver_document(livre_emprunte)
+
+
+def test_ajout_et_retrait_apres_instantane(bibliotheque):
+    bibliotheque.ecrire_instantane("b.snap")
+    relue = Bibliotheque()
+    relue.charger_instantane("b.snap")
+    solaris = relue.rechercher_documents("solaris")[0]
+
+    nouveau = Livre("Fondation", "Asimov")
+    relue.ajouter_document(nouveau)
+    assert nouveau.id not in bibliotheque.documents
+    assert relue.retirer_document(solaris.id)
+    assert not relue.retirer_document(solaris.id)
+
+    assert solaris.id not in relue.documents
+    assert len(relue.documents) == len(bibliotheque.documents)
+    assert list(relue.documents)[-1] == nouveau.id
+    assert relue.rechercher_documents("solaris") == []
+    assert relue.rechercher_documents("asimov") == [nouveau]
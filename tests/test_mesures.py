@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from bibliotheque_class import Bibliotheque
+
+
+@pytest.mark.parametrize("parallele", [False, True])
+def test_phases_de_chargement_mesurees(bibliotheque, parallele):
+    assert bibliotheque.creer_emprunt(min(bibliotheque.adherents), min(bibliotheque.documents))[0]
+    bibliotheque.sauvegarder()
+    relue = Bibliotheque()
+    mesures = relue.activer_mesures()
+    relue.charger(parallele=parallele, nb_processus=2)
+
+    for collection in ("adherents", "documents", "emprunts"):
+        stats = mesures.operations[f"charger_{collection}"]
+        assert stats.nombre == 1
+        assert stats.lignes == len(getattr(relue, collection)) > 0
+        assert stats.octets == os.path.getsize(f"{collection}.csv")
+        assert stats.somme > 0
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtCore import Qt
+
+from document_classes import Livre
+from modeles_class import DocumentsModel, ID_ROLE
+
+
+def _ids(modele):
+    return [modele.index(row, 0).data(ID_ROLE) for row in range(modele.rowCount())]
+
+
+def test_lignes_suivies_apres_insertion_tri_et_retrait():
+    livres = [Livre(titre, "Auteur") for titre in ("Ubik", "Dune", "Solaris", "Axiomatique")]
+    modele = DocumentsModel()
+    modele.set_rows(livres[:3])
+    modele.sort(1)  # par titre
+    modele.insert_row(livres[3])
+    assert _ids(modele) == [livres[i].id for i in (3, 1, 2, 0)]
+
+    modele.remove_row(livres[1])
+    modele.remove_row(livres[1])  # déjà retiré: sans effet
+    assert _ids(modele) == [livres[i].id for i in (3, 2, 0)]
+
+    changements = []
+    modele.dataChanged.connect(lambda debut, fin: changements.append(debut.row()))
+    livres[0].prendre_exemplaire()
+    modele.update_row(livres[0])
+    assert changements == [2]
+    assert modele.index(2, 3).data(Qt.ItemDataRole.DisplayRole) == livres[0].statut()
@@ -0,0 +1,80 @@
+from bibliotheque_class import Bibliotheque
+from document_classes import Livre
+from adherent_class import Adherent
+
+
+def _etat(bib):
+    return (
+        sorted((doc.id, doc.titre, getattr(doc, "nb_exemplaires", 1)) for doc in bib.documents.values()),
+        sorted((adh.id, adh.nom) for adh in bib.adherents.values()),
+        sorted((emp.id, emp.adherent_id, emp.livre_id, emp.exemplaire, emp.date_retour)
+               for emp in bib.emprunts.values()),
+        sorted((doc.id, doc.exemplaires_libres()) for doc in bib.documents.values() if isinstance(doc, Livre)),
+    )
+
+
+def _relire():
+    bib = Bibliotheque()
+    bib.activer_registre(seuil_compaction=10 ** 9)
+    bib.charger()
+    return bib
+
+
+def _modifier(bib):
+    livres = [doc.id for doc in bib.documents.values()]
+    adherents = list(bib.adherents)
+    bib.creer_emprunt(adherents[0], livres[0])
+    bib.creer_emprunt(adherents[1], livres[0])
+    succes, _ = bib.creer_emprunt(adherents[2], livres[1])
+    assert succes
+    bib.retourner_livre(bib.trouver_emprunt_actif_livre(livres[0], adherents[0]).id)
+    bib.ajouter_exemplaires(livres[1], 2)
+    bib.retirer_document(livres[2])
+    bib.ajouter_adherent(Adherent("Petit", "Sam"))
+
+
+def test_rejouer_le_registre_apres_compaction(bibliotheque):
+    bibliotheque.activer_registre(seuil_compaction=10 ** 9)
+    bibliotheque.compacter()  # état initial dans les CSV, les modifications dans le registre seul
+    _modifier(bibliotheque)
+    bibliotheque.sauvegarder()
+
+    assert _etat(_relire()) == _etat(bibliotheque)
+
+
+def test_rejouer_un_registre_deja_compacte_est_sans_effet(bibliotheque, dossier):
+    bibliotheque.activer_registre(seuil_compaction=10 ** 9)
+    bibliotheque.compacter()
+    _modifier(bibliotheque)
+    bibliotheque.sauvegarder()
+    registre = (dossier / "registre.jsonl").read_bytes()
+    bibliotheque.compacter()
+    # Crash entre l'écriture des CSV et la remise à zéro du registre: il est rejoué sur les CSV à jour
+    (dossier / "registre.jsonl").write_bytes(registre)
+
+    assert _etat(_relire()) == _etat(bibliotheque)
+
+
+def test_ligne_de_registre_illisible_ignoree(bibliotheque, dossier, caplog):
+    bibliotheque.activer_registre(seuil_compaction=10 ** 9)
+    bibliotheque.compacter()
+    bibliotheque.ajouter_document(Livre("Fondation", "Asimov"))
+    bibliotheque.sauvegarder()
+    with open(dossier / "registre.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "ajout_docu')  # dernière ligne tronquée par un crash
+
+    assert "Fondation" in [doc.titre for doc in _relire().documents.values()]
+    assert "illisible ignorée" in caplog.text
+
+
+def test_compaction_garde_le_registre_si_un_csv_echoue(dossier):
+    (dossier / "documents.csv.tmp").mkdir()  # l'écriture de documents.csv échoue
+    bib = Bibliotheque()
+    bib.activer_registre(seuil_compaction=3)
+    for titre in ("Dune", "Solaris", "Ubik"):
+        bib.ajouter_document(Livre(titre, "Auteur"))
+
+    assert not bib.compacter()
+    assert not (dossier / "documents.csv").exists()
+    (dossier / "documents.csv.tmp").rmdir()
+    assert sorted(doc.titre for doc in _relire().documents.values()) == ["Dune", "Solaris", "Ubik"]
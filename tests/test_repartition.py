@@ -0,0 +1,35 @@
+from adherent_class import Adherent
+from document_classes import Livre
+from repartition_class import BibliothequeRepartie
+
+
+def test_emprunt_dans_la_succursale_d_inscription_seulement():
+    with BibliothequeRepartie(nb_succursales=2) as bib:
+        ici, ailleurs = Livre("Dune", "Herbert"), Livre("Solaris", "Lem")
+        bib.ajouter_document(ici, succursale=0)
+        bib.ajouter_document(ailleurs, succursale=1)
+        adherent = Adherent("Martin", "Alex")
+        assert bib.ajouter_adherent(adherent, succursale=0)
+
+        succes, message = bib.creer_emprunt(adherent.id, ailleurs.id)
+        assert not succes and "autre succursale" in message
+        assert bib.trouver_document(ailleurs.id).est_disponible
+
+        assert bib.creer_emprunt(adherent.id, ici.id)[0]
+        assert not bib.trouver_document(ici.id).est_disponible
+        assert [doc.id for doc in bib.rechercher_documents("dune")] == [ici.id]
+
+
+def test_erreur_diffusee_ne_decale_pas_les_reponses():
+    with BibliothequeRepartie(nb_succursales=3) as bib:
+        for titre in ("Dune", "Solaris", "Ubik"):
+            bib.ajouter_document(Livre(titre, "Auteur"))
+        try:
+            bib.lister_emprunts_en_retard("trente")  # TypeError dans chaque succursale
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("l'erreur d'une succursale doit être levée")
+        # les réponses restantes ont été lues: la diffusion suivante reçoit les siennes
+        assert bib.tailles() == [(1, 0, 0)] * 3
+        assert len(bib.rechercher_documents("auteur")) == 3
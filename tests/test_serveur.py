@@ -0,0 +1,155 @@
+import http.client
+import json
+import re
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import pytest
+
+from client_class import BibliothequeDistante, _fermee_par_le_serveur
+
+
+def _requete(url, methode, chemin, donnees=None):
+    adresse = urlsplit(url)
+    connexion = http.client.HTTPConnection(adresse.hostname, adresse.port, timeout=10)
+    try:
+        corps = json.dumps(donnees).encode() if donnees is not None else None
+        connexion.request(methode, chemin, corps, {"Content-Type": "application/json"})
+        reponse = connexion.getresponse()
+        return reponse.status, json.loads(reponse.read() or b"null")
+    finally:
+        connexion.close()
+
+
+def test_documents_et_recherche(serveur):
+    statut, documents = _requete(serveur, "GET", "/documents")
+    assert statut == 200 and len(documents) == 3
+    statut, trouves = _requete(serveur, "GET", "/documents?q=solar")
+    assert [doc["titre"] for doc in trouves] == ["Solaris"]
+    statut, cree = _requete(serveur, "POST", "/documents", {"type": "Livre", "titre": "Ubik 2", "auteur": "Dick"})
+    assert statut == 201 and cree["disponible"] is True
+    assert _requete(serveur, "GET", f"/documents/{cree['id']}")[1]["titre"] == "Ubik 2"
+    assert _requete(serveur, "DELETE", f"/documents/{cree['id']}")[0] == 200
+    assert _requete(serveur, "GET", f"/documents/{cree['id']}")[0] == 404
+
+
+def test_emprunt_et_retour(serveur, bibliotheque):
+    livre = next(doc for doc in bibliotheque.documents.values() if doc.titre == "Solaris")
+    adherent = min(bibliotheque.adherents)
+    statut, reponse = _requete(serveur, "POST", "/emprunts", {"adherent_id": adherent, "livre_id": livre.id})
+    assert statut == 201 and reponse["emprunt"]["livre_id"] == livre.id
+    statut, reponse2 = _requete(serveur, "POST", "/emprunts", {"adherent_id": adherent + 1, "livre_id": livre.id})
+    assert statut == 409 and not reponse2["succes"]
+    statut, _ = _requete(serveur, "POST", f"/emprunts/{reponse['emprunt']['id']}/retour")
+    assert statut == 200 and livre.est_disponible
+
+
+def test_emprunt_ids_en_texte(serveur, bibliotheque):
+    livre = next(doc for doc in bibliotheque.documents.values() if doc.titre == "Ubik")
+    adherent = min(bibliotheque.adherents)
+    statut, reponse = _requete(serveur, "POST", "/emprunts", {"adherent_id": str(adherent), "livre_id": str(livre.id)})
+    assert statut == 201 and reponse["emprunt"]["adherent_id"] == adherent
+
+
+@pytest.mark.parametrize("chemin, donnees, attendu", [
+    ("/emprunts", {"adherent_id": "x", "livre_id": 1}, 400),
+    ("/inconnu", {}, 404),
+])
+def test_requetes_invalides(serveur, chemin, donnees, attendu):
+    assert _requete(serveur, "POST", chemin, donnees)[0] == attendu
+
+
+def test_client_distant(serveur):
+    client = BibliothequeDistante(serveur)
+    try:
+        client.charger()
+        livre = next(doc for doc in client.lister_documents() if doc.titre == "Dune")
+        succes, _ = client.creer_emprunt(min(client.adherents), livre.id)
+        assert succes and livre.nb_disponibles == 2
+        assert client.ajouter_exemplaires(livre.id, 2) and livre.nb_exemplaires == 5
+    finally:
+        client.fermer()
+
+
+def _lire_jusqu_a_fermeture(connexion) -> bytes:
+    recu = b""
+    while True:
+        bloc = connexion.recv(65536)
+        if not bloc:
+            return recu
+        recu += bloc
+
+
+def test_pipeline_erreur_apres_les_reponses_precedentes(serveur):
+    # Une requête valide puis une requête invalide dans le même envoi: réponses dans l'ordre
+    adresse = urlsplit(serveur)
+    with socket.create_connection((adresse.hostname, adresse.port), timeout=10) as connexion:
+        connexion.sendall(b"GET /documents HTTP/1.1\r\nHost: x\r\n\r\n"
+                          b"GET /documents HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n")
+        recu = _lire_jusqu_a_fermeture(connexion)
+    statuts = re.findall(rb"HTTP/1\.1 (\d+) ", recu)
+    assert statuts == [b"200", b"501"]
+
+
+def test_connexion_inactive_fermee(serveur, monkeypatch):
+    import serveur_class
+    monkeypatch.setattr(serveur_class, "_DELAI_INACTIVITE", 0.2)
+    adresse = urlsplit(serveur)
+    with socket.create_connection((adresse.hostname, adresse.port), timeout=10) as connexion:
+        connexion.sendall(b"GET /documents HTTP/1.1\r\nHost: x\r\n\r\n")
+        assert b"200" in _lire_jusqu_a_fermeture(connexion)  # fermée par le serveur après le délai
+    client = BibliothequeDistante(serveur)
+    try:
+        client.charger()
+        time.sleep(0.5)
+        assert _fermee_par_le_serveur(client._connexion)  # vu par le client avant d'envoyer
+        assert client._requete("GET", "/documents")  # nouvelle connexion, sans erreur
+    finally:
+        client.fermer()
+
+
+@pytest.mark.parametrize("methode, envois", [("GET", 2), ("POST", 1)])
+def test_client_ne_renvoie_que_les_requetes_idempotentes(methode, envois):
+    # Serveur qui lit chaque requête puis ferme la connexion sans répondre
+    ecoute = socket.create_server(("127.0.0.1", 0))
+    recues = []
+
+    def servir():
+        while True:
+            try:
+                connexion, _ = ecoute.accept()
+            except OSError:
+                return
+            with connexion:
+                recues.append(connexion.recv(65536))
+
+    threading.Thread(target=servir, daemon=True).start()
+    client = BibliothequeDistante(f"http://127.0.0.1:{ecoute.getsockname()[1]}", delai=5)
+    try:
+        with pytest.raises((http.client.HTTPException, ConnectionError)):
+            client._requete(methode, "/emprunts", {} if methode == "POST" else None)
+    finally:
+        client.fermer()
+        ecoute.close()
+    assert len(recues) == envois
+
+
+def test_client_miroir_des_exemplaires_libres(serveur, bibliotheque):
+    dune = next(doc for doc in bibliotheque.documents.values() if doc.titre == "Dune")
+    adherents = sorted(bibliotheque.adherents)
+    client = BibliothequeDistante(serveur)
+    try:
+        client.charger()
+        miroir = client.trouver_document(dune.id)
+        # Un autre poste emprunte les exemplaires 1 et 2 puis rend le 1
+        bibliotheque.creer_emprunt(adherents[0], dune.id)
+        bibliotheque.creer_emprunt(adherents[1], dune.id)
+        bibliotheque.retourner_livre(bibliotheque.trouver_emprunt_actif_livre(dune.id, adherents[0]).id)
+        client.lister_documents()
+        assert miroir.exemplaires_libres() == dune.exemplaires_libres() == [1, 3]
+        assert client.creer_emprunt(adherents[2], dune.id)[0]
+        assert miroir.exemplaires_libres() == dune.exemplaires_libres() == [3]
+    finally:
+        client.fermer()
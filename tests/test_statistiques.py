@@ -0,0 +1,21 @@
+import random
+
+from statistiques_class import Classement
+
+
+def test_classement_rempli_en_partie_accepte_de_nouvelles_cles():
+    classement = Classement(10)
+    classement.remplir({"a": 5})
+    classement.incrementer("b")
+    classement.incrementer("b")
+    assert classement.meilleurs(10) == [("a", 5), ("b", 2)]
+
+
+def test_classement_egal_au_classement_complet():
+    hasard = random.Random(7)
+    classement = Classement(5)
+    classement.remplir({cle: hasard.randrange(1, 20) for cle in range(8)})
+    for _ in range(2000):
+        classement.incrementer(hasard.randrange(30))
+    attendus = sorted(classement.compteurs.values(), reverse=True)[:5]
+    assert [nombre for _, nombre in classement.meilleurs(5)] == attendus
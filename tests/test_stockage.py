@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from bibliotheque_class import Bibliotheque
+from emprunt_class import Emprunt
+from stockage_class import Stockage, StockageSQLite
+
+
+def test_historique_partiel_lit_les_emprunts_rendus(bibliotheque):
+    np = pytest.importorskip("numpy")
+    adherents = list(bibliotheque.adherents)
+    livres = list(bibliotheque.documents)
+    resultats = bibliotheque.creer_emprunts([(adherents[0], livres[0]), (adherents[1], livres[1])],
+                                            date_emprunt=date(2025, 1, 1))
+    bibliotheque.retourner_livres([resultats[0].emprunt.id], date_retour=date(2025, 1, 11))
+    bibliotheque.creer_emprunts([(adherents[2], livres[2])], date_emprunt=date(2025, 1, 5))
+    stockage = StockageSQLite("b.db")
+    stockage.sauvegarder(bibliotheque)
+    stockage.fermer()
+
+    relue = Bibliotheque()
+    relue.utiliser_stockage(StockageSQLite("b.db"))
+    relue.charger()
+
+    assert len(relue.lister_emprunts("actifs")) == 2
+    assert len(relue.historique) == 3
+    assert relue.historique.duree_moyenne() == 10.0
+    assert relue.historique.compter_par_adherent() == {adherent_id: 1 for adherent_id in adherents}
+    assert np.sort(relue.historique.durees(date(2025, 1, 21))).tolist() == [10, 16, 20]
+
+
+def test_stockage_est_abstrait():
+    with pytest.raises(TypeError):
+        Stockage()
+
+
+def test_requetes_d_historique_ne_consomment_pas_d_ids(bibliotheque):
+    adherent, livre = next(iter(bibliotheque.adherents)), next(iter(bibliotheque.documents))
+    resultat, = bibliotheque.creer_emprunts([(adherent, livre)], date_emprunt=date(2025, 1, 1))
+    bibliotheque.retourner_livres([resultat.emprunt.id], date_retour=date(2025, 1, 11))
+    stockage = StockageSQLite("b.db")
+    stockage.sauvegarder(bibliotheque)
+
+    compteur = Emprunt._id_counter
+    relu = stockage.trouver_emprunt(resultat.emprunt.id)
+    assert len(stockage.lister_emprunts("retournes")) == 1
+    stockage.fermer()
+    assert Emprunt._id_counter == compteur
+    assert (relu.adherent_id, relu.livre_id, relu.exemplaire) == (adherent, livre, 1)
+    assert (relu.date_emprunt, relu.date_retour) == (date(2025, 1, 1), date(2025, 1, 11))